@@ -0,0 +1,76 @@
+'''
+Detection latency versus false-alarm rate for the residual detectors
+
+    python -m benchmarks.detectors --runs 50 --drift 2
+'''
+import argparse
+import sys
+import numpy as np
+
+from diagnostics.fault_detector import FaultDetector
+from diagnostics.fault_library import Drift, FaultSet, GaussianNoise
+from diagnostics.offline import detection_tradeoff
+from diagnostics.streaming_detectors import CusumDetector, EwmaDetector, WindowDetector
+from simulation.scenario import NOMINAL, build_safe_simulator
+
+DT = 0.001
+
+
+def residual_traces(runs, duration, drift, noise, seed = 0, mismatch = False):
+    '''
+    Residuals with detection disabled, sensor noise and a drift starting at a random time; the twin matches the
+    plant unless mismatch is set, in which case the nominal twin's transient mismatch adds to the residuals
+    '''
+    t = np.arange(0, duration, DT)
+    reference = np.deg2rad(60) * np.ones_like(t)
+    rng = np.random.default_rng(seed)
+    onset = rng.integers(len(t) // 4, len(t) // 2, runs)
+
+    pos_res, vel_res = np.zeros((runs, len(t))), np.zeros((runs, len(t)))
+    for i in range(runs):
+        faults = FaultSet([GaussianNoise(noise), GaussianNoise(noise * 10, channel = "omega"),
+                           Drift(drift, start = onset[i] * DT)], seed = (seed, i))
+        params = {"drift_rate": 0.0, "pos_threshold": np.inf, "vel_threshold": np.inf}
+        if not mismatch:
+            params.update({"J_twin": NOMINAL["J"], "b_twin": NOMINAL["b"], "Kt_twin": NOMINAL["Kt"]})
+        simulator = build_safe_simulator(params, DT, faults = faults)
+        data = simulator.kernel().run(reference, t, ("theta_real", "omega_real", "theta_twin", "omega_twin"))
+        pos_res[i] = data["theta_real"] - data["theta_twin"]
+        vel_res[i] = data["omega_real"] - data["omega_twin"]
+    return pos_res, vel_res, onset
+
+
+def detectors():
+    deg = np.deg2rad
+    return {
+        "threshold 2 deg": FaultDetector(deg(2), deg(5)),
+        "threshold 0.3 deg": FaultDetector(deg(0.3), deg(5)),
+        "window 50 ms": WindowDetector(deg(0.1), deg(2), window = 50, z = 0),
+        "window 200 ms": WindowDetector(deg(0.05), deg(1), window = 200, z = 0),
+        "window 20 ms, 2 se": WindowDetector(deg(0.05), deg(2), window = 20, z = 2),
+        "ewma 0.02": EwmaDetector(deg(0.08), deg(2), alpha = 0.02),
+        "cusum": CusumDetector(deg(5), deg(200), deg(0.1), deg(2)),
+    }
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Residual detector latency / false-alarm benchmark")
+    parser.add_argument("--runs", type = int, default = 50)
+    parser.add_argument("--duration", type = float, default = 3.0)
+    parser.add_argument("--drift", type = float, default = 2.0, help = "drift rate after onset in deg/s")
+    parser.add_argument("--noise", type = float, default = 0.1, help = "position sensor noise std in deg")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--mismatch", action = "store_true", help = "use the nominal (mismatched) digital twin")
+    args = parser.parse_args(argv)
+
+    pos_res, vel_res, onset = residual_traces(args.runs, args.duration, np.deg2rad(args.drift),
+                                              np.deg2rad(args.noise), args.seed, args.mismatch)
+    print(f"{'Detector':20s} {'False alarm':>12s} {'Missed':>8s} {'Mean lat (s)':>13s} {'P95 lat (s)':>12s}")
+    for row in detection_tradeoff(detectors(), pos_res, vel_res, onset, DT):
+        print(f"{row['Detector']:20s} {row['False alarm rate']:12.2f} {row['Missed rate']:8.2f} "
+              f"{row['Mean latency']:13.3f} {row['P95 latency']:12.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
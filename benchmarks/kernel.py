@@ -0,0 +1,90 @@
+'''
+SimulationKernel throughput per stage configuration and recorded channel set, to compare kernel revisions
+
+    python -m benchmarks.kernel --steps 100000 --output results/kernel_baseline.json
+    python -m benchmarks.kernel --compare results/kernel_baseline.json
+'''
+import argparse
+import json
+import sys
+import time
+import numpy as np
+
+from models.actuator import ActuatorModel
+from models.digital_twin import DigitalTwin
+from control.pid import PIDController
+from diagnostics.fault_detector import FaultDetector
+from diagnostics.fault_injection import FaultInjector
+from diagnostics.fault_library import FaultSet, GaussianNoise, TorqueLoss
+from safety.state_machine import SafetyStateMachine
+from simulation.kernel import SimulationKernel
+
+DT = 0.001
+SETPOINT = np.deg2rad(60)
+
+
+def _kernel(stages):
+    parts = {}
+    if "twin" in stages:
+        parts["twin"] = DigitalTwin(0.0033, 0.022, 0.047)
+    if "safety" in stages:
+        parts.update(injector = FaultInjector(np.deg2rad(1)), detector = FaultDetector(np.deg2rad(2), np.deg2rad(5)),
+                     safety = SafetyStateMachine())
+    if "faults" in stages:
+        parts["faults"] = FaultSet([GaussianNoise(1e-4), TorqueLoss(0.8, start = 0.5)], seed = 0)
+    return SimulationKernel(ActuatorModel(0.0035, 0.025, 0.05), PIDController(4, 0.05, 0.2), DT, **parts)
+
+
+CONFIGURATIONS = {                           # name -> (stages, recorded channels, None for all)
+    "plant/theta": ((), ("theta_real",)),
+    "plant/all": ((), None),
+    "twin/all": (("twin",), None),
+    "safe/theta": (("twin", "safety"), ("theta_real",)),
+    "safe/all": (("twin", "safety"), None),
+    "safe+faults/all": (("twin", "safety", "faults"), None),
+}
+
+
+def kernel_benchmarks(steps, repeat = 5):
+    '''
+    Best-of-repeat steps per second; configurations are interleaved so machine noise spreads over all of them
+    '''
+    t = np.arange(steps) * DT
+    reference = SETPOINT * np.ones_like(t)
+    kernels = {name: (_kernel(stages), channels) for name, (stages, channels) in CONFIGURATIONS.items()}
+    best = dict.fromkeys(kernels, np.inf)
+    for _ in range(repeat):
+        for name, (kernel, channels) in kernels.items():
+            start = time.perf_counter()
+            kernel.run(reference, t, channels)
+            best[name] = min(best[name], time.perf_counter() - start)
+    return {f"kernel/{name}/{steps}": {"value": steps / seconds, "unit": "steps/s", "higher_is_better": True}
+            for name, seconds in best.items()}
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Simulation kernel benchmark")
+    parser.add_argument("--steps", type = float, default = 1e5)
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--output", help = "write results to this JSON file")
+    parser.add_argument("--compare", help = "JSON file of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = {"results": kernel_benchmarks(int(args.steps), args.repeat)}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 2)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    for key, result in report["results"].items():
+        line = f"{key:35s} {result['value']:14.0f} steps/s"
+        if key in baseline:
+            line += f" {(result['value'] / baseline[key]['value'] - 1) * 100:+7.1f}%"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
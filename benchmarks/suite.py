@@ -0,0 +1,187 @@
+'''
+Benchmark suite for component hot paths and end-to-end simulator throughput
+
+    python -m benchmarks.suite --output results/benchmark_baseline.json
+    python -m benchmarks.suite --compare results/benchmark_baseline.json --threshold 0.10
+'''
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+import numpy as np
+
+from models.actuator import ActuatorModel
+from models.digital_twin import DigitalTwin
+from control.pid import PIDController
+from diagnostics.fault_detector import FaultDetector, FaultCode
+from diagnostics.fault_injection import FaultInjector
+from safety.state_machine import SafetyStateMachine
+from simulation.simulator_phase1 import Simulator
+from simulation.simulator_phase2 import DualSimulator
+from simulation.simulator_phase3 import SafeSimulator as SafeSimulatorPhase3
+from simulation.simulator_phase4 import SafeSimulator as SafeSimulatorPhase4
+from simulation.ensemble import EnsembleSimulator
+from simulation.scenario import NOMINAL
+from simulation.streaming import constant_reference
+
+DT = 0.001
+SETPOINT = np.deg2rad(60)
+ENSEMBLE_SIZE = 100
+
+
+def _safe(cls):
+    p = NOMINAL
+    return cls(ActuatorModel(p["J"], p["b"], p["Kt"]), DigitalTwin(p["J_twin"], p["b_twin"], p["Kt_twin"]),
+               PIDController(p["Kp"], p["Ki"], p["Kd"]), FaultInjector(p["drift_rate"]),
+               FaultDetector(p["pos_threshold"], p["vel_threshold"]), SafetyStateMachine(), DT)
+
+
+def _ensemble():
+    return EnsembleSimulator(DT, **{k: np.full(ENSEMBLE_SIZE, v) if k == "J" else v for k, v in NOMINAL.items()})
+
+
+def _drain(chunks):
+    for _ in chunks:
+        pass
+
+
+SIMULATORS = {                               # name -> (factory, run(simulator, reference, t), steps per time sample)
+    "Simulator.run": (lambda: Simulator(ActuatorModel(0.0035, 0.025, 0.05), PIDController(4, 0.05, 0.2), DT),
+                      lambda s, r, t: s.run(r, t), 1),
+    "DualSimulator.run": (lambda: DualSimulator(ActuatorModel(0.0035, 0.025, 0.05), DigitalTwin(0.0031, 0.022, 0.047),
+                                                PIDController(4, 0.05, 0.2), DT),
+                          lambda s, r, t: s.run(r, t), 1),
+    "SafeSimulator_phase3.run": (lambda: _safe(SafeSimulatorPhase3), lambda s, r, t: s.run(r, t), 1),
+    "SafeSimulator_phase4.run": (lambda: _safe(SafeSimulatorPhase4), lambda s, r, t: s.run(r, t), 1),
+    "SafeSimulator_phase4.stream": (lambda: _safe(SafeSimulatorPhase4),
+                                    lambda s, r, t: _drain(s.stream(constant_reference(SETPOINT, len(t)))), 1),
+    "EnsembleSimulator.run": (_ensemble, lambda s, r, t: s.run(r, t), ENSEMBLE_SIZE),
+}
+
+
+def micro_benchmarks(number = 100000, repeat = 5):
+    '''
+    Nanoseconds per call of the per-step component methods
+    '''
+    actuator = ActuatorModel(0.0035, 0.025, 0.05)
+    actuator_zoh = ActuatorModel(0.0035, 0.025, 0.05, integrator = "zoh")
+    controller = PIDController(4, 0.05, 0.2)
+    injector = FaultInjector(np.deg2rad(1))
+    detector = FaultDetector(np.deg2rad(2), np.deg2rad(5))
+    safety = SafetyStateMachine()
+    ticking = _safe(SafeSimulatorPhase4)
+    ticking.reset()
+
+    calls = {
+        "ActuatorModel.step": lambda: actuator.step(0.5, DT),
+        "ActuatorModel.step_zoh": lambda: actuator_zoh.step(0.5, DT),
+        "PIDController.compute": lambda: controller.compute(0.1, DT),
+        "FaultInjector.apply": lambda: injector.apply(0.5, DT),
+        "FaultDetector.detect": lambda: detector.detect(0.01, 0.1),
+        "SafetyStateMachine.check": lambda: safety.check(FaultCode.NO_FAULT),
+        "SafeSimulator_phase4.step": lambda: ticking.step(SETPOINT),    # one real-time tick
+    }
+
+    results = {}
+    for name, call in calls.items():
+        best = min(timeit.repeat(call, number = number, repeat = repeat)) / number
+        results[f"micro/{name}"] = {"value": best * 1e9, "unit": "ns/call", "higher_is_better": False}
+    return results
+
+
+def simulator_benchmarks(lengths, memory = True):
+    '''
+    End-to-end steps per second and peak traced memory for every simulator class
+    '''
+    results = {}
+    for name, (factory, run, width) in SIMULATORS.items():
+        for steps in lengths:
+            t = np.arange(steps) * DT
+            reference = SETPOINT * np.ones_like(t)
+            repeat = 3 if steps <= 100000 else 1
+
+            best = np.inf
+            for _ in range(repeat):
+                simulator = factory()
+                start = time.perf_counter()
+                run(simulator, reference, t)
+                best = min(best, time.perf_counter() - start)
+
+            key = f"{name}/{steps}"
+            results[f"throughput/{key}"] = {"value": steps * width / best, "unit": "steps/s",
+                                            "higher_is_better": True}
+
+            if memory:                       # separate pass, tracemalloc slows the loop down
+                simulator = factory()
+                tracemalloc.start()
+                run(simulator, reference, t)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results[f"memory/{key}"] = {"value": peak, "unit": "bytes", "higher_is_better": False}
+
+            print(f"{key:45s} {steps * width / best:14.0f} steps/s", file = sys.stderr)
+    return results
+
+
+def compare(baseline, current, threshold):
+    '''
+    Relative change of every shared benchmark, flagged when worse than threshold
+    '''
+    rows = []
+    for key, base in baseline["results"].items():
+        if key not in current["results"]:
+            continue
+        value = current["results"][key]["value"]
+        change = (value - base["value"]) / base["value"] if base["value"] else 0.0
+        worse = -change if base["higher_is_better"] else change
+        rows.append({"benchmark": key, "baseline": base["value"], "current": value, "unit": base["unit"],
+                     "change": change, "regression": worse > threshold})
+    return rows
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Simulator benchmark suite")
+    parser.add_argument("--lengths", type = float, nargs = "+", default = [1e3, 1e4, 1e5],
+                        help = "trace lengths in steps, e.g. 1e3 1e4 1e5 1e6 1e7")
+    parser.add_argument("--output", help = "write results to this JSON file")
+    parser.add_argument("--compare", help = "baseline JSON file to compare against")
+    parser.add_argument("--threshold", type = float, default = 0.10, help = "relative slowdown flagged as regression")
+    parser.add_argument("--no-memory", action = "store_true", help = "skip the peak memory pass")
+    parser.add_argument("--no-micro", action = "store_true", help = "skip the component microbenchmarks")
+    args = parser.parse_args(argv)
+
+    results = {} if args.no_micro else micro_benchmarks()
+    results.update(simulator_benchmarks([int(n) for n in args.lengths], memory = not args.no_memory))
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "platform": platform.platform(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 2)
+        print(f"Successfully saved benchmark results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['benchmark']:55s} {row['baseline']:14.1f} {row['current']:14.1f} {row['unit']:8s} "
+                  f"{row['change'] * 100:+7.1f}% {flag}")
+        if any(row["regression"] for row in rows):
+            return 1
+    elif not args.output:
+        for key, result in results.items():
+            print(f"{key:55s} {result['value']:14.1f} {result['unit']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,4 +24,15 @@ class PIDController:
 
         self.prev_error = error
 
-        return current
\ No newline at end of file
+        return current
+
+    def compute_batch(self, errors, dt):    # same as compute() on every error in turn
+        errors = np.asarray(errors, dtype = float)
+        if len(errors) == 0:
+            return errors.copy()
+
+        error_int = np.cumsum(np.concatenate(([self.error_int], errors * dt)))[1:]
+        error_diff = np.diff(errors, prepend = self.prev_error) / dt
+
+        self.error_int, self.prev_error = float(error_int[-1]), float(errors[-1])
+        return (self.Kp * errors) + (self.Ki * error_int) + (self.Kd * error_diff)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import itertools
+import numpy as np
+
+from metrics.performance import PerformanceMetrics
+from simulation.ensemble import EnsembleSimulator
+from simulation.scenario import NOMINAL
+
+GAINS = ("Kp", "Ki", "Kd")
+
+
+class GainTuner:
+    '''
+    PID gain search against Requirements, candidates are simulated together as one EnsembleSimulator batch
+    and every evaluated gain set is memoized by a content hash of the gains and the scenario
+    '''
+    def __init__(self, requirements, params = None, dt = 0.001, duration = 2, setpoint = np.deg2rad(60),
+                 integrator = "euler", decimals = 6, cache = None):
+        self.requirements = requirements
+        # tuning is about tracking, so faults are off unless params switch them back on
+        self.params = {**NOMINAL, "drift_rate": 0.0, "pos_threshold": np.inf, "vel_threshold": np.inf,
+                       **(params or {})}
+        for gain in GAINS:
+            self.params.pop(gain, None)
+
+        self.dt = dt
+        self.t = np.arange(0, duration, dt)
+        self.reference = setpoint * np.ones_like(self.t)
+        self.integrator = integrator
+        self.decimals = decimals              # gains equal to this many decimals share one evaluation
+        self.cache = {} if cache is None else cache
+        self.simulated = 0                    # gain sets actually simulated, cache hits excluded
+
+        scenario = {"params": {k: float(v) for k, v in sorted(self.params.items())}, "dt": dt,
+                    "steps": len(self.t), "setpoint": float(setpoint), "integrator": integrator}
+        self.scenario_digest = hashlib.sha256(json.dumps(scenario, sort_keys = True).encode()).hexdigest()
+
+    def key(self, gains):
+        rounded = [round(float(g), self.decimals) + 0.0 for g in gains]    # + 0.0 folds -0.0 into 0.0
+        return hashlib.sha256(json.dumps([self.scenario_digest, rounded]).encode()).hexdigest()
+
+    def evaluate(self, candidates):
+        '''
+        Metrics, verdicts and cost for each (Kp, Ki, Kd), simulating only the gain sets not seen before
+        '''
+        candidates = [tuple(float(g) for g in c) for c in candidates]
+        keys = [self.key(c) for c in candidates]
+        missing = {k: c for k, c in zip(keys, candidates) if k not in self.cache}
+
+        if missing:
+            gains = np.array(list(missing.values()))
+            ensemble = EnsembleSimulator(self.dt, Kp = gains[:, 0], Ki = gains[:, 1], Kd = gains[:, 2],
+                                         integrator = self.integrator, **self.params)
+            theta_real = ensemble.run(self.reference, self.t)[0]
+            for row, (k, c) in enumerate(missing.items()):
+                self.cache[k] = self._score(c, theta_real[row])
+            self.simulated += len(missing)
+
+        return [self.cache[k] for k in keys]
+
+    def _score(self, gains, theta):
+        reference, req = self.reference, self.requirements
+        results = {
+            "overshoot": PerformanceMetrics.overshoot(reference, theta),
+            "rms_error": PerformanceMetrics.rms(reference, theta),
+            "settling_time": PerformanceMetrics.settling(reference, theta, self.t)
+        }
+        verification = {
+            "Overshoot": results["overshoot"] <= req.MAX_OVERSHOOT,
+            "Rms_error": results["rms_error"] <= req.MAX_RMS_ERROR,
+            "Settling_time": results["settling_time"] <= req.MAX_SETTLING_TIME
+        }
+
+        # each metric relative to its limit, the unrounded overshoot keeps the cost smooth for the optimizer
+        ratios = np.array([
+            max(np.max(theta - reference) * 100 / reference[0], 0.0) / req.MAX_OVERSHOOT,
+            results["rms_error"] / req.MAX_RMS_ERROR,
+            results["settling_time"] / req.MAX_SETTLING_TIME
+        ])
+        if not np.all(np.isfinite(ratios)):                    # unstable gains
+            cost = np.inf
+        else:
+            cost = ratios.sum() + 10 * np.sum(np.maximum(ratios - 1, 0))    # violations dominate the cost
+
+        return {**dict(zip(GAINS, gains)), **results, **verification,
+                "Pass": all(verification.values()), "cost": float(cost)}
+
+    def grid(self, Kp_values, Ki_values, Kd_values):
+        '''
+        Exhaustive search over the product of the gain values, all candidates in one batch
+        '''
+        candidates = list(itertools.product(Kp_values, Ki_values, Kd_values))
+        results = self.evaluate(candidates)
+        return sorted(results, key = lambda r: r["cost"])
+
+    def optimize(self, start, scale = 0.2, iterations = 100, tol = 1e-4, bounds = None):
+        '''
+        Nelder-Mead on (Kp, Ki, Kd) within bounds (default >= 0), every iteration submits its trial points as one batch
+        '''
+        lower, upper = bounds if bounds is not None else (np.zeros(3), np.full(3, np.inf))
+        clip = lambda p: np.clip(p, lower, upper)    # the plant has no current limit, so gains need a box
+
+        start = np.asarray(start, dtype = float)
+        simplex = [start] + [start + np.eye(3)[i] * (scale * start[i] if start[i] else scale) for i in range(3)]
+        simplex = [clip(p) for p in simplex]
+        costs = [r["cost"] for r in self.evaluate(simplex)]
+
+        for _ in range(iterations):
+            order = np.argsort(costs)
+            simplex = [simplex[i] for i in order]
+            costs = [costs[i] for i in order]
+            if abs(costs[-1] - costs[0]) <= tol * (abs(costs[0]) + tol):
+                break
+
+            centroid = np.mean(simplex[:-1], axis = 0)
+            worst = simplex[-1]
+            trials = [clip(centroid + c * (worst - centroid)) for c in (-1.0, -2.0, -0.5, 0.5)]
+            reflected, expanded, outside, inside = trials
+            c_ref, c_exp, c_out, c_in = [r["cost"] for r in self.evaluate(trials)]
+
+            shrink = False
+            if c_ref < costs[0]:
+                simplex[-1], costs[-1] = (expanded, c_exp) if c_exp < c_ref else (reflected, c_ref)
+            elif c_ref < costs[-2]:
+                simplex[-1], costs[-1] = reflected, c_ref
+            elif c_ref < costs[-1]:
+                if c_out <= c_ref:
+                    simplex[-1], costs[-1] = outside, c_out
+                else:
+                    shrink = True
+            elif c_in < costs[-1]:
+                simplex[-1], costs[-1] = inside, c_in
+            else:
+                shrink = True
+
+            if shrink:                                       # shrink towards the best point
+                simplex = [simplex[0]] + [simplex[0] + 0.5 * (p - simplex[0]) for p in simplex[1:]]
+                costs = [costs[0]] + [r["cost"] for r in self.evaluate(simplex[1:])]
+
+        best = int(np.argmin(costs))
+        return self.evaluate([simplex[best]])[0]
+
+    def tune(self, Kp_values, Ki_values, Kd_values, iterations = 100):
+        '''
+        Grid search, then Nelder-Mead refinement from the best grid point inside the grid's extent
+        '''
+        best = self.grid(Kp_values, Ki_values, Kd_values)[0]
+        values = (Kp_values, Ki_values, Kd_values)
+        bounds = (np.array([min(v) for v in values]), np.array([max(v) for v in values]))
+        refined = self.optimize([best[g] for g in GAINS], iterations = iterations, bounds = bounds)
+        return refined if refined["cost"] <= best["cost"] else best
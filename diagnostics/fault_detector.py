@@ -1,4 +1,26 @@
 import numpy as np
+from enum import IntEnum
+
+FAULT_LABELS = ("No_fault", "Position_fault", "Velocity_fault", "Severe_fault")
+
+class FaultCode(IntEnum):
+    '''
+    Fault types as small integers, position fault = bit 0 and velocity fault = bit 1
+    '''
+    NO_FAULT = 0
+    POSITION = 1
+    VELOCITY = 2
+    SEVERE = 3
+
+    @property
+    def label(self):
+        return FAULT_LABELS[self]
+
+FAULT_CODES = tuple(FaultCode)    # indexed by pos_fault + 2 * vel_fault
+NO_FAULT, POSITION_FAULT, VELOCITY_FAULT, SEVERE_FAULT = FAULT_CODES
+
+def fault_labels(codes):          # string labels for reports and plots
+    return np.array(FAULT_LABELS)[np.asarray(codes)]
 
 class FaultDetector:
     '''
@@ -8,15 +30,24 @@ class FaultDetector:
         self.pos_threshold = pos_threshold
         self.vel_threshold = vel_threshold
 
+    def reset(self):                              # stateless, kept for the detector interface
+        pass
+
     def detect(self, pos_res, vel_res):
-        pos_fault = np.abs(pos_res) > self.pos_threshold    # position fault when error in position is higher than the threshold
-        vel_fault = np.abs(vel_res) > self.vel_threshold
+        pos_fault = abs(pos_res) > self.pos_threshold    # position fault when error in position is higher than the threshold
+        vel_fault = abs(vel_res) > self.vel_threshold
 
         if pos_fault and vel_fault:
-            return "Severe_fault"
+            return SEVERE_FAULT
         elif pos_fault:
-            return "Position_fault"
+            return POSITION_FAULT
         elif vel_fault:
-            return "Velocity_fault"
+            return VELOCITY_FAULT
         else:
-            return "No_fault"
\ No newline at end of file
+            return NO_FAULT
+
+    def detect_batch(self, pos_res, vel_res):    # coded fault array, thresholds may be arrays broadcasting against residuals
+        pos_fault = np.abs(pos_res) > self.pos_threshold
+        vel_fault = np.abs(vel_res) > self.vel_threshold
+
+        return pos_fault.astype(np.uint8) | (vel_fault.astype(np.uint8) << 1)
@@ -6,8 +6,19 @@ class FaultInjector:
     '''
     def __init__(self, drift_rate = 0.0):
         self.drift_rate = drift_rate    # (deg/sec)
+        self.reset()
+
+    def reset(self):
         self.bias = 0.0
 
     def apply(self, value, dt):
         self.bias += self.drift_rate  * dt    # self.bias accumulates over time
-        return value + self.bias
\ No newline at end of file
+        return value + self.bias
+
+    def apply_batch(self, values, dt):    # same as apply() on every sample in turn
+        steps = np.full(len(values) + 1, self.drift_rate * dt)
+        steps[0] = self.bias
+        bias = np.cumsum(steps)[1:]          # sequential sums, so the bias matches repeated apply() calls
+        if len(bias):
+            self.bias = float(bias[-1])
+        return values + bias
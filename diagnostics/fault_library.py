@@ -0,0 +1,194 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+BLOCK = 4096                                 # samples per random block: any chunking draws the same values
+EFFECTS = ("kt", "theta", "omega")           # torque constant scale, position sensor, velocity sensor
+
+
+def _positional(key, first, n, method = "standard_normal"):
+    '''
+    Random values for samples first .. first + n - 1, drawn per block from a generator keyed by (key, block)
+    '''
+    if n <= 0:
+        return np.zeros(0)
+    b0, b1 = first // BLOCK, (first + n - 1) // BLOCK
+    values = np.concatenate([getattr(np.random.default_rng((*key, b)), method)(BLOCK) for b in range(b0, b1 + 1)])
+    offset = first - b0 * BLOCK
+    return values[offset:offset + n]
+
+
+class FaultSignals:
+    '''
+    Fault arrays for samples first .. first + n - 1, every fault of a FaultSet composed into them
+    '''
+    def __init__(self, first, n):
+        self.first = first
+        self.kt_scale = np.ones(n)                   # multiplies the current reaching the real plant
+        self.theta_offset = np.zeros(n)              # added to the measured angle
+        self.theta_hold = np.zeros(n, dtype = bool)  # sensor repeats its last reading
+        self.omega_offset = np.zeros(n)
+        self.omega_hold = np.zeros(n, dtype = bool)
+
+
+class Fault(ABC):
+    '''
+    Fault on one of the EFFECTS channels its class allows, active from start until stop (seconds); sensor faults
+    act on "theta" or "omega"
+    '''
+    CHANNELS = ("theta", "omega")
+
+    def __init__(self, channel = "theta", start = 0.0, stop = np.inf):
+        if channel not in self.CHANNELS:
+            raise ValueError(f"Unknown channel '{channel}' for {type(self).__name__}, expected one of {self.CHANNELS}")
+        self.channel = channel
+        self.start = start
+        self.stop = stop
+
+    def window(self, k, dt):                 # sample times and the active mask
+        t = k * dt
+        return t, (t >= self.start) & (t < self.stop)
+
+    @abstractmethod
+    def render(self, signals, k, dt, key):   # adds this fault to signals for the sample indices k
+        pass
+
+
+class Drift(Fault):
+    '''
+    Offset growing at rate (units/s) from start on, the FaultInjector drift as an array
+    '''
+    def __init__(self, rate, channel = "theta", start = 0.0, stop = np.inf):
+        super().__init__(channel, start, stop)
+        self.rate = rate
+
+    def render(self, signals, k, dt, key):
+        t, active = self.window(k, dt)
+        getattr(signals, f"{self.channel}_offset")[active] += self.rate * (t[active] - self.start)
+
+
+class BiasStep(Fault):
+    '''
+    Constant offset while active
+    '''
+    def __init__(self, value, channel = "theta", start = 0.0, stop = np.inf):
+        super().__init__(channel, start, stop)
+        self.value = value
+
+    def render(self, signals, k, dt, key):
+        _, active = self.window(k, dt)
+        getattr(signals, f"{self.channel}_offset")[active] += self.value
+
+
+class StuckAt(Fault):
+    '''
+    Sensor frozen at its last reading while active
+    '''
+    def render(self, signals, k, dt, key):
+        _, active = self.window(k, dt)
+        getattr(signals, f"{self.channel}_hold")[active] = True
+
+
+class Dropout(Fault):
+    '''
+    Intermittent dropouts: `rate` starts per second, each holding the last reading for `duration` seconds
+    '''
+    def __init__(self, rate, duration, channel = "theta", start = 0.0, stop = np.inf):
+        super().__init__(channel, start, stop)
+        self.rate = rate
+        self.duration = duration
+
+    def render(self, signals, k, dt, key):
+        if len(k) == 0:
+            return
+        width = max(int(round(self.duration / dt)), 1)
+        first = max(int(k[0]) - width + 1, 0)         # dropouts starting before the chunk reach into it
+        indices = np.arange(first, int(k[-1]) + 1)
+        _, active = self.window(indices, dt)
+        starts = (_positional(key, first, len(indices), "random") < self.rate * dt) & active
+
+        count = np.cumsum(starts)
+        in_window = count - np.concatenate((np.zeros(width, dtype = count.dtype), count))[:len(count)]
+        getattr(signals, f"{self.channel}_hold")[(in_window > 0)[int(k[0]) - first:]] = True
+
+
+class GaussianNoise(Fault):
+    '''
+    Zero-mean white noise with standard deviation std
+    '''
+    def __init__(self, std, channel = "theta", start = 0.0, stop = np.inf):
+        super().__init__(channel, start, stop)
+        self.std = std
+
+    def render(self, signals, k, dt, key):
+        _, active = self.window(k, dt)
+        noise = _positional(key, int(k[0]), len(k)) if len(k) else np.zeros(0)
+        getattr(signals, f"{self.channel}_offset")[active] += self.std * noise[active]
+
+
+class QuantizationNoise(Fault):
+    '''
+    Quantization to `step` modelled as uniform noise in [-step/2, step/2)
+    '''
+    def __init__(self, step, channel = "theta", start = 0.0, stop = np.inf):
+        super().__init__(channel, start, stop)
+        self.step = step
+
+    def render(self, signals, k, dt, key):
+        _, active = self.window(k, dt)
+        noise = _positional(key, int(k[0]), len(k), "random") if len(k) else np.zeros(0)
+        getattr(signals, f"{self.channel}_offset")[active] += self.step * (noise[active] - 0.5)
+
+
+class TorqueLoss(Fault):
+    '''
+    Loss of a fraction of the torque constant Kt, reached linearly over `ramp` seconds
+    '''
+    CHANNELS = ("kt",)
+
+    def __init__(self, fraction, start = 0.0, stop = np.inf, ramp = 0.0):
+        super().__init__("kt", start, stop)
+        self.fraction = fraction
+        self.ramp = ramp
+
+    def render(self, signals, k, dt, key):
+        t, active = self.window(k, dt)
+        progress = np.clip((t[active] - self.start) / self.ramp, 0, 1) if self.ramp > 0 else 1.0
+        signals.kt_scale[active] *= 1 - self.fraction * progress
+
+
+class FaultSet:
+    '''
+    Composition of faults rendered to arrays: offsets add, holds combine, torque losses multiply.
+    Reproducible from the seed and identical for any chunking of the run
+    '''
+    def __init__(self, faults, seed = 0):
+        self.faults = list(faults)
+        self.seed = seed
+        self.effects = tuple(e for e in EFFECTS if any(f.channel == e for f in self.faults))
+        self.reset()
+
+    def reset(self):
+        self.held_theta = 0.0                # last reading of each sensor, repeated while held
+        self.held_omega = 0.0
+
+    def chunk(self, first, n, dt):
+        signals = FaultSignals(first, n)
+        k = np.arange(first, first + n)
+        for i, fault in enumerate(self.faults):
+            fault.render(signals, k, dt, (self.seed, i))
+        return signals
+
+    def signals(self, n, dt):                # whole run
+        return self.chunk(0, n, dt)
+
+    def measure(self, values, offset, hold, channel):
+        '''
+        Sensor readings for true values, same as the simulation loop sample by sample
+        '''
+        measured = values + offset
+        index = np.maximum.accumulate(np.where(hold, -1, np.arange(len(values))))
+        held = getattr(self, f"held_{channel}")
+        measured = np.where(index >= 0, measured[np.maximum(index, 0)], held)
+        if len(measured):
+            setattr(self, f"held_{channel}", float(measured[-1]))
+        return measured
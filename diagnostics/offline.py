@@ -0,0 +1,41 @@
+import numpy as np
+from diagnostics.fault_detector import FaultDetector
+from safety.state_machine import SafetyStateMachine
+
+def replay(pos_res, vel_res, pos_thresholds, vel_thresholds):
+    '''
+    Fault codes and safety states of a recorded residual trace for K threshold pairs, shaped (K, len(trace))
+    '''
+    # open-loop replay: the recorded residuals already include the current limiting of the original run
+    detector = FaultDetector(np.asarray(pos_thresholds, dtype = float)[:, None],
+                             np.asarray(vel_thresholds, dtype = float)[:, None])
+    faults = detector.detect_batch(np.asarray(pos_res), np.asarray(vel_res))
+    return faults, SafetyStateMachine.check_batch(faults)
+
+def first_index(mask, axis = -1):    # index of the first True along axis, -1 where there is none
+    mask = np.asarray(mask)
+    return np.where(mask.any(axis = axis), np.argmax(mask, axis = axis), -1)
+
+def detection_tradeoff(detectors, pos_res, vel_res, onset, dt):
+    '''
+    False-alarm rate, missed-detection rate and latency of each detector on (runs, T) residual traces
+    with a fault starting at sample `onset` (scalar or one per run)
+    '''
+    pos_res, vel_res = np.atleast_2d(pos_res), np.atleast_2d(vel_res)
+    runs, length = pos_res.shape
+    onset = np.broadcast_to(np.asarray(onset), (runs,))
+    after_onset = np.arange(length) >= onset[:, None]
+
+    rows = []
+    for name, detector in detectors.items():
+        alarm = detector.detect_batch(pos_res, vel_res) != 0
+        first = first_index(alarm)
+        false_alarm = (first >= 0) & (first < onset)        # in closed loop this run would have stopped early
+        detection = first_index(alarm & after_onset)
+        detected = detection >= 0
+        latency = (detection[detected] - onset[detected]) * dt
+
+        rows.append({"Detector": name, "False alarm rate": false_alarm.mean(), "Missed rate": 1 - detected.mean(),
+                     "Mean latency": latency.mean() if latency.size else np.nan,
+                     "P95 latency": np.percentile(latency, 95) if latency.size else np.nan})
+    return rows
@@ -0,0 +1,206 @@
+import copy
+import math
+import numpy as np
+from diagnostics.fault_detector import NO_FAULT, POSITION_FAULT, VELOCITY_FAULT, SEVERE_FAULT
+
+# Per-channel statistics: update(x) is O(1) time and memory per sample, batch(x) evaluates a whole trace
+# (any leading shape, time along the last axis) from a fresh state with NumPy, STATE names the fields update() changes.
+
+
+class MovingWindow:
+    '''
+    Mean and variance of the last `window` samples, running sums of x and x**2 over a preallocated ring buffer.
+    The buffer starts at zero like the EWMA, so the mean does not jump on the first few noisy samples.
+    With z > 0 the statistic is the mean shrunk towards zero by z standard errors, so a window only crosses a
+    threshold once its mean clears it by more than the spread of its samples
+    '''
+    STATE = ("buffer", "position", "total", "total_sq")    # everything update() changes, saved in snapshots
+
+    def __init__(self, window = 50, z = 0.0):
+        self.window = int(window)
+        self.z = z
+        self.reset()
+
+    def reset(self):
+        self.buffer = [0.0] * self.window
+        self.position = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, x):
+        old = self.buffer[self.position]          # 0.0 until the window has filled
+        self.buffer[self.position] = x
+        self.total += x - old
+        self.total_sq += x * x - old * old
+
+        self.position += 1
+        if self.position == self.window:          # re-summing once per wrap keeps rounding from piling up
+            self.position = 0
+            self.total = sum(self.buffer)
+            self.total_sq = sum(v * v for v in self.buffer)
+        mean = self.total / self.window
+        if not self.z:
+            return mean
+        margin = self.z * math.sqrt(self.variance / self.window)
+        return mean - margin if mean > margin else (mean + margin if mean < -margin else 0.0)
+
+    @property
+    def variance(self):                      # over the window, zeros included until it has filled
+        mean = self.total / self.window
+        return max(self.total_sq / self.window - mean * mean, 0.0)
+
+    def batch(self, x, variance = False):
+        '''
+        The statistic update() returns for every sample, and with variance = True the window variance as well
+        '''
+        x = np.asarray(x, dtype = float)
+
+        def window_sum(values):
+            total = np.cumsum(values, axis = -1)
+            total[..., self.window:] -= total[..., :-self.window].copy()
+            return total
+
+        mean = window_sum(x) / self.window
+        var = np.maximum(window_sum(x * x) / self.window - mean * mean, 0.0)
+        statistic = mean
+        if self.z:
+            statistic = np.sign(mean) * np.maximum(np.abs(mean) - self.z * np.sqrt(var / self.window), 0.0)
+        return (statistic, var) if variance else statistic
+
+
+class Cusum:
+    '''
+    Two-sided CUSUM with drift allowance k, the larger of the upper and lower sums
+    '''
+    STATE = ("high", "low")
+
+    def __init__(self, k):
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self.high = 0.0
+        self.low = 0.0
+
+    def update(self, x):
+        high = self.high + x - self.k
+        low = self.low - x - self.k
+        self.high = high if high > 0 else 0.0
+        self.low = low if low > 0 else 0.0
+        return self.high if self.high > self.low else self.low
+
+    def batch(self, x):
+        x = np.asarray(x, dtype = float)
+
+        def lindley(steps):                       # g[k] = max(0, g[k-1] + steps[k]) without the recursion
+            total = np.cumsum(steps, axis = -1)
+            return total - np.minimum(np.minimum.accumulate(total, axis = -1), 0.0)
+
+        return np.maximum(lindley(x - self.k), lindley(-x - self.k))
+
+
+class Ewma:
+    '''
+    Exponentially weighted moving average with smoothing factor alpha
+    '''
+    STATE = ("value",)
+
+    def __init__(self, alpha = 0.05):
+        if not 0 < alpha <= 1:
+            raise ValueError(f"alpha has to be in (0, 1], got {alpha}")
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.value = 0.0
+
+    def update(self, x):
+        self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def batch(self, x):
+        x = np.asarray(x, dtype = float)
+        p = 1 - self.alpha
+        if p == 0:
+            return x.copy()
+
+        # closed form per block: z[i] = p^(i+1) * (z0 + alpha * sum_j<=i x[j] / p^(j+1)), blocks keep p^-n finite
+        block = max(1, int(300 / -np.log(p)))
+        out = np.empty_like(x)
+        z = np.zeros(x.shape[:-1])
+        for start in range(0, x.shape[-1], block):
+            part = x[..., start:start + block]
+            powers = p ** np.arange(1, part.shape[-1] + 1)
+            values = powers * (z[..., None] + self.alpha * np.cumsum(part / powers, axis = -1))
+            out[..., start:start + part.shape[-1]] = values
+            z = values[..., -1]
+        return out
+
+
+class StatisticDetector:
+    '''
+    Fault codes from a streaming statistic of each residual against a threshold, same interface as FaultDetector
+    '''
+    stateful = True
+
+    def __init__(self, pos_statistic, vel_statistic, pos_threshold, vel_threshold):
+        self.pos = pos_statistic
+        self.vel = vel_statistic
+        self.pos_threshold = pos_threshold
+        self.vel_threshold = vel_threshold
+
+    def reset(self):
+        self.pos.reset()
+        self.vel.reset()
+
+    def detect(self, pos_res, vel_res):
+        pos_fault = abs(self.pos.update(pos_res)) > self.pos_threshold
+        vel_fault = abs(self.vel.update(vel_res)) > self.vel_threshold
+
+        if pos_fault and vel_fault:
+            return SEVERE_FAULT
+        elif pos_fault:
+            return POSITION_FAULT
+        elif vel_fault:
+            return VELOCITY_FAULT
+        else:
+            return NO_FAULT
+
+    def detect_batch(self, pos_res, vel_res):    # whole traces from a fresh state, time along the last axis
+        pos_fault = np.abs(self.pos.batch(pos_res)) > self.pos_threshold
+        vel_fault = np.abs(self.vel.batch(vel_res)) > self.vel_threshold
+
+        return pos_fault.astype(np.uint8) | (vel_fault.astype(np.uint8) << 1)
+
+    def get_state(self):                     # for simulation snapshots, the STATE fields of both statistics
+        return tuple({name: copy.copy(getattr(s, name)) for name in s.STATE} for s in (self.pos, self.vel))
+
+    def set_state(self, state):
+        for statistic, fields in zip((self.pos, self.vel), state):
+            for name, value in fields.items():
+                setattr(statistic, name, copy.copy(value))
+
+
+class WindowDetector(StatisticDetector):
+    '''
+    Moving-window mean of the residuals, averaging out noise and transient mismatch; a fault needs the mean beyond
+    the threshold by z standard errors of the window, so a noisy or swinging residual is not flagged on its mean alone
+    '''
+    def __init__(self, pos_threshold, vel_threshold, window = 50, z = 2.0):
+        super().__init__(MovingWindow(window, z), MovingWindow(window, z), pos_threshold, vel_threshold)
+
+
+class CusumDetector(StatisticDetector):
+    '''
+    Two-sided CUSUM of the residuals, accumulating small persistent deviations such as drift
+    '''
+    def __init__(self, pos_threshold, vel_threshold, pos_allowance, vel_allowance):
+        super().__init__(Cusum(pos_allowance), Cusum(vel_allowance), pos_threshold, vel_threshold)
+
+
+class EwmaDetector(StatisticDetector):
+    '''
+    Exponentially weighted moving average of the residuals
+    '''
+    def __init__(self, pos_threshold, vel_threshold, alpha = 0.05):
+        super().__init__(Ewma(alpha), Ewma(alpha), pos_threshold, vel_threshold)
@@ -15,4 +15,65 @@ class PerformanceMetrics:
     @staticmethod
     def settling(reference, theta_array, t, tol = 0.02):    # calculates settling time based on value of tol (currently set to 2%)
         index = np.where(~((np.abs(theta_array - reference)) <= (tol * reference)))[0]
-        return t[index[-1] if index.size > 0 else 0]
\ No newline at end of file
+        return t[index[-1] if index.size > 0 else 0]
+
+class OnlineMetrics:
+    """
+    Incremental overshoot, RMS and settling time, fed per sample or per chunk without keeping the trace
+    """
+    def __init__(self, tol = 0.02):
+        self.tol = tol
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.first_reference = None
+        self.first_time = None
+        self.max_deviation = -np.inf      # largest theta - reference so far
+        self.mean_square = 0.0            # running mean of the squared error
+        self.last_outside = None          # last time the response was outside the tolerance band
+
+    def add(self, reference, theta, t):   # one sample, plain float arithmetic
+        if self.count == 0:
+            self.first_reference, self.first_time = reference, t
+
+        error = theta - reference
+        if error > self.max_deviation:
+            self.max_deviation = error
+
+        self.count += 1
+        self.mean_square += (error * error - self.mean_square) / self.count    # Welford update of the mean
+
+        if not abs(error) <= self.tol * reference:
+            self.last_outside = t
+
+    def update(self, reference, theta_array, t):    # one chunk of samples
+        if len(t) == 0:
+            return
+        if self.count == 0:
+            self.first_reference, self.first_time = reference[0], t[0]
+
+        error = theta_array - reference
+        self.max_deviation = max(self.max_deviation, np.max(error))
+
+        n = len(t)
+        self.count += n
+        self.mean_square += (np.mean(error ** 2) - self.mean_square) * n / self.count    # merging chunk means
+
+        outside = np.flatnonzero(~(np.abs(error) <= self.tol * reference))
+        if outside.size > 0:
+            self.last_outside = t[outside[-1]]
+
+    def consume(self, chunks, channel = "theta_real"):    # simulator stream() chunks
+        for chunk in chunks:
+            self.update(chunk["reference"], chunk[channel], chunk["time"])
+        return self
+
+    def overshoot(self):
+        return round(self.max_deviation * 100 / self.first_reference, 1)
+
+    def rms(self):
+        return np.sqrt(self.mean_square)
+
+    def settling(self):
+        return self.first_time if self.last_outside is None else self.last_outside
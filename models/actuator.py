@@ -1,15 +1,24 @@
 import numpy as np
+from models.discretization import zoh_coefficients
 
 class ActuatorModel:
     """
     Rotational actuator model
     """
-    def __init__(self, J, b, Kt, tau_load = 0.0):
+    INTEGRATORS = ("euler", "zoh")
+
+    def __init__(self, J, b, Kt, tau_load = 0.0, integrator = "euler"):
         self.J = J                   # actuator parameters
         self.b = b
         self.Kt = Kt
         self.tau_load = tau_load
 
+        if integrator not in self.INTEGRATORS:
+            raise ValueError(f"Unknown integrator '{integrator}', expected one of {self.INTEGRATORS}")
+        self.integrator = integrator
+        if integrator == "zoh":
+            self.step = self.step_zoh    # exact discretization, chosen once instead of on every step
+
         self.theta = 0.0             # initializing values
         self.omega = 0.0
 
@@ -24,4 +33,35 @@ class ActuatorModel:
         self.theta += dtheta * dt
         self.omega += domega * dt
 
-        return self.theta, self.omega
\ No newline at end of file
+        return self.theta, self.omega
+
+    def derivatives(self, omega, current):    # continuous-time right-hand side, for adaptive-step integration
+        return omega, ((self.Kt * current) - (self.b * omega) - (self.tau_load)) / (self.J)
+
+    def step_zoh(self, current, dt):    # exact solution for current held constant over dt
+        phi_12, phi_22, gi_theta, gt_theta, gi_omega, gt_omega = zoh_coefficients(self.J, self.b, self.Kt, dt)
+        omega = self.omega
+
+        self.theta += (phi_12 * omega) + (gi_theta * current) + (gt_theta * self.tau_load)
+        self.omega = (phi_22 * omega) + (gi_omega * current) + (gt_omega * self.tau_load)
+
+        return self.theta, self.omega
+
+    def coast(self, steps, dt):    # closed-form path over `steps` steps of zero current, e.g. after Shutdown
+        if self.integrator == "zoh":
+            phi_12, phi_22, _, gt_theta, _, gt_omega = zoh_coefficients(self.J, self.b, self.Kt, dt)
+            decay, drive, gain, offset = phi_22, gt_omega * self.tau_load, phi_12, gt_theta * self.tau_load
+        else:
+            decay, drive, gain, offset = 1 - (self.b * dt / self.J), -(self.tau_load * dt / self.J), dt, 0.0
+
+        # omega[k+1] = decay * omega[k] + drive,  theta[k+1] = theta[k] + gain * omega[k] + offset
+        k = np.arange(steps + 1)
+        power = decay ** k
+        forced = drive * k if decay == 1 else drive * (1 - power) / (1 - decay)
+        omega = power * self.omega + forced
+        theta = self.theta + gain * np.cumsum(omega[:-1]) + offset * k[1:]
+        omega = omega[1:]
+
+        if steps:
+            self.theta, self.omega = float(theta[-1]), float(omega[-1])
+        return theta, omega
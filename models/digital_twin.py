@@ -5,4 +5,12 @@ class DigitalTwin(ActuatorModel):
     """
     Digital twin with slightly mismatched parameters
     """
-    pass
\ No newline at end of file
+    def calibrate(self, J = None, b = None, Kt = None, tau_load = None):    # e.g. from models.identification
+        if J is not None:
+            self.J = J
+        if b is not None:
+            self.b = b
+        if Kt is not None:
+            self.Kt = Kt
+        if tau_load is not None:
+            self.tau_load = tau_load
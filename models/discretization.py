@@ -0,0 +1,62 @@
+import numpy as np
+from functools import lru_cache
+
+
+def zoh_terms(J, b, Kt, dt):
+    '''
+    Exact zero-order-hold coefficients of J*domega = Kt*i - b*omega - tau_load (works on arrays too)
+    '''
+    J, b, Kt, dt = np.broadcast_arrays(*(np.asarray(v, dtype = float) for v in (J, b, Kt, dt)))
+    a = b / J
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        decay = np.exp(-a * dt)                                # omega decay over one step
+        lag = np.where(b > 0, -np.expm1(-a * dt) / a, dt)     # integral of the decay, dt when undamped
+        g_theta = np.where(b > 0, (dt - lag) / b, dt * dt / (2 * J))
+
+    g_omega = lag / J                                          # response to unit torque held for one step
+    return lag, decay, Kt * g_theta, -g_theta, Kt * g_omega, -g_omega
+
+
+@lru_cache(maxsize = 256)
+def zoh_coefficients(J, b, Kt, dt):
+    '''
+    Cached scalar coefficients (phi_12, phi_22, gamma_i_theta, gamma_tau_theta, gamma_i_omega, gamma_tau_omega)
+    '''
+    return tuple(float(v) for v in zoh_terms(J, b, Kt, dt))
+
+
+def zoh_matrices(J, b, Kt, dt):
+    '''
+    Discrete state transition Phi and input matrix Gamma for state [theta, omega] and input [current, tau_load]
+    '''
+    phi_12, phi_22, gi_theta, gt_theta, gi_omega, gt_omega = zoh_coefficients(J, b, Kt, dt)
+    phi = np.array([[1.0, phi_12], [0.0, phi_22]])
+    gamma = np.array([[gi_theta, gt_theta], [gi_omega, gt_omega]])
+    return phi, gamma
+
+
+def integration_error(actuator, current, dt):
+    '''
+    Open-loop error of the Euler path against the exact ZOH path for the same current profile
+    '''
+    from models.actuator import ActuatorModel
+
+    euler = ActuatorModel(actuator.J, actuator.b, actuator.Kt, actuator.tau_load, integrator = "euler")
+    exact = ActuatorModel(actuator.J, actuator.b, actuator.Kt, actuator.tau_load, integrator = "zoh")
+
+    current = np.asarray(current, dtype = float)
+    theta_diff = np.zeros_like(current)
+    omega_diff = np.zeros_like(current)
+
+    for i in range(len(current)):
+        t_euler, o_euler = euler.step(current[i], dt)
+        t_exact, o_exact = exact.step(current[i], dt)
+        theta_diff[i] = t_euler - t_exact
+        omega_diff[i] = o_euler - o_exact
+
+    return {
+        "theta_max_error": np.max(np.abs(theta_diff)),
+        "theta_rms_error": np.sqrt(np.mean(theta_diff ** 2)),
+        "omega_max_error": np.max(np.abs(omega_diff)),
+        "omega_rms_error": np.sqrt(np.mean(omega_diff ** 2))
+    }
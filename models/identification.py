@@ -0,0 +1,103 @@
+import numpy as np
+
+# Both integrators give omega[k] = alpha * omega[k-1] + beta * current[k] + gamma, with
+#   euler: alpha = 1 - b*dt/J,   beta = Kt*dt/J,     gamma = -tau_load*dt/J
+#   zoh:   alpha = exp(-b*dt/J), beta = Kt*lag/J,    gamma = -tau_load*lag/J,   lag = (1 - alpha)*J/b
+# Only ratios to J are observable from current and velocity, so either Kt or J has to be known.
+
+
+def _physical(alpha, beta, gamma, dt, Kt = None, J = None, integrator = "euler"):
+    if integrator == "zoh":
+        a = -np.log(alpha) / dt                  # b / J
+        lag = (1 - alpha) / a if a else dt
+    else:
+        a = (1 - alpha) / dt
+        lag = dt
+
+    if J is None:
+        J = Kt * lag / beta
+    else:
+        Kt = beta * J / lag
+    return {"J": J, "b": a * J, "Kt": Kt, "tau_load": -gamma * J / lag}
+
+
+def identify(current, omega = None, dt = 0.001, Kt = None, J = None, theta = None, integrator = "euler"):
+    '''
+    Batch least-squares estimate of J, b, Kt and tau_load from logged current and velocity (or angle)
+    '''
+    if (Kt is None) == (J is None):
+        raise ValueError("Exactly one of Kt or J has to be given, the other parameters are scaled by it")
+
+    current = np.asarray(current, dtype = float)
+    if omega is None:                            # euler: theta[k+1] = theta[k] + omega[k]*dt
+        if integrator != "euler":
+            raise ValueError("Velocity can only be recovered from theta for the euler integrator, pass omega")
+        omega = np.append(np.diff(np.asarray(theta, dtype = float)) / dt, np.nan)
+    omega = np.asarray(omega, dtype = float)
+
+    X = np.column_stack((omega[:-1], current[1:], np.ones(len(omega) - 1)))
+    y = omega[1:]
+    valid = np.isfinite(y) & np.all(np.isfinite(X), axis = 1)
+
+    (alpha, beta, gamma), *_ = np.linalg.lstsq(X[valid], y[valid], rcond = None)
+    params = _physical(alpha, beta, gamma, dt, Kt, J, integrator)
+    params["residual_rms"] = np.sqrt(np.mean((y[valid] - X[valid] @ np.array([alpha, beta, gamma])) ** 2))
+    return params
+
+
+class RecursiveIdentifier:
+    '''
+    Recursive least squares on the same regression, O(1) work and memory per sample
+    '''
+    def __init__(self, dt, Kt = None, J = None, forgetting = 1.0, integrator = "euler", twin = None, p0 = 1e6,
+                 calibrate_every = 100):
+        if (Kt is None) == (J is None):
+            raise ValueError("Exactly one of Kt or J has to be given, the other parameters are scaled by it")
+
+        self.dt = dt
+        self.Kt = Kt
+        self.J = J
+        self.forgetting = forgetting              # < 1 lets the estimate follow slowly changing parameters
+        self.integrator = integrator
+        self.twin = twin                          # DigitalTwin updated from the estimate while it is physical
+        self.p0 = p0
+        self.calibrate_every = calibrate_every    # samples between twin updates, the estimate moves little per sample
+        self.reset()
+
+    def reset(self):
+        self.estimate = np.zeros(3)               # alpha, beta, gamma
+        self.P = np.eye(3) * self.p0
+        self.samples = 0
+
+    def update(self, omega_prev, current, omega):
+        x = np.array([omega_prev, current, 1.0])
+        Px = self.P @ x
+        gain = Px / (self.forgetting + x @ Px)
+        self.estimate += gain * (omega - x @ self.estimate)
+        self.P = (self.P - np.outer(gain, Px)) / self.forgetting
+        self.samples += 1
+
+        if self.samples % self.calibrate_every == 0:
+            self.calibrate()
+
+    def calibrate(self):                          # pushes the current estimate to the twin, if it is physical
+        if self.twin is not None and self.is_physical():
+            self.twin.calibrate(**self.parameters())
+
+    def consume(self, chunks, omega = "omega_real"):    # simulator stream() chunks
+        previous = None
+        for chunk in chunks:
+            for w, i in zip(chunk[omega], chunk["current"]):
+                if previous is not None:
+                    self.update(previous, i, w)
+                previous = w
+        self.calibrate()                          # the twin ends on the final estimate
+        return self
+
+    def is_physical(self):
+        alpha, beta, _ = self.estimate
+        return self.samples > 2 and 0 < alpha < 1 and beta > 0
+
+    def parameters(self):
+        alpha, beta, gamma = self.estimate
+        return _physical(alpha, beta, gamma, self.dt, self.Kt, self.J, self.integrator)
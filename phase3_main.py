@@ -8,9 +8,9 @@ from models.actuator import ActuatorModel
 from control.pid import PIDController
 from simulation.simulator_phase3 import SafeSimulator
 from models.digital_twin import DigitalTwin
-from diagnostics.fault_detector import FaultDetector
+from diagnostics.fault_detector import FaultDetector, FaultCode
 from diagnostics.fault_injection import FaultInjector
-from safety.state_machine import SafetyStateMachine
+from safety.state_machine import SafetyStateMachine, SafetyState
 
 # -------------------------------
 # Initializing values
@@ -35,30 +35,37 @@ simul = SafeSimulator(real_actuator, twin_actuator, controller, fault_injector,
 
 theta_real, theta_twin, states, current, fault_type = simul.run(reference, t)
 
-index_position = fault_type.index("Position_fault")
-t_position = round(t[index_position], 2)
-index_velocity = fault_type.index("Velocity_fault")
-t_velocity = round(t[index_velocity], 2)
-detection_latency = min(t_position, t_velocity)
-index_degraded = states.index("Degraded_state")
-t_degraded = round(t[index_degraded], 2)
-index_shutdown = states.index("Shutdown_state")
-t_shutdown = round(t[index_shutdown], 2)
-duration_degraded = t_shutdown - t_degraded            # total time spent in degraded state
+def first_sample(mask):                                 # index and time of the first sample where mask holds
+    index = np.flatnonzero(mask)
+    return (index[0], round(t[index[0]], 2)) if index.size else (None, None)
 
-print("Position fault occurs at:          ", t_position, "sec")
-print("Velocity fault occurs at:          ", t_velocity, "sec")
-print("Detection latency:                 ", detection_latency, "sec")
-print("Degraded state begins at:          ", t_degraded, "sec")
-print("Shutdown state begins at:          ", t_shutdown, "sec")
-print("Time spent in degraded mode:       ", duration_degraded, "sec")
+def seconds(value):
+    return "not detected" if value is None else f"{value} sec"
+
+index_position, t_position = first_sample(fault_type == FaultCode.POSITION)
+index_velocity, t_velocity = first_sample(fault_type == FaultCode.VELOCITY)
+detected = [v for v in (t_position, t_velocity) if v is not None]
+detection_latency = min(detected) if detected else None
+index_degraded, t_degraded = first_sample(states == SafetyState.DEGRADED)
+index_shutdown, t_shutdown = first_sample(states == SafetyState.SHUTDOWN)
+if t_degraded is not None and t_shutdown is not None:
+    duration_degraded = round(t_shutdown - t_degraded, 2)    # total time spent in degraded state
+else:
+    duration_degraded = None
+
+print("Position fault occurs at:          ", seconds(t_position))
+print("Velocity fault occurs at:          ", seconds(t_velocity))
+print("Detection latency:                 ", seconds(detection_latency))
+print("Degraded state begins at:          ", seconds(t_degraded))
+print("Shutdown state begins at:          ", seconds(t_shutdown))
+print("Time spent in degraded mode:       ", seconds(duration_degraded))
 print("Fault growth rate:                 ", "1 deg/s")
-print("Time to detection:                 ", detection_latency, "sec")
+print("Time to detection:                 ", seconds(detection_latency))
 
-output_data = f"Position fault occurs at: {t_position} sec\nVelocity fault occurs at: {t_velocity} sec\n" \
-    f"Detection latency: {detection_latency} sec\nDegraded state begins at: {t_degraded} sec\n" \
-    f"Shutdown state begins at: {t_shutdown} sec\nTime spent in degraded mode: {duration_degraded} sec\n" \
-    f"Fault growth rate: 1 deg/sec\nTime to detection: {detection_latency} sec"
+output_data = f"Position fault occurs at: {seconds(t_position)}\nVelocity fault occurs at: {seconds(t_velocity)}\n" \
+    f"Detection latency: {seconds(detection_latency)}\nDegraded state begins at: {seconds(t_degraded)}\n" \
+    f"Shutdown state begins at: {seconds(t_shutdown)}\nTime spent in degraded mode: {seconds(duration_degraded)}\n" \
+    f"Fault growth rate: 1 deg/sec\nTime to detection: {seconds(detection_latency)}"
 file_name = "results/phase3_fault_state.txt"
 try:
     with open(file_name, 'w') as f:
@@ -83,11 +90,13 @@ fig1.savefig("results/phase3_fault_injection.png")
 fig2, (ax1) = plt.subplots(1, 1, figsize = (8,6))
 ax1.plot(t, np.rad2deg(theta_real), label = 'Faulty signal', color = 'orange')
 ax1.plot(t, np.rad2deg(theta_twin), label = 'Digital twin', color = 'green')
-ax1.axvline(x = t[index_degraded], color = 'grey', linestyle = '--')
-ax1.axvline(x = t[index_shutdown], color = 'grey', linestyle = '--')
 ax1.text(-0.1, 10, "Normal", fontsize = 12, color = 'blue')
-ax1.text(t[index_degraded] + 0.01, 0.5, "Degraded", fontsize = 12, color = 'blue')
-ax1.text(t[index_shutdown] + 0.7, 0.5, "Shutdown", fontsize = 12, color = 'blue')
+if index_degraded is not None:
+    ax1.axvline(x = t[index_degraded], color = 'grey', linestyle = '--')
+    ax1.text(t[index_degraded] + 0.01, 0.5, "Degraded", fontsize = 12, color = 'blue')
+if index_shutdown is not None:
+    ax1.axvline(x = t[index_shutdown], color = 'grey', linestyle = '--')
+    ax1.text(t[index_shutdown] + 0.7, 0.5, "Shutdown", fontsize = 12, color = 'blue')
 ax1.set_xlabel("Time (s)")
 ax1.set_ylabel("Theta (deg)")
 ax1.set_title("Safety State Classification")
@@ -97,8 +106,9 @@ fig2.savefig("results/phase3_safety_state.png")
 
 fig3, (ax1) = plt.subplots(1, 1, figsize = (8,6))
 ax1.plot(t, current, label = 'Current', color = 'orange')
-ax1.axvline(x = t[index_degraded], color = 'grey', linestyle = '--')
-ax1.text(t[index_degraded] + 0.01, 2, "Degraded current", fontsize = 12, color = 'blue')
+if index_degraded is not None:
+    ax1.axvline(x = t[index_degraded], color = 'grey', linestyle = '--')
+    ax1.text(t[index_degraded] + 0.01, 2, "Degraded current", fontsize = 12, color = 'blue')
 ax1.set_xlabel("Time (s)")
 ax1.set_ylabel("Current (A)")
 ax1.set_title("Current vs Time")
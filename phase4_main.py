@@ -53,19 +53,23 @@ with open(verification_report, 'w', newline='') as f:
     writer.writeheader()
     writer.writerow(verification)
 
+# Estimated scores: this scenario's built-in sensor drift latches Shutdown at 0.34 s with no fault injected, so
+# injection branches (FMEA.from_injection) cannot escalate beyond it and would score every mode as never occurring
 fmea_documentation = FMEA()
 fmea_documentation.add_records("Position sensor", "Drift", 8, 4, 3)
 fmea_documentation.add_records("Actuator", "Torque loss", 7, 2, 3)
 fmea_documentation.add_records("Controller", "Integral windup", 9, 2, 4)
 
+fmea_report = fmea_documentation.fmea_report()
+
 print("")
 print("FMEA Report")
-for i in fmea_documentation.fmea_report():
+for i in fmea_report:
     print(i)
 
 report_fmea = "results/phase4_fmea.csv"
 with open(report_fmea, 'w', newline='') as f:
-    fieldnames = fmea_documentation.fmea_report()[0].keys()
+    fieldnames = fmea_report[0].keys()
     writer = csv.DictWriter(f, fieldnames=fieldnames)
     writer.writeheader()
-    writer.writerows(fmea_documentation.fmea_report())
\ No newline at end of file
+    writer.writerows(fmea_report)
\ No newline at end of file
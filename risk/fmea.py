@@ -1,22 +1,156 @@
+import csv
 import numpy as np
+from verification.requirements import Requirements
+
+DTYPE = np.dtype([("component", object), ("failure", object), ("severity", np.int16), ("occurrence", np.int16),
+                  ("detection", np.int16), ("rpn", np.int32)])
+
+# Occurrence from the rate at which an injected fault leads to the failure, detection from the fraction of runs in
+# which it is missed or detected too late: the score is 1 plus the number of bounds the rate reaches
+OCCURRENCE_RATES = (1 / 1000000, 1 / 100000, 1 / 10000, 1 / 2000, 1 / 500, 1 / 100, 1 / 50, 1 / 20, 1 / 10)
+DETECTION_MISSES = (0.0001, 0.001, 0.01, 0.02, 0.05, 0.1, 0.2, 0.4, 0.6)
+
+
+def _score(value, bounds):
+    return 1 + np.searchsorted(bounds, value, side = "right")
+
+
+def occurrence_score(rate):                  # 1 (remote) .. 10 (almost certain), arrays work too
+    return _score(np.asarray(rate), OCCURRENCE_RATES)
+
+
+def detection_score(latencies, limit = Requirements.MAX_FAULT_LATENCY):
+    '''
+    1 (almost certain) .. 10 (undetected) from detection latencies, NaN for runs where the fault went undetected
+    '''
+    latencies = np.asarray(latencies, dtype = float)
+    if latencies.size == 0:
+        return 10
+    missed = 1 - np.mean(latencies <= limit)    # NaN compares False: undetected counts as missed
+    return int(_score(missed, DETECTION_MISSES))
+
 
 class FMEA:
     '''
-    FMEA documentation
+    FMEA documentation, kept as a structured array with the RPN ranking cached until the next change
     '''
     def __init__(self):
-        self.records = []
+        self._data = np.zeros(16, dtype = DTYPE)
+        self._size = 0
+        self._order = None                   # indices by descending RPN, ties in insertion order
+        self._index = {}                     # (component, failure) -> row, for measured updates
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def data(self):                          # read-only view of the rows in insertion order
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _grow(self, n):
+        if self._size + n > len(self._data):
+            data = np.zeros(max(2 * len(self._data), self._size + n), dtype = DTYPE)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def add_many(self, components, failures, severity, occurrence, detection):
+        '''
+        Bulk import of equal-length columns, the RPN computed for all rows at once
+        '''
+        components, failures = list(components), list(failures)
+        n = len(components)
+        self._grow(n)
+        rows = self._data[self._size:self._size + n]
+        rows["component"], rows["failure"] = components, failures
+        rows["severity"], rows["occurrence"], rows["detection"] = severity, occurrence, detection
+        rows["rpn"] = rows["severity"].astype(np.int32) * rows["occurrence"] * rows["detection"]
+        for i, key in enumerate(zip(components, failures), self._size):
+            self._index.setdefault(key, i)
+        self._size += n
+        self._order = None
 
     def add_records(self, component, failure, severity, occurrence, detection):
-        rpn = severity * occurrence * detection
-        self.records.append({                         # adding records depending on failure modes
-            "Component": component,
-            "Failure mode": failure,
-            "Severity": severity,
-            "Occurrence": occurrence,
-            "Detection": detection,
-            "RPN": rpn
-        })
+        self.add_many([component], [failure], severity, occurrence, detection)
+
+    def import_csv(self, path):              # a report written from fmea_report(), e.g. results/phase4_fmea.csv
+        with open(path, newline = '') as f:
+            rows = list(csv.DictReader(f))
+        self.add_many([r["Component"] for r in rows], [r["Failure mode"] for r in rows],
+                      [int(r["Severity"]) for r in rows], [int(r["Occurrence"]) for r in rows],
+                      [int(r["Detection"]) for r in rows])
+
+    def set_scores(self, component, failure, severity, occurrence, detection):
+        '''
+        Updates the row for (component, failure), or adds it, e.g. when a new campaign remeasures the scores
+        '''
+        row = self._index.get((component, failure))
+        if row is None:
+            return self.add_records(component, failure, severity, occurrence, detection)
+        record = self._data[row]
+        record["severity"], record["occurrence"], record["detection"] = severity, occurrence, detection
+        record["rpn"] = int(severity) * int(occurrence) * int(detection)
+        self._order = None
+
+    def from_injection(self, records, modes, limit = Requirements.MAX_FAULT_LATENCY):
+        '''
+        Scores from InjectionSweep records. modes maps a fault name to (component, failure mode, severity);
+        occurrence is the rate of branches whose safety states escalated beyond the fault-free run, detection
+        follows their latencies
+        '''
+        grouped = {}
+        for r in records:
+            grouped.setdefault(r["fault"], []).append(r)
+        for name, (component, failure, severity) in modes.items():
+            rows = grouped.get(name, [])
+            rate = np.mean([r["escalated"] for r in rows]) if rows else 0.0
+            latencies = [r["detection_latency"] for r in rows if r["escalated"]]
+            self.set_scores(component, failure, severity, int(occurrence_score(rate)), detection_score(latencies, limit))
+
+    def from_campaign(self, records, modes, limit = Requirements.MAX_FAULT_LATENCY):
+        '''
+        Scores from MonteCarloCampaign records. modes maps a verdict name (e.g. "Settling_time") to (component,
+        failure mode, severity); occurrence is the rate of runs failing it, detection follows the fault latencies
+        '''
+        latencies = [r["fault_latency"] for r in records]
+        detection = detection_score(latencies, limit)
+        for verdict, (component, failure, severity) in modes.items():
+            rate = np.mean([not r[verdict] for r in records]) if records else 0.0
+            self.set_scores(component, failure, severity, int(occurrence_score(rate)), detection)
+
+    def ranking(self):                       # row indices by descending RPN, computed once per change
+        if self._order is None:
+            self._order = np.argsort(-self._data["rpn"][:self._size], kind = "stable")
+        return self._order
+
+    def _rows(self, index):
+        data = self._data
+        return [{"Component": data["component"][i], "Failure mode": data["failure"][i],
+                 "Severity": int(data["severity"][i]), "Occurrence": int(data["occurrence"][i]),
+                 "Detection": int(data["detection"][i]), "RPN": int(data["rpn"][i])} for i in index]
+
+    def top(self, k, component = None):
+        '''
+        The k highest-RPN rows, optionally of one component, without sorting the whole table
+        '''
+        if k <= 0:
+            return []
+        candidates = np.arange(self._size)
+        if component is not None:
+            candidates = candidates[self._data["component"][:self._size] == component]
+        rpn = self._data["rpn"][candidates]
+        if k < len(candidates):
+            threshold = np.partition(rpn, len(rpn) - k)[len(rpn) - k]    # k-th largest RPN
+            above = candidates[rpn > threshold]
+            ties = candidates[rpn == threshold][:k - len(above)]      # earliest rows first, as in the full ranking
+            candidates = np.concatenate((above, ties))
+            rpn = self._data["rpn"][candidates]
+        return self._rows(candidates[np.lexsort((candidates, -rpn))])
+
+    def filter(self, component):             # one component's rows, ranked
+        order = self.ranking()
+        return self._rows(order[self._data["component"][order] == component])
 
     def fmea_report(self):                           # report generation
-        return sorted(self.records, key = lambda x: x["RPN"], reverse = True)
\ No newline at end of file
+        return self._rows(self.ranking())
@@ -1,21 +1,56 @@
 import numpy as np
+from enum import IntEnum
+
+STATE_LABELS = ("Normal_state", "Degraded_state", "Shutdown_state")
+
+class SafetyState(IntEnum):
+    '''
+    Safety states as small integers, ordered by severity
+    '''
+    NORMAL = 0
+    DEGRADED = 1
+    SHUTDOWN = 2
+
+    @property
+    def label(self):
+        return STATE_LABELS[self]
+
+CURRENT_LIMIT = (1.0, 0.3, 0.0)    # current multiplier per safety state
+
+TRANSITIONS = np.array([           # next state indexed by [state, fault code]
+    # No_fault  Position  Velocity  Severe
+    [0,         1,        1,        2],    # Normal
+    [1,         1,        1,        2],    # Degraded
+    [2,         2,        2,        2],    # Shutdown
+], dtype = np.uint8)
+
+_TRANSITIONS = tuple(tuple(SafetyState(s) for s in row) for row in TRANSITIONS)
+
+FAULT_SEVERITY = TRANSITIONS[SafetyState.NORMAL]    # state each fault code demands on its own
+# states only ever latch upwards: TRANSITIONS[state, fault] == max(state, FAULT_SEVERITY[fault])
+
+def state_labels(codes):           # string labels for reports and plots
+    return np.array(STATE_LABELS)[np.asarray(codes)]
 
 class SafetyStateMachine:
     '''
     Classification of the state of the device
     '''
     def __init__(self):
-        self.state = "Normal_state"
+        self.reset()
+
+    def reset(self):
+        self.state = SafetyState.NORMAL
 
     def check(self, fault_status):
-        if self.state == "Normal_state":
-            if fault_status == "Position_fault" or fault_status == "Velocity_fault":
-                self.state = "Degraded_state"
-            elif fault_status == "Severe_fault":
-                self.state = "Shutdown_state"
-
-        elif self.state == "Degraded_state":
-            if fault_status == "Severe_fault":
-                self.state = "Shutdown_state"
-            
-        return self.state
\ No newline at end of file
+        self.state = _TRANSITIONS[self.state][fault_status]
+        return self.state
+
+    @staticmethod
+    def next_state(state, fault_status):    # the transition check() takes, without changing any machine
+        return _TRANSITIONS[state][fault_status]
+
+    @staticmethod
+    def check_batch(fault_codes, initial = SafetyState.NORMAL):    # state after each sample along the last axis
+        states = np.maximum.accumulate(FAULT_SEVERITY[np.asarray(fault_codes)], axis = -1)
+        return np.maximum(states, np.uint8(initial), out = states)
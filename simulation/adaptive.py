@@ -0,0 +1,233 @@
+import numpy as np
+from safety.state_machine import CURRENT_LIMIT, SafetyState, SafetyStateMachine
+
+# Bogacki-Shampine 3(2) pair: third-order solution, embedded second-order estimate for the error, and the last
+# stage is the derivative at the new point (first same as last), so an accepted step costs three evaluations
+_B = (2 / 9, 1 / 3, 4 / 9)
+_E = (2 / 9 - 7 / 24, 1 / 3 - 1 / 4, 4 / 9 - 1 / 3, -1 / 8)    # third- minus second-order weights
+
+EVENTS = ("position", "velocity", "settling")    # residual thresholds of the detector, settling band
+
+
+def _hermite(y0, f0, y1, f1, h, s):          # cubic dense output at fraction s of the step
+    s2, s3 = s * s, s * s * s
+    h00, h10, h01, h11 = 2 * s3 - 3 * s2 + 1, s3 - 2 * s2 + s, 3 * s2 - 2 * s3, s3 - s2
+    return tuple(h00 * a + h10 * h * da + h01 * b + h11 * h * db for a, da, b, db in zip(y0, f0, y1, f1))
+
+
+class AdaptiveSimulator:
+    '''
+    Plant and digital twin integrated in continuous time with an embedded Runge-Kutta pair under error control.
+    The controller still samples every dt and holds its current in between; detector threshold crossings, safety
+    transitions and settling-band exits are located on the dense output instead of rounded to the next sample,
+    and a new safety state limits the current from the instant it is entered
+    '''
+    def __init__(self, real, twin, controller, injector, detector, safety, dt,
+                 rtol = 1e-6, atol = 1e-9, max_step = 0.05, tol = 0.02):
+        self.real = real
+        self.twin = twin
+        self.controller = controller
+        self.injector = injector        # drift as a continuous bias, bias + drift_rate * t
+        self.detector = detector        # thresholds of a FaultDetector, crossed in continuous time
+        self.safety = safety
+        self.dt = dt                    # controller sample period
+        self.rtol = rtol
+        self.atol = atol
+        self.max_step = max_step        # also bounds how long a crossing and its return can hide inside one step
+        self.tol = tol                  # settling band, as in PerformanceMetrics.settling
+
+        self.events = []                # (time, kind, value) of the last run
+        self.evaluations = 0            # plant + twin derivative evaluations
+        self.steps = 0
+        self.rejected = 0
+
+    def reset(self):
+        self.real.reset()
+        self.twin.reset()
+        self.controller.reset()
+        self.injector.reset()
+        self.safety.reset()
+
+    def derivatives(self, y, current):
+        self.evaluations += 1
+        return self.real.derivatives(y[1], current) + self.twin.derivatives(y[3], current)
+
+    def held(self, f, change):               # derivatives after the held current changes by `change`: the
+        real, twin = self.real, self.twin    # right-hand side is affine in the current, only the accelerations move
+        return f[0], f[1] + real.Kt * change / real.J, f[2], f[3] + twin.Kt * change / twin.J
+
+    def event_values(self, t, y, reference):    # positive while the residual is over its threshold / outside the band
+        theta = y[0] + self.bias + self.injector.drift_rate * (t - self.start)
+        return (abs(theta - y[2]) - self.detector.pos_threshold,
+                abs(y[1] - y[3]) - self.detector.vel_threshold,
+                abs(theta - reference) - self.tol * abs(reference))
+
+    @staticmethod
+    def locate(g, g0, g1, h):                  # Illinois method on the dense output, in fractions of the step
+        s0, s1 = 0.0, 1.0
+        for _ in range(60):
+            s = s1 - g1 * (s1 - s0) / (g1 - g0)
+            gs = g(s)
+            if (gs > 0) == (g1 > 0):
+                g0 *= 0.5
+            else:
+                s0, g0 = s1, g1
+            s1, g1 = s, gs
+            if abs(s1 - s0) * h < 1e-12 or gs == 0:
+                break
+        return s1
+
+    def crossing(self, time, kind, value):       # returns True when the safety state (and so the current) changed
+        self.events.append((time, kind, value))
+        if kind == "settling":
+            self.outside = value
+            return False
+        self.faults[EVENTS.index(kind)] = value
+        state = SafetyStateMachine.next_state(self.state, self.faults[0] + 2 * self.faults[1])
+        if state == self.state:
+            return False
+        self.state = state
+        self.events.append((time, "state", state))
+        return True
+
+    def integrate(self, y, ta, tb, current, reference, samples = ()):
+        '''
+        Adaptive steps from ta to tb at a constant current. Stops early at a safety transition; returns the state,
+        the time reached and the states at the requested sample times inside (ta, tb]
+        '''
+        rtol, atol = self.rtol, self.atol
+        last = self.last                     # the derivative where the previous call ended, at its current
+        if last is not None and last[0] is y:
+            f0 = last[2] if last[1] == current else self.held(last[2], current - last[1])
+        else:
+            f0 = self.derivatives(y, current)
+        self.last = None
+        g0 = self.event_values(ta, y, reference)
+        found, samples = [], list(samples)
+        t = ta
+        while t < tb:
+            h = min(self.h, self.max_step)
+            cut = tb - t <= h
+            h = tb - t if cut else h
+            k2 = self.derivatives(tuple(a + 0.5 * h * d for a, d in zip(y, f0)), current)
+            k3 = self.derivatives(tuple(a + 0.75 * h * d for a, d in zip(y, k2)), current)
+            y1 = tuple(a + h * (_B[0] * d1 + _B[1] * d2 + _B[2] * d3) for a, d1, d2, d3 in zip(y, f0, k2, k3))
+            f1 = self.derivatives(y1, current)
+            error = max(abs(h * (_E[0] * d1 + _E[1] * d2 + _E[2] * d3 + _E[3] * d4)) / (atol + rtol * max(abs(a), abs(b)))
+                        for a, b, d1, d2, d3, d4 in zip(y, y1, f0, k2, k3, f1))
+            factor = min(5.0, max(0.2, 0.9 * error ** (-1 / 3))) if error > 0 else 5.0
+            if error > 1:
+                self.h = h * factor
+                self.rejected += 1
+                continue
+
+            self.steps += 1
+            t1 = tb if cut else t + h
+            if not cut or factor < 1:        # a step cut short at tb says little about the next one
+                self.h = h * factor
+            g1 = self.event_values(t1, y1, reference)
+
+            def dense(s, y = y, f0 = f0, y1 = y1, f1 = f1, h = h):
+                return _hermite(y, f0, y1, f1, h, s)
+
+            crossings = []
+            flags = (self.faults[0], self.faults[1], self.outside)
+            for i, (a, b) in enumerate(zip(g0, g1)):
+                if (b > 0) == flags[i]:
+                    continue
+                if (a > 0) == (b > 0):           # restarted right on a crossing, a sits on the threshold
+                    crossings.append((0.0, i, b > 0))
+                else:
+                    g = lambda s, t = t, h = h, i = i: self.event_values(t + s * h, dense(s), reference)[i]
+                    crossings.append((self.locate(g, a, b, h), i, b > 0))
+            for s, i, value in sorted(crossings):
+                te = float(t + s * h)
+                if self.crossing(te, EVENTS[i], bool(value)):
+                    ye = dense(s)
+                    found += [(ts, dense((ts - t) / h)) for ts in samples if t < ts <= te]
+                    return ye, te, found
+
+            found += [(ts, y1 if ts == t1 else dense((ts - t) / h)) for ts in samples if t < ts <= t1]
+            samples = [ts for ts in samples if ts > t1]
+            y, f0, g0, t = y1, f1, g1, t1
+        self.last = (y, current, f0)
+        return y, t, found
+
+    def run(self, reference, t):
+        '''
+        Traces at the controller samples plus the event list, the first departure from Normal (fault_latency) and
+        the last entry into the settling band (settling_time) in continuous time
+        '''
+        self.reset()
+        t = np.asarray(t, dtype = float)
+        times = t.tolist()
+        n = len(times)
+        refs = np.broadcast_to(np.asarray(reference, dtype = float), t.shape).tolist()
+        if n == 0:
+            raise ValueError("Need at least one sample time")
+
+        self.events, self.evaluations, self.steps, self.rejected = [], 0, 0, 0
+        self.h = self.dt
+        self.start, self.bias = times[0], self.injector.bias
+        self.state = SafetyState(self.safety.state)
+        self.faults = [False, False]
+        self.outside = False
+        self.last = None                     # (state, current, derivative) where integrate() stopped
+
+        y = (self.real.theta, self.real.omega, self.twin.theta, self.twin.omega)
+        theta_real, theta_twin, states = np.empty(n), np.empty(n), np.empty(n, dtype = np.uint8)
+
+        def record(k, y):
+            theta_real[k] = y[0] + self.bias + self.injector.drift_rate * (times[k] - self.start)
+            theta_twin[k] = y[2]
+            states[k] = self.state
+
+        g = self.event_values(times[0], y, refs[min(1, n - 1)])
+        for i, kind in enumerate(EVENTS):    # already over a threshold or outside the band at the start
+            if g[i] > 0:
+                self.crossing(times[0], kind, True)
+        record(0, y)
+
+        k = 0
+        while k < n - 1:
+            ref = refs[k + 1]                # the current for sample k + 1 is computed from reference[k + 1]
+            outside = self.event_values(times[k], y, ref)[2] > 0
+            if outside != self.outside:      # the reference stepped across the response
+                self.crossing(times[k], "settling", outside)
+
+            if CURRENT_LIMIT[self.state] == 0:
+                # no current whatever the controller asks for: step across samples up to the next reference change
+                j = k + 1
+                while j < n - 1 and refs[j + 1] == ref:
+                    j += 1
+                theta = y[0]
+                y, _, found = self.integrate(y, times[k], times[j], 0.0, ref, times[k + 1:j + 1])
+                thetas = [theta] + [ys[0] for _, ys in found[:-1]]
+                self.controller.compute_batch(np.array(refs[k + 1:j + 1]) - thetas, self.dt)    # keeps its state in step
+                for i, (_, ys) in enumerate(found, k + 1):
+                    record(i, ys)
+                k = j
+                continue
+
+            demand = self.controller.compute(ref - y[0], self.dt)
+            ta = times[k]
+            while ta < times[k + 1]:         # restarted at every safety transition, which changes the limit
+                y, ta, _ = self.integrate(y, ta, times[k + 1], demand * CURRENT_LIMIT[self.state], ref)
+            k += 1
+            record(k, y)
+
+        self.real.theta, self.real.omega, self.twin.theta, self.twin.omega = y
+        self.injector.bias = self.bias + self.injector.drift_rate * (times[-1] - self.start)
+        self.safety.state = self.state
+
+        abnormal = [e[0] for e in self.events if e[1] == "state"]
+        entries = [e[0] for e in self.events if e[1] == "settling" and not e[2]]
+        if self.outside:
+            settling = times[-1]
+        else:
+            settling = entries[-1] if entries else times[0]
+        return {"time": t, "theta_real": theta_real, "theta_twin": theta_twin, "state": states,
+                "events": list(self.events),
+                "fault_latency": abnormal[0] - times[0] if abnormal else np.nan,
+                "settling_time": settling,
+                "evaluations": self.evaluations, "steps": self.steps, "rejected": self.rejected}
@@ -0,0 +1,158 @@
+'''
+Headless scenario runner: named scenarios from a JSON, TOML or YAML file, verified in one process
+
+    python -m simulation.cli scenarios.toml
+    python -m simulation.cli scenarios.toml --scenario drift_fast --plot --output results/cli
+
+    [defaults]                  # shared by every scenario
+    duration = 2
+    setpoint_deg = 60
+
+    [scenarios.nominal]
+
+    [scenarios.drift_fast]
+    drift_rate = 0.0349         # NOMINAL parameter overrides, see simulation/scenario.py
+    early_stop = true
+'''
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from simulation.plotting import plot_response, prepare, render_runs
+from simulation.scenario import NOMINAL, build_safe_simulator
+from verification.requirements import Requirements
+from verification.result_cache import ResultCache
+from verification.test_runner import TestRunner
+
+SETTINGS = {"dt": 0.001, "duration": 2, "setpoint_deg": 60, "integrator": "euler", "early_stop": False}
+
+
+def load_config(path):
+    '''
+    Scenario file as a dict, the format is taken from the extension
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path) as f:
+            return json.load(f)
+    if extension == ".toml":
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    if extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("YAML scenario files need PyYAML (pip install pyyaml), or use TOML/JSON") from None
+        with open(path) as f:
+            return yaml.safe_load(f)
+    raise ValueError(f"Unsupported scenario file '{path}', expected .json, .toml, .yaml or .yml")
+
+
+def scenarios(config):                       # {name: (settings, params)} with defaults applied
+    defaults = config.get("defaults", {})
+    named = config.get("scenarios", {})
+    if not named:
+        raise ValueError("The scenario file defines no [scenarios]")
+
+    resolved = {}
+    for name, entry in named.items():
+        merged = {**defaults, **(entry or {})}
+        unknown = set(merged) - set(SETTINGS) - set(NOMINAL)
+        if unknown:
+            raise ValueError(f"Scenario '{name}': unknown keys {sorted(unknown)}")
+        settings = {k: merged.get(k, v) for k, v in SETTINGS.items()}
+        params = {k: v for k, v in merged.items() if k in NOMINAL}
+        resolved[name] = (settings, params)
+    return resolved
+
+
+def run_scenario(settings, params, requirements, cache = None):
+    dt = settings["dt"]
+    t = np.arange(0, settings["duration"], dt)
+    reference = np.deg2rad(settings["setpoint_deg"]) * np.ones_like(t)
+
+    simulator = build_safe_simulator(params, dt, settings["integrator"])
+    runner = TestRunner(requirements, simulator, dt, early_stop = settings["early_stop"], cache = cache)
+    start = time.perf_counter()
+    results = runner.test_run(reference, t)
+    elapsed = time.perf_counter() - start
+
+    return {"results": {k: float(v) for k, v in results.items()},
+            "verification": {k: bool(v) for k, v in runner.verify(results).items()},
+            "truncated": runner.truncated, "seconds": elapsed}, (t, reference, runner.traces)
+
+
+def plot_run(name, t, reference, traces):    # run dict for simulation/plotting.py
+    theta_real, theta_twin, states = traces
+    n = len(theta_real)
+    return {"name": name, "t": t[:n], "reference": np.broadcast_to(reference, np.shape(t))[:n],
+            "theta_real": theta_real, "theta_twin": theta_twin, "states": states}
+
+
+def plot_scenario(run):                      # interactive window, in this process
+    import matplotlib.pyplot as plt          # deferred: only runs that plot pay for the import
+
+    fig, ax = plt.subplots(2, 1, figsize = (8, 6), sharex = True)
+    plot_response(ax, prepare(run))
+    ax[1].set_xlabel("Time (s)")
+    plt.tight_layout()
+    plt.show()
+    plt.close(fig)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run named scenarios headless and verify them")
+    parser.add_argument("config", help = "scenario file (.json, .toml, .yaml)")
+    parser.add_argument("--scenario", nargs = "+", help = "run only these scenarios")
+    parser.add_argument("--output", help = "directory for <scenario>.json results (and .png with --plot)")
+    parser.add_argument("--plot", action = "store_true", help = "save a response plot per scenario (to --output or .)")
+    parser.add_argument("--show", action = "store_true", help = "open the plots in a window instead of saving them")
+    parser.add_argument("--json", action = "store_true", help = "print one JSON line per scenario")
+    parser.add_argument("--cache", help = "directory of cached results, identical scenarios are not re-run")
+    parser.add_argument("--cache-size", type = float, default = 1024, help = "cache size limit in MB (default 1024)")
+    parser.add_argument("--strict", action = "store_true", help = "exit with 1 when any scenario fails verification")
+    args = parser.parse_args(argv)
+
+    selected = scenarios(load_config(args.config))
+    if args.scenario:
+        missing = set(args.scenario) - set(selected)
+        if missing:
+            parser.error(f"unknown scenarios {sorted(missing)}, available: {sorted(selected)}")
+        selected = {name: selected[name] for name in args.scenario}
+    if args.output:
+        os.makedirs(args.output, exist_ok = True)
+
+    requirements = Requirements()
+    cache = ResultCache(args.cache, int(args.cache_size * 2**20)) if args.cache else None
+    failed, plots = [], []
+    for name, (settings, params) in selected.items():
+        report, traces = run_scenario(settings, params, requirements, cache)
+        report = {"scenario": name, **report, "settings": settings, "params": params}
+        if not all(report["verification"].values()):
+            failed.append(name)
+
+        if args.json:
+            print(json.dumps(report), flush = True)
+        else:
+            verdicts = " ".join(f"{k}={'Pass' if v else 'Fail'}" for k, v in report["verification"].items())
+            print(f"{name:24s} {verdicts}  ({report['seconds'] * 1e3:.1f} ms)", flush = True)
+
+        if args.output:
+            with open(os.path.join(args.output, f"{name}.json"), 'w') as f:
+                json.dump(report, f, indent = 2)
+        if args.show:
+            plot_scenario(plot_run(name, *traces))
+        elif args.plot:
+            plots.append(plot_run(name, *traces))
+
+    if plots:                                # downsampled, rendered together on a process pool
+        render_runs(plots, args.output or ".", figures = ("response",), pattern = "{run}.png")
+    return 1 if args.strict and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
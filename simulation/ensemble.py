@@ -0,0 +1,129 @@
+import numpy as np
+from models.discretization import zoh_terms
+from diagnostics.fault_detector import FaultDetector
+from safety.state_machine import CURRENT_LIMIT, FAULT_SEVERITY
+
+CURRENT_SCALE = np.array(CURRENT_LIMIT)              # current multiplier per safety state
+
+
+class EnsembleSimulator:
+    """
+    Closed-loop simulation of N independent actuators advanced together with array operations
+    """
+    PARAMETERS = ("J", "b", "Kt", "tau_load", "J_twin", "b_twin", "Kt_twin", "tau_load_twin",
+                  "Kp", "Ki", "Kd", "drift_rate", "pos_threshold", "vel_threshold")
+
+    def __init__(self, dt, J, b, Kt, J_twin, b_twin, Kt_twin, Kp, Ki, Kd,
+                 drift_rate = 0.0, pos_threshold = np.inf, vel_threshold = np.inf,
+                 tau_load = 0.0, tau_load_twin = 0.0, integrator = "euler"):
+        values = np.broadcast_arrays(*(np.asarray(v, dtype = float) for v in (
+            J, b, Kt, tau_load, J_twin, b_twin, Kt_twin, tau_load_twin,
+            Kp, Ki, Kd, drift_rate, pos_threshold, vel_threshold)))
+        for name, value in zip(self.PARAMETERS, values):
+            setattr(self, name, np.atleast_1d(value).copy())    # every parameter becomes a length N array
+
+        self.dt = dt
+        self.n = self.J.size
+        self.detector = FaultDetector(self.pos_threshold, self.vel_threshold)    # per-actuator thresholds
+
+        if integrator not in ("euler", "zoh"):
+            raise ValueError(f"Unknown integrator '{integrator}', expected 'euler' or 'zoh'")
+        self.integrator = integrator
+        if integrator == "zoh":                              # exact propagators computed once for the whole ensemble
+            self.zoh_real = zoh_terms(self.J, self.b, self.Kt, dt)
+            self.zoh_twin = zoh_terms(self.J_twin, self.b_twin, self.Kt_twin, dt)
+            self.advance = self.advance_zoh
+
+        self.reset()
+
+    @classmethod
+    def from_simulators(cls, simulators):        # stacking the parameters of scalar SafeSimulator objects
+        sims = list(simulators)
+        return cls(
+            sims[0].dt,
+            J = [s.real.J for s in sims], b = [s.real.b for s in sims], Kt = [s.real.Kt for s in sims],
+            tau_load = [s.real.tau_load for s in sims],
+            J_twin = [s.twin.J for s in sims], b_twin = [s.twin.b for s in sims],
+            Kt_twin = [s.twin.Kt for s in sims], tau_load_twin = [s.twin.tau_load for s in sims],
+            Kp = [s.controller.Kp for s in sims], Ki = [s.controller.Ki for s in sims],
+            Kd = [s.controller.Kd for s in sims],
+            drift_rate = [s.injector.drift_rate for s in sims],
+            pos_threshold = [s.detector.pos_threshold for s in sims],
+            vel_threshold = [s.detector.vel_threshold for s in sims])
+
+    def reset(self):
+        n = self.n
+        self.theta_real = np.zeros(n)
+        self.omega_real = np.zeros(n)
+        self.theta_twin = np.zeros(n)
+        self.omega_twin = np.zeros(n)
+        self.error_int = np.zeros(n)
+        self.prev_error = np.zeros(n)
+        self.bias = np.zeros(n)
+        self.state = np.zeros(n, dtype = np.uint8)          # SafetyState codes
+
+    def step(self, reference):
+        dt = self.dt
+
+        error = reference - self.theta_real                  # PID, same operation order as PIDController
+        self.error_int += error * dt
+        error_diff = (error - self.prev_error) / dt
+        current = (self.Kp * error) + (self.Ki * self.error_int) + (self.Kd * error_diff)
+        self.prev_error = error
+
+        current = current * CURRENT_SCALE[self.state]        # safety limiting from the previous sample
+
+        self.advance(current, dt)
+
+        self.bias += self.drift_rate * dt
+        t_noisy = self.theta_real + self.bias
+
+        fault = self.detector.detect_batch(t_noisy - self.theta_twin, self.omega_real - self.omega_twin)
+        np.maximum(self.state, FAULT_SEVERITY[fault], out = self.state)    # Normal -> Degraded -> Shutdown latches
+
+        return t_noisy, current
+
+    def advance(self, current, dt):                          # forward Euler, same as ActuatorModel.step
+        domega = ((self.Kt * current) - (self.b * self.omega_real) - self.tau_load) / self.J
+        self.theta_real += self.omega_real * dt
+        self.omega_real += domega * dt
+
+        domega = ((self.Kt_twin * current) - (self.b_twin * self.omega_twin) - self.tau_load_twin) / self.J_twin
+        self.theta_twin += self.omega_twin * dt
+        self.omega_twin += domega * dt
+
+    def advance_zoh(self, current, dt):                      # exact zero-order-hold, same as ActuatorModel.step_zoh
+        phi_12, phi_22, gi_theta, gt_theta, gi_omega, gt_omega = self.zoh_real
+        omega = self.omega_real
+        self.theta_real += (phi_12 * omega) + (gi_theta * current) + (gt_theta * self.tau_load)
+        self.omega_real = (phi_22 * omega) + (gi_omega * current) + (gt_omega * self.tau_load)
+
+        phi_12, phi_22, gi_theta, gt_theta, gi_omega, gt_omega = self.zoh_twin
+        omega = self.omega_twin
+        self.theta_twin += (phi_12 * omega) + (gi_theta * current) + (gt_theta * self.tau_load_twin)
+        self.omega_twin = (phi_22 * omega) + (gi_omega * current) + (gt_omega * self.tau_load_twin)
+
+    def run(self, reference, t):
+        steps = len(t)
+        reference = np.asarray(reference, dtype = float)
+        if reference.ndim == 1:                              # one reference shared by every actuator
+            reference = reference[:, None]
+        elif reference.ndim == 2:                            # one reference row per actuator, (N, len(t))
+            reference = reference.T
+        reference = np.broadcast_to(reference, (steps, self.n))
+
+        theta_real = np.zeros((steps, self.n))               # stored time-major so each step writes one contiguous row
+        theta_twin = np.zeros((steps, self.n))
+        current = np.zeros((steps, self.n))
+        states = np.zeros((steps, self.n), dtype = np.uint8)
+
+        self.reset()
+
+        for i in range(1, steps):
+            t_noisy, current[i] = self.step(reference[i])
+
+            theta_real[i] = t_noisy
+            theta_twin[i] = self.theta_twin
+            states[i] = self.state
+
+        return theta_real.T, theta_twin.T, states.T, current.T    # (N, len(t)) views
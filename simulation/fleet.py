@@ -0,0 +1,47 @@
+import numpy as np
+from simulation.ensemble import EnsembleSimulator
+from safety.state_machine import SafetyState
+
+
+class MultiAxisSystem(EnsembleSimulator):
+    """
+    Multi-axis actuator system, every joint with its own plant, twin, PID and detector in contiguous arrays,
+    optionally coupled through a shared safety supervisor per group (robot or rack)
+    """
+    def __init__(self, dt, groups = None, coupled = True, names = None, **params):
+        super().__init__(dt, **params)
+
+        self.groups = np.zeros(self.n, dtype = np.intp) if groups is None else np.asarray(groups, dtype = np.intp)
+        if self.groups.shape != (self.n,):
+            raise ValueError(f"groups needs one entry per axis ({self.n}), got shape {self.groups.shape}")
+        self.n_groups = int(self.groups.max()) + 1 if self.n else 0
+        self.coupled = coupled               # one axis in Shutdown forces the rest of its group to Degraded
+        self.names = list(names) if names is not None else [f"axis_{i}" for i in range(self.n)]
+
+    @classmethod
+    def from_axes(cls, dt, axes, groups = None, coupled = True):    # axes: {name: parameter dict}
+        keys = set().union(*(a.keys() for a in axes.values()))
+        for name, a in axes.items():
+            missing = keys - a.keys()
+            if missing:
+                raise ValueError(f"Axis '{name}' is missing parameters {sorted(missing)} that other axes set")
+        params = {k: [a[k] for a in axes.values()] for k in keys}
+        return cls(dt, groups = groups, coupled = coupled, names = axes.keys(), **params)
+
+    def step(self, reference):
+        t_noisy, current = super().step(reference)
+
+        if self.coupled:
+            shutdown = self.state == SafetyState.SHUTDOWN
+            if shutdown.any():
+                group_down = np.zeros(self.n_groups, dtype = bool)
+                group_down[self.groups[shutdown]] = True
+                forced = group_down[self.groups].astype(np.uint8) * np.uint8(SafetyState.DEGRADED)
+                np.maximum(self.state, forced, out = self.state)
+
+        return t_noisy, current
+
+    def group_states(self):                  # worst state of every group
+        worst = np.zeros(self.n_groups, dtype = np.uint8)
+        np.maximum.at(worst, self.groups, self.state)
+        return worst
@@ -0,0 +1,377 @@
+import numpy as np
+from simulation.streaming import chunk_time, collect, take
+from safety.state_machine import CURRENT_LIMIT, TRANSITIONS, SafetyState
+
+CHANNELS = {                                 # channel -> (dtype, stage that produces it)
+    "reference": (float, None),
+    "theta_real": (float, None),
+    "omega_real": (float, None),
+    "current": (float, None),
+    "theta_twin": (float, "twin"),
+    "omega_twin": (float, "twin"),
+    "fault": (np.uint8, "detector"),
+    "state": (np.uint8, "safety"),
+}
+TICK_CHANNELS = ("theta_real", "theta_twin", "current", "fault", "state")    # what SimulationKernel.step returns
+TICK_BLOCK = 1024                            # samples of fault signals rendered at once for step()
+
+
+class Snapshot:
+    """
+    Complete loop state before sample `index`, restoring it continues a run bit-exactly
+    """
+    FIELDS = ("theta_real", "omega_real", "theta_twin", "omega_twin", "error_int", "prev_error", "bias", "state",
+              "held_theta", "held_omega")
+
+    def __init__(self, index, values, detector = None):
+        self.index = index
+        self.values = values                 # float64 array in FIELDS order, 0 for disabled stages
+        self.detector = detector             # state of a stateful (streaming) detector
+
+    def __getitem__(self, field):
+        return self.values[self.FIELDS.index(field)]
+
+    def __repr__(self):
+        return f"Snapshot(index={self.index}, " + ", ".join(f"{f}={v:.6g}" for f, v in zip(self.FIELDS, self.values)) + ")"
+
+
+class SimulationKernel:
+    """
+    Closed-loop simulation assembled from optional stages: plant -> twin -> injector -> detector -> safety
+    """
+    def __init__(self, real, controller, dt, twin = None, injector = None, detector = None, safety = None,
+                 faults = None, profiler = None):
+        if detector is not None and twin is None:
+            raise ValueError("The detector stage needs a twin to compute residuals")
+        if safety is not None and detector is None:
+            raise ValueError("The safety stage needs a detector")
+
+        self.real = real
+        self.controller = controller
+        self.dt = dt
+        self.twin = twin
+        self.injector = injector
+        self.detector = detector
+        self.safety = safety
+        self.faults = faults                 # FaultSet from diagnostics/fault_library.py
+        self.profiler = profiler             # StageProfiler from simulation/profiling.py, times the bound stages
+
+        self.stages = tuple(name for name in ("twin", "injector", "detector", "safety", "faults")
+                            if getattr(self, name) is not None)
+        self.effects = faults.effects if faults is not None else ()
+        self.channels = ("time",) + tuple(name for name, (_, stage) in CHANNELS.items()
+                                          if stage is None or stage in self.stages)
+        self.index = 0
+        self._tick = None                    # step() with the stages bound, rebuilt after reset()
+        self.stopped = None                  # name of the stop condition that ended the last run
+        self.truncated = False               # True when the last run stopped without filling the remaining samples
+
+    def reset(self):                         # every stage, so a run only depends on the configuration
+        for part in (self.real, self.twin, self.controller, self.injector, self.detector, self.safety, self.faults):
+            if part is not None:
+                part.reset()
+        self.index = 0                       # samples recorded so far, i.e. the index of the next sample
+        self._tick = None
+
+    def snapshot(self):
+        real, twin, injector, safety = self.real, self.twin, self.injector, self.safety
+        return Snapshot(self.index, np.array([
+            real.theta, real.omega,
+            twin.theta if twin is not None else 0.0, twin.omega if twin is not None else 0.0,
+            self.controller.error_int, self.controller.prev_error,
+            injector.bias if injector is not None else 0.0,
+            safety.state if safety is not None else 0,
+            self.faults.held_theta if self.faults is not None else 0.0,
+            self.faults.held_omega if self.faults is not None else 0.0
+        ], dtype = float), self.detector.get_state() if getattr(self.detector, "stateful", False) else None)
+
+    def restore(self, snapshot):
+        values = dict(zip(Snapshot.FIELDS, snapshot.values.tolist()))    # back to Python floats
+        self.real.theta, self.real.omega = values["theta_real"], values["omega_real"]
+        if self.twin is not None:
+            self.twin.theta, self.twin.omega = values["theta_twin"], values["omega_twin"]
+        self.controller.error_int, self.controller.prev_error = values["error_int"], values["prev_error"]
+        if self.injector is not None:
+            self.injector.bias = values["bias"]
+        if self.safety is not None:
+            self.safety.state = SafetyState(int(values["state"]))
+        if self.faults is not None:
+            self.faults.held_theta, self.faults.held_omega = values["held_theta"], values["held_omega"]
+        if snapshot.detector is not None:
+            self.detector.set_state(snapshot.detector)
+        self.index = snapshot.index
+
+    def _signals(self, start, n):
+        '''
+        Fault arrays of a chunk as lists (indexing them yields Python floats), None for effects the set lacks
+        '''
+        effects = self.effects
+        if not effects:
+            return None, None, None, None, None
+        signals = self.faults.chunk(start, n, self.dt)
+        theta, omega = "theta" in effects, "omega" in effects
+        return (signals.kt_scale.tolist() if "kt" in effects else None,
+                signals.theta_offset.tolist() if theta else None, signals.theta_hold.tolist() if theta else None,
+                signals.omega_offset.tolist() if omega else None, signals.omega_hold.tolist() if omega else None)
+
+    def _loop(self, samples, chunk_size, recorded, with_time, resume, stop_state):
+        dt, real, safety, faults = self.dt, self.real, self.safety, self.faults
+        compute, real_step = self.controller.compute, real.step          # bound once per run
+        twin_step = self.twin.step if self.twin is not None else None
+        apply = self.injector.apply if self.injector is not None else None
+        detect = self.detector.detect if self.detector is not None else None
+        check = safety.check if safety is not None else None
+        if self.profiler is not None:
+            compute, real_step, twin_step, apply, detect, check = self.profiler.instrument(
+                compute, real_step, twin_step, apply, detect, check)
+        limit, latch = CURRENT_LIMIT, stop_state is not None
+        t_twin = o_twin = 0.0
+        fault = state = None
+
+        def chunk(buffers, start, n):
+            data = {name: b if n == chunk_size else b[:n] for name, b in buffers.items()}
+            if with_time:
+                data["time"] = chunk_time(start, n, dt)
+            return data
+
+        def allocate():
+            return {name: np.zeros(chunk_size, dtype = CHANNELS[name][0]) for name in recorded}
+
+        if resume:                           # continuing from the current (e.g. restored) state
+            start, n = self.index, 0
+        else:
+            self.reset()
+            first = next(samples, None)
+            if first is None:
+                return
+            start, n = 0, 1
+        held_theta, held_omega = (faults.held_theta, faults.held_omega) if faults is not None else (0.0, 0.0)
+        buffers = allocate()
+        b_ref, b_t_real, b_o_real, b_current, b_t_twin, b_o_twin, b_fault, b_state = map(buffers.get, CHANNELS)
+        f_kt, f_theta_offset, f_theta_hold, f_omega_offset, f_omega_hold = self._signals(start, chunk_size)
+        if not resume:                       # sample 0 holds the initial state
+            if b_ref is not None:
+                b_ref[0] = first
+            if b_state is not None:
+                b_state[0] = safety.state
+            self.index = 1
+
+        for ref in samples:
+            if n == chunk_size:
+                self.index = start + n
+                if faults is not None:
+                    faults.held_theta, faults.held_omega = held_theta, held_omega
+                yield chunk(buffers, start, n)
+                start, n = start + n, 0
+                buffers = allocate()
+                b_ref, b_t_real, b_o_real, b_current, b_t_twin, b_o_twin, b_fault, b_state = map(buffers.get, CHANNELS)
+                f_kt, f_theta_offset, f_theta_hold, f_omega_offset, f_omega_hold = self._signals(start, chunk_size)
+
+            error = ref - real.theta
+            current = compute(error, dt)
+            if check is not None:
+                current *= limit[safety.state]       # reduced in degraded state, zero in shutdown
+            if f_kt is not None:                      # torque loss reaches the real plant only
+                t_real, o_real = real_step(current * f_kt[n], dt)
+            else:
+                t_real, o_real = real_step(current, dt)
+            if twin_step is not None:
+                t_twin, o_twin = twin_step(current, dt)
+            if apply is not None:
+                t_real = apply(t_real, dt)            # the recorded angle is the measured one
+            if f_theta_hold is not None:              # a held sensor repeats its last reading
+                if f_theta_hold[n]:
+                    t_real = held_theta
+                else:
+                    t_real += f_theta_offset[n]
+                    held_theta = t_real
+            if f_omega_hold is not None:
+                if f_omega_hold[n]:
+                    o_real = held_omega
+                else:
+                    o_real += f_omega_offset[n]
+                    held_omega = o_real
+            if detect is not None:
+                fault = detect(t_real - t_twin, o_real - o_twin)
+            if check is not None:
+                state = check(fault)
+
+            if b_ref is not None:
+                b_ref[n] = ref
+            if b_t_real is not None:
+                b_t_real[n] = t_real
+            if b_o_real is not None:
+                b_o_real[n] = o_real
+            if b_current is not None:
+                b_current[n] = current
+            if b_t_twin is not None:
+                b_t_twin[n] = t_twin
+            if b_o_twin is not None:
+                b_o_twin[n] = o_twin
+            if b_fault is not None:
+                b_fault[n] = fault
+            if b_state is not None:
+                b_state[n] = state
+            n += 1
+            if latch and state == stop_state:    # the stop sample is recorded, the rest of the iterator is left unread
+                self.stopped = "latch"
+                break
+
+        self.index = start + n
+        if faults is not None:
+            faults.held_theta, faults.held_omega = held_theta, held_omega
+        if n:
+            yield chunk(buffers, start, n)
+
+    def stream(self, reference, chunk_size = 1000, channels = None, resume = False, stop_state = None):
+        '''
+        Generator of fixed-size chunks; resume = True steps every sample from the current state instead of resetting,
+        stop_state ends the stream on the sample the safety state reaches it. Disabled stages and unrecorded channels
+        are skipped by a None check per sample
+        '''
+        channels = self.channels if channels is None else tuple(channels)
+        unknown = set(channels) - set(self.channels)
+        if unknown:
+            raise ValueError(f"Channels {sorted(unknown)} are not produced by stages {self.stages}")
+        if stop_state is not None and "safety" not in self.stages:
+            raise ValueError("Stopping on a latched state needs the safety stage")
+
+        self.stopped = None
+        recorded = tuple(name for name in CHANNELS if name in channels)
+        return self._loop(iter(reference), chunk_size, recorded, "time" in channels, resume, stop_state)
+
+    def step(self, reference):
+        '''
+        One sample from the current state as Python values (TICK_CHANNELS), e.g. a real-time tick. The stages are
+        bound on the first step after reset() and reused, so a tick costs about one pass of the stream() loop body
+        '''
+        if self._tick is None:
+            self._tick = self._bind_step()
+        return self._tick(reference)
+
+    def _bind_step(self):
+        missing = set(TICK_CHANNELS) - set(self.channels)
+        if missing:
+            raise ValueError(f"Channels {sorted(missing)} are not produced by stages {self.stages}")
+        dt, real, safety, faults, effects = self.dt, self.real, self.safety, self.faults, self.effects
+        compute, real_step, twin_step = self.controller.compute, real.step, self.twin.step
+        apply = self.injector.apply if self.injector is not None else None
+        detect, check = self.detector.detect, safety.check
+        if self.profiler is not None:
+            compute, real_step, twin_step, apply, detect, check = self.profiler.instrument(
+                compute, real_step, twin_step, apply, detect, check)
+        limit = CURRENT_LIMIT
+        block, first = (None,) * 5, -TICK_BLOCK    # fault arrays rendered TICK_BLOCK samples at a time
+
+        def tick(ref):                       # the stream() loop body for one sample
+            nonlocal block, first
+            n = self.index - first
+            if effects and not 0 <= n < TICK_BLOCK:
+                first, n = self.index, 0
+                block = self._signals(first, TICK_BLOCK)
+            f_kt, f_theta_offset, f_theta_hold, f_omega_offset, f_omega_hold = block
+
+            current = compute(ref - real.theta, dt) * limit[safety.state]
+            if f_kt is not None:
+                t_real, o_real = real_step(current * f_kt[n], dt)
+            else:
+                t_real, o_real = real_step(current, dt)
+            t_twin, o_twin = twin_step(current, dt)
+            if apply is not None:
+                t_real = apply(t_real, dt)
+            if f_theta_hold is not None:
+                if f_theta_hold[n]:
+                    t_real = faults.held_theta
+                else:
+                    t_real += f_theta_offset[n]
+                    faults.held_theta = t_real
+            if f_omega_hold is not None:
+                if f_omega_hold[n]:
+                    o_real = faults.held_omega
+                else:
+                    o_real += f_omega_offset[n]
+                    faults.held_omega = o_real
+            fault = detect(t_real - t_twin, o_real - o_twin)
+            state = check(fault)
+            self.index += 1
+            return t_real, t_twin, current, fault, state
+
+        return tick
+
+    def coastable(self, state):              # latched for good with zero current, so the rest is closed-form
+        return CURRENT_LIMIT[state] == 0 and all(TRANSITIONS[state] == state)
+
+    def coast(self, samples, channels):
+        '''
+        The remaining samples after a latched Shutdown as one chunk, vectorized instead of stepped
+        '''
+        dt, steps = self.dt, len(samples)
+        theta_before = np.concatenate(([self.real.theta], np.zeros(steps)))
+
+        t_real, o_real = self.real.coast(steps, dt)
+        theta_before[1:] = t_real
+        self.controller.compute_batch(samples - theta_before[:-1], dt)    # keeps the PID state consistent
+        values = {"reference": samples, "omega_real": o_real, "current": np.zeros(steps)}
+
+        if self.twin is not None:
+            values["theta_twin"], values["omega_twin"] = t_twin, o_twin = self.twin.coast(steps, dt)
+        if self.injector is not None:
+            t_real = self.injector.apply_batch(t_real, dt)
+        if self.faults is not None:          # current is zero, so only the sensor faults matter
+            signals = self.faults.chunk(self.index, steps, dt)
+            if "theta" in self.effects:
+                t_real = self.faults.measure(t_real, signals.theta_offset, signals.theta_hold, "theta")
+            if "omega" in self.effects:
+                o_real = self.faults.measure(o_real, signals.omega_offset, signals.omega_hold, "omega")
+                values["omega_real"] = o_real
+        values["theta_real"] = t_real
+        if getattr(self.detector, "stateful", False):    # streaming detectors continue from their state
+            detect = self.detector.detect
+            values["fault"] = np.array([detect(p, v) for p, v in zip((t_real - t_twin).tolist(),
+                                                                     (o_real - o_twin).tolist())], dtype = np.uint8)
+        elif self.detector is not None:
+            values["fault"] = self.detector.detect_batch(t_real - t_twin, o_real - o_twin).astype(np.uint8)
+        if self.safety is not None:
+            values["state"] = self.safety.check_batch(values["fault"], initial = self.safety.state)
+
+        chunk = {name: values[name] for name in channels if name != "time"}
+        if "time" in channels:
+            chunk["time"] = chunk_time(self.index, steps, dt)
+        self.index += steps
+        return chunk
+
+    def run(self, reference, t, channels = None, stop = (), check_every = 100):
+        '''
+        Full-length channels for a time vector; stop conditions (simulation/stopping.py) can end the run early,
+        after which a latched Shutdown is filled in closed form and anything else leaves the channels truncated
+        '''
+        channels = self.channels if channels is None else tuple(channels)
+        stop_state = next((c.state for c in stop if c.name == "latch"), None)
+        conditions = [c for c in stop if c.name != "latch"]
+        recorded = tuple(dict.fromkeys(channels + tuple(ch for c in conditions for ch in c.CHANNELS)))
+        for condition in conditions:
+            condition.reset(len(t), self.dt)
+
+        samples = take(reference, t)
+        chunk_size = check_every if conditions else max(len(t), 1)
+        chunks = []
+        self.truncated = False
+
+        stream = self.stream(samples, chunk_size, recorded, stop_state = stop_state)
+        for chunk in stream:
+            chunks.append(chunk)
+            reached = next((c.name for c in conditions if c.update(chunk)), None)
+            if reached is not None and self.stopped is None:
+                stream.close()
+                self.stopped = reached
+                break
+
+        if self.stopped == "latch" and self.coastable(stop_state):
+            chunks.append(self.coast(np.fromiter(samples, dtype = float), recorded))
+        elif self.stopped is not None:
+            self.truncated = True
+
+        data = collect({name: chunk[name] for name in channels} for chunk in chunks)
+        if not data:
+            data = {name: np.zeros(0, dtype = np.uint8 if name in ("fault", "state") else float) for name in channels}
+        return data
@@ -0,0 +1,300 @@
+'''
+Plant server for controllers running in another process: the SafeSimulator plant loop runs here, paced by
+RealTimeRunner, and every control tick asks the external controller for its current over shared memory
+(or a Unix socket where shared memory is not available)
+
+    # plant process
+    server = PlantServer(build_safe_simulator({}, 0.001), "actuator")    # its controller is replaced
+    server.start()                           # waits for the controller to connect
+    theta_real, theta_twin, states = server.run(reference)
+    server.report()                          # round-trip latency, missed cycles, deadline overruns
+
+    # controller process
+    ControllerClient(PIDController(4, 0.05, 0.2), "actuator").run()
+'''
+import os
+import platform
+import socket
+import struct
+import tempfile
+import time
+import numpy as np
+
+from simulation.realtime import RealTimeRunner
+
+try:
+    from multiprocessing import parent_process, resource_tracker, shared_memory
+except ImportError:                          # e.g. builds without _posixshmem, the socket transport still works
+    shared_memory = None
+
+_yield = getattr(os, "sched_yield", lambda: time.sleep(0))
+_ORDERED_STORES = platform.machine().lower() in ("x86_64", "amd64", "i386", "i686", "x86")
+
+STATE = 6                                    # cycle, error, theta, omega, safety state, dt
+COMMAND = 2                                  # cycle, current
+STOP = -1.0                                  # cycle number that ends the client loop
+
+
+class ShmRing:
+    '''
+    Single-producer single-consumer ring of fixed-width float64 records in shared memory. The producer only
+    writes the head, the consumer only the tail, so neither side takes a lock.
+
+    The handoff relies on the record's stores becoming visible to the other process before the head store that
+    publishes it (and the consumer's reads before its tail store). x86 guarantees this, as stores are not
+    reordered with other stores and loads are not reordered with later stores. Weakly ordered CPUs (ARM,
+    POWER) give no such guarantee without barriers, which NumPy cannot issue, so the "auto" transport falls
+    back to the socket there
+    '''
+    SLOTS = 128                              # byte offset of the records: head and tail on separate cache lines
+
+    def __init__(self, name, width, capacity = 64, create = False):
+        size = self.SLOTS + capacity * width * 8
+        if create:
+            self.shm = shared_memory.SharedMemory(name = name, create = True, size = size)
+        else:
+            self.shm = shared_memory.SharedMemory(name = name)
+            if parent_process() is None and os.name == "posix":
+                # own resource tracker: keep it from unlinking the server's segment. The tracker holds the
+                # POSIX name, which carries the leading slash that SharedMemory.name leaves out
+                resource_tracker.unregister("/" + self.shm.name, "shared_memory")
+        self.owner = create
+        self.width = width
+        self.capacity = capacity
+        self.head = np.ndarray((1,), dtype = np.uint64, buffer = self.shm.buf, offset = 0)
+        self.tail = np.ndarray((1,), dtype = np.uint64, buffer = self.shm.buf, offset = 64)
+        self.slots = np.ndarray((capacity, width), dtype = np.float64, buffer = self.shm.buf, offset = self.SLOTS)
+        if create:
+            self.head[0] = self.tail[0] = 0
+
+    def put(self, values):                   # False when the consumer is a full ring behind
+        head = int(self.head[0])
+        if head - int(self.tail[0]) >= self.capacity:
+            return False
+        self.slots[head % self.capacity] = values
+        self.head[0] = head + 1              # published only after the record is written
+        return True
+
+    def get(self):
+        tail = int(self.tail[0])
+        if tail == int(self.head[0]):
+            return None
+        values = tuple(self.slots[tail % self.capacity].tolist())
+        self.tail[0] = tail + 1
+        return values
+
+    def close(self):
+        del self.head, self.tail, self.slots     # views on the buffer have to go before it can be closed
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShmChannel:
+    '''
+    Pair of rings: records sent one way, received the other. receive(), and send() while the ring is full,
+    busy-poll for `spin` seconds and then yield the CPU between polls, so the peer is not starved when both
+    share a core
+    '''
+    def __init__(self, name, server, capacity = 64, spin = 5e-5):
+        states = ShmRing(f"{name}_state", STATE, capacity, create = server)
+        commands = ShmRing(f"{name}_command", COMMAND, capacity, create = server)
+        self.outgoing, self.incoming = (states, commands) if server else (commands, states)
+        self.spin = spin
+
+    def send(self, values, timeout = 0.0, clock = time.perf_counter):    # False if the ring stayed full
+        if self.outgoing.put(values):
+            return True
+        return self._wait(lambda: True if self.outgoing.put(values) else None, timeout, clock) is not None
+
+    def receive(self, timeout, clock = time.perf_counter):
+        return self._wait(self.incoming.get, timeout, clock)
+
+    def _wait(self, poll, timeout, clock):   # polls until it returns something other than None, or the timeout
+        now = clock()
+        deadline, spin = now + timeout, now + self.spin
+        while True:
+            result = poll()
+            if result is not None:
+                return result
+            now = clock()
+            if now >= deadline:
+                return None
+            if now > spin:
+                _yield()
+
+    def close(self):
+        self.outgoing.close()
+        self.incoming.close()
+
+
+class SocketChannel:
+    '''
+    Fallback transport: the same fixed-width records over a Unix stream socket
+    '''
+    def __init__(self, name, server, path = None, connect_timeout = 10.0):
+        self.path = path or os.path.join(tempfile.gettempdir(), f"{name}.sock")
+        self.width_in, self.width_out = (COMMAND, STATE) if server else (STATE, COMMAND)
+        self.server = server
+        if server:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(self.path)
+            self.listener.listen(1)
+            self.listener.settimeout(connect_timeout)
+            self.sock = None
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.path)
+        self.buffer = b""
+
+    def accept(self):
+        self.sock, _ = self.listener.accept()
+
+    def send(self, values, timeout = None):  # blocks until the socket buffer takes the whole record
+        self.sock.settimeout(None)
+        self.sock.sendall(struct.pack(f"{self.width_out}d", *values))
+        return True
+
+    def receive(self, timeout, clock = time.perf_counter):
+        size = 8 * self.width_in
+        deadline = clock() + timeout
+        while len(self.buffer) < size:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return None
+            self.sock.settimeout(remaining)
+            try:
+                data = self.sock.recv(4096)
+            except socket.timeout:
+                return None
+            if not data:
+                raise ConnectionError("Plant server connection closed")
+            self.buffer += data
+        record, self.buffer = self.buffer[:size], self.buffer[size:]
+        return struct.unpack(f"{self.width_in}d", record)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        if self.server:
+            self.listener.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def open_channel(name, server, transport = "auto", path = None):
+    if transport == "auto":                  # the lock-free rings need x86 store ordering, see ShmRing
+        transport = "shm" if shared_memory is not None and _ORDERED_STORES else "socket"
+    if transport == "shm":
+        if shared_memory is None:
+            raise ImportError("multiprocessing.shared_memory is not available, use transport = 'socket'")
+        return ShmChannel(name, server)
+    if transport == "socket":
+        return SocketChannel(name, server, path)
+    raise ValueError(f"Unknown transport '{transport}', expected 'auto', 'shm' or 'socket'")
+
+
+class RemoteController:
+    '''
+    Stands in for PIDController inside the simulator: compute() sends the error and plant state to the external
+    controller and returns its current, or holds the last current when the reply misses the deadline. A state
+    that cannot be sent within the deadline because the controller stopped draining its ring counts as a
+    dropped send and a missed cycle
+    '''
+    def __init__(self, channel, timeout):
+        self.channel = channel
+        self.timeout = timeout            # seconds to wait for each reply
+        self.plant = None                 # simulator whose real actuator and safety state are published
+        self.reset()
+
+    def reset(self):
+        self.cycle = 0
+        self.current = 0.0
+        self.round_trip = []              # seconds per cycle, nan when the reply was missed
+        self.missed = 0
+        self.dropped = 0                  # states not sent because the outgoing ring stayed full
+
+    def compute(self, error, dt):
+        self.cycle += 1
+        real, safety = self.plant.real, self.plant.safety
+        sent = time.perf_counter()
+        if not self.channel.send((self.cycle, error, real.theta, real.omega, int(safety.state), dt), self.timeout):
+            self.dropped += 1
+            reply = None
+        else:
+            reply = self.channel.receive(max(self.timeout - (time.perf_counter() - sent), 0.0))
+        while reply is not None and reply[0] < self.cycle:     # late replies to earlier cycles
+            reply = self.channel.receive(max(self.timeout - (time.perf_counter() - sent), 0.0))
+        if reply is None:
+            self.missed += 1
+            self.round_trip.append(np.nan)
+            return self.current
+        self.round_trip.append(time.perf_counter() - sent)
+        self.current = reply[1]
+        return self.current
+
+
+class PlantServer:
+    '''
+    Real-time plant loop of a SafeSimulator whose controller runs in another process
+    '''
+    def __init__(self, simulator, name = "actuator", transport = "auto", path = None, timeout = None, **runner):
+        self.simulator = simulator         # any controller it holds is replaced by the RemoteController
+        self.channel = open_channel(name, True, transport, path)
+        self.remote = RemoteController(self.channel, 0.8 * simulator.dt if timeout is None else timeout)
+        self.remote.plant = simulator
+        simulator.controller = self.remote
+        self.runner = RealTimeRunner(simulator, **runner)
+
+    def start(self, timeout = 10.0):         # waits for the client's hello, cycle 0
+        if isinstance(self.channel, SocketChannel):
+            self.channel.accept()
+        hello = self.channel.receive(timeout)
+        if hello is None or hello[0] != 0:
+            raise TimeoutError(f"No controller connected within {timeout} s")
+
+    def run(self, reference):
+        return self.runner.run(reference)
+
+    def report(self):
+        round_trip = np.asarray(self.remote.round_trip)
+        answered = round_trip[~np.isnan(round_trip)]
+        return {**self.runner.report(),
+                "cycles": self.remote.cycle,
+                "missed_cycles": self.remote.missed,
+                "dropped_sends": self.remote.dropped,
+                "mean_round_trip": np.mean(answered) if answered.size else np.nan,
+                "p99_round_trip": np.percentile(answered, 99) if answered.size else np.nan,
+                "max_round_trip": np.max(answered) if answered.size else np.nan}
+
+    def close(self, timeout = 1.0):         # a client that does not get the stop ends on its idle timeout
+        self.channel.send((STOP,) + (0.0,) * (STATE - 1), timeout)
+        self.channel.close()
+
+
+class ControllerClient:
+    '''
+    Controller side: answers every plant state with controller.compute(error, dt), until the server stops
+    '''
+    def __init__(self, controller, name = "actuator", transport = "auto", path = None):
+        self.controller = controller       # e.g. PIDController, or anything with compute(error, dt)
+        self.channel = open_channel(name, False, transport, path)
+        self.cycles = 0
+
+    def run(self, idle_timeout = 10.0):
+        if not self.channel.send((0.0, 0.0), idle_timeout):    # hello
+            raise TimeoutError(f"Plant server did not read the hello for {idle_timeout} s")
+        while True:
+            state = self.channel.receive(idle_timeout)
+            if state is None:
+                raise TimeoutError(f"No plant state for {idle_timeout} s")
+            cycle, error, _, _, _, dt = state
+            if cycle == STOP:
+                break
+            if not self.channel.send((cycle, self.controller.compute(error, dt)), idle_timeout):
+                raise TimeoutError(f"Plant server stopped reading replies for {idle_timeout} s")
+            self.cycles += 1
+        self.channel.close()
+        return self.cycles
@@ -0,0 +1,206 @@
+'''
+Plot layer for long traces: every series is reduced to a few points per pixel column before it reaches matplotlib,
+the samples around safety-state transitions are always kept, and figures render in worker processes (Agg backend)
+
+    runs = [{"name": "nominal", "t": t, "reference": reference, "theta_real": theta_real,
+             "theta_twin": theta_twin, "states": states, "current": current}, ...]
+    render_runs(runs, "results/plots")       # <name>_<figure>.png for every run and figure in FIGURES
+'''
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from safety.state_machine import STATE_LABELS
+
+POINTS = 2000                                # about two points per pixel column of an 8 inch, 100 dpi figure
+
+
+def transitions(states):                     # indices of the first sample of every new state
+    return np.flatnonzero(np.diff(np.asarray(states).astype(np.int16))) + 1
+
+
+def minmax(y, buckets):
+    '''
+    Indices of the minimum and maximum of y in each of `buckets` equal slices, in time order; keeps every
+    spike and step of the full trace within one pixel column
+    '''
+    y = np.asarray(y, dtype = float)
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    padded = np.full(rows * size, np.inf)
+    padded[:n] = y
+    low = np.argmin(padded.reshape(rows, size), axis = 1)
+    padded[n:] = -np.inf
+    high = np.argmax(padded.reshape(rows, size), axis = 1)
+    start = np.arange(rows) * size
+    return np.unique(np.concatenate((start + low, start + high, [0, n - 1])))
+
+
+def lttb(x, y, points):
+    '''
+    Largest-Triangle-Three-Buckets: per bucket, the sample spanning the largest triangle with the previously chosen
+    sample and the mean of the next bucket, keeps the visual shape with `points` samples
+    '''
+    x, y = np.asarray(x, dtype = float), np.asarray(y, dtype = float)
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(int)    # points - 2 buckets between the fixed end points
+    chosen = np.empty(points, dtype = int)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        nx = x[nxt_lo:max(nxt_hi, nxt_lo + 1)].mean()
+        ny = y[nxt_lo:max(nxt_hi, nxt_lo + 1)].mean()
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        a = lo + int(np.argmax(area))
+        chosen[i + 1] = a
+    return np.unique(chosen)
+
+
+def downsample(t, y, points = POINTS, method = "minmax", keep = ()):
+    '''
+    (t, y) reduced to about `points` samples, `keep` indices included whatever the method picks
+    '''
+    t, y = np.asarray(t), np.asarray(y)
+    if method == "minmax":
+        index = minmax(y, max(points // 2, 1))
+    elif method == "lttb":
+        index = lttb(t, y, points)
+    else:
+        raise ValueError(f"Unknown method '{method}', expected 'minmax' or 'lttb'")
+    keep = np.asarray(keep, dtype = int)
+    index = np.union1d(index, keep[(keep >= 0) & (keep < len(y))])
+    return t[index], y[index]
+
+
+def prepare(run, points = POINTS, method = "minmax"):
+    '''
+    Downsampled series of a run for FIGURES: derived series (residual) are taken at full resolution first.
+    states (and current) may start one sample later than t, as SafeSimulator.run returns them
+    '''
+    t = np.asarray(run["t"])
+    series = {"name": run["name"]}
+    keep = np.zeros(0, dtype = int)          # indices into t, one sample either side of each state change
+    states = run.get("states")
+    if states is not None:
+        offset = len(t) - len(states)
+        change = transitions(states)
+        keep = np.unique(np.concatenate((change - 1, change, change + 1))) + offset
+        series["states"] = downsample(t[offset:], states, points, method, keep - offset)
+        series["transitions"] = t[change + offset]
+
+    for name in ("reference", "theta_real", "theta_twin"):
+        if run.get(name) is not None:
+            series[name] = downsample(t, np.rad2deg(np.broadcast_to(run[name], t.shape)), points, method, keep)
+    if run.get("theta_real") is not None and run.get("theta_twin") is not None:
+        residual = np.rad2deg(np.asarray(run["theta_real"]) - np.asarray(run["theta_twin"]))
+        series["residual"] = downsample(t, residual, points, method, keep)
+    if run.get("current") is not None:
+        offset = len(t) - len(run["current"])
+        series["current"] = downsample(t[offset:], run["current"], points, method, keep - offset)
+    return series
+
+
+def _mark_transitions(ax, series):
+    for x in series.get("transitions", ()):
+        ax.axvline(x = x, color = 'grey', linestyle = '--')
+
+
+def plot_tracking(ax, series):
+    if "reference" in series:
+        ax.plot(*series["reference"], label = 'Reference', color = 'grey', linestyle = '--')
+    ax.plot(*series["theta_real"], label = 'Real', color = 'orange')
+    if "theta_twin" in series:
+        ax.plot(*series["theta_twin"], label = 'Digital twin', color = 'green')
+    ax.set_ylabel("Theta (deg)")
+    ax.set_title(f"{series['name']}: tracking")
+    ax.legend()
+
+
+def plot_residual(ax, series):
+    ax.plot(*series["residual"], label = 'Residual theta', color = 'blue')
+    _mark_transitions(ax, series)
+    ax.set_ylabel("Theta residual (deg)")
+    ax.set_title(f"{series['name']}: residual (real - twin)")
+    ax.legend()
+
+
+def plot_safety_states(ax, series):
+    ax.step(*series["states"], where = 'post', color = 'blue')
+    ax.set_yticks(range(len(STATE_LABELS)), [label.split("_")[0] for label in STATE_LABELS])
+    ax.set_title(f"{series['name']}: safety state")
+
+
+def plot_current(ax, series):
+    ax.plot(*series["current"], label = 'Current', color = 'orange')
+    _mark_transitions(ax, series)
+    ax.set_ylabel("Current (A)")
+    ax.set_title(f"{series['name']}: current limiting")
+    ax.legend()
+
+
+def plot_response(ax, series):               # tracking over safety state, the simulation.cli figure
+    ax1, ax2 = ax
+    plot_tracking(ax1, series)
+    ax1.set_title(series["name"])
+    plot_safety_states(ax2, series)
+    ax2.set_title("")
+
+
+FIGURES = {                                  # name -> (plot function, series it needs, axes)
+    "tracking": (plot_tracking, ("theta_real",), 1),
+    "residual": (plot_residual, ("residual",), 1),
+    "safety_states": (plot_safety_states, ("states",), 1),
+    "current": (plot_current, ("current",), 1),
+    "response": (plot_response, ("theta_real", "states"), 2),
+}
+
+
+def render(job):                             # runs in a worker process
+    series, figure, path = job
+    import matplotlib                        # deferred: importing the module does not need matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    function, _, axes = FIGURES[figure]
+    fig, ax = plt.subplots(axes, 1, figsize = (8, 6), sharex = True)
+    function(ax, series)
+    (ax[-1] if axes > 1 else ax).set_xlabel("Time (s)")
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+def render_runs(runs, directory, figures = None, points = POINTS, method = "minmax", workers = None,
+                pattern = "{run}_{figure}.png"):
+    '''
+    Every figure for every run, downsampled here and rendered on a process pool; figures a run lacks the
+    series for are skipped. Returns the written paths
+    '''
+    figures = list(FIGURES) if figures is None else list(figures)
+    unknown = set(figures) - set(FIGURES)
+    if unknown:
+        raise ValueError(f"Unknown figures {sorted(unknown)}, expected some of {list(FIGURES)}")
+    os.makedirs(directory, exist_ok = True)
+
+    jobs = []
+    for run in runs:
+        series = prepare(run, points, method)           # only the reduced arrays are sent to the workers
+        for figure in figures:
+            if all(name in series for name in FIGURES[figure][1]):
+                path = os.path.join(directory, pattern.format(run = run["name"], figure = figure))
+                jobs.append((series, figure, path))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return [render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers = min(workers, len(jobs))) as pool:
+        return list(pool.map(render, jobs))
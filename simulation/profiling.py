@@ -0,0 +1,121 @@
+import json
+import time
+import numpy as np
+
+STAGES = ("controller", "plant", "twin", "injector", "detector", "safety")    # in SimulationKernel order
+
+
+class StageProfiler:
+    '''
+    Opt-in stage timers, call counters and per-step hooks for a simulator
+
+    Used as a context manager around run()/stream(). While active, the simulator hands the profiler to every
+    kernel it builds, and the kernel wraps its stage callables when it binds them at the start of a stream;
+    a stream started before entering stays untimed, one that is not being profiled runs exactly the same loop.
+    '''
+    def __init__(self, simulator, max_events = 100000, clock = time.perf_counter):
+        self.simulator = simulator
+        self.max_events = max_events          # Chrome trace events kept, the counters always cover the full run
+        self.clock = clock
+        self.hooks = []
+        if not hasattr(simulator, "kernel"):
+            raise TypeError(f"{type(simulator).__name__} does not run on SimulationKernel, nothing to profile")
+
+        kernel = simulator.kernel()
+        self.names = [name for name, part in zip(STAGES, (kernel.controller, kernel.real, kernel.twin,
+                                                          kernel.injector, kernel.detector, kernel.safety))
+                      if part is not None]
+        self.reset()
+
+    def reset(self):
+        self.calls = dict.fromkeys(self.names, 0)
+        self.total = dict.fromkeys(self.names, 0.0)
+        self.events = []
+        self.wall = 0.0
+        self.steps = 0
+
+    def add_hook(self, callback):             # callback(step, outputs) after the last stage of every step
+        self.hooks.append(callback)
+        return callback
+
+    def _wrap(self, name, original, last):
+        clock, calls, total, events, hooks = self.clock, self.calls, self.total, self.events, self.hooks
+        outputs = self.outputs
+        max_events = self.max_events
+        profiler = self
+
+        def timed(*args):
+            start = clock()
+            result = original(*args)
+            end = clock()
+
+            calls[name] += 1
+            total[name] += end - start
+            if len(events) < max_events:
+                events.append((name, start, end))
+            outputs[name] = result
+
+            if last:
+                profiler.steps += 1
+                for hook in hooks:
+                    hook(profiler.steps, outputs)
+            return result
+
+        return timed
+
+    def instrument(self, *stages):
+        '''
+        Timed wrappers for the kernel's bound stage callables, given in STAGES order with None for disabled stages
+        '''
+        last = max(i for i, stage in enumerate(stages) if stage is not None)
+        return tuple(None if stage is None else self._wrap(name, stage, i == last)
+                     for i, (name, stage) in enumerate(zip(STAGES, stages)))
+
+    def __enter__(self):
+        self.outputs = {}
+        self.previous = getattr(self.simulator, "profiler", None)
+        self.simulator.profiler = self
+        self.origin = self.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall += self.clock() - self.origin
+        self.simulator.profiler = self.previous
+        return False
+
+    def summary(self):
+        '''
+        Rows of stage, calls, total and mean time; bookkeeping is whatever the stages do not account for,
+        including the loop's own appends and the wrappers' timing overhead
+        '''
+        rows = []
+        for name in dict.fromkeys(self.names):
+            calls, total = self.calls[name], self.total[name]
+            rows.append({"Stage": name, "Calls": calls, "Total (s)": total,
+                         "Mean (us)": total / calls * 1e6 if calls else np.nan,
+                         "Share (%)": total * 100 / self.wall if self.wall else np.nan})
+
+        other = self.wall - sum(self.total.values())
+        rows.append({"Stage": "bookkeeping", "Calls": self.steps, "Total (s)": other,
+                     "Mean (us)": other / self.steps * 1e6 if self.steps else np.nan,
+                     "Share (%)": other * 100 / self.wall if self.wall else np.nan})
+        return rows
+
+    def format_summary(self):
+        lines = [f"{'Stage':14s}{'Calls':>10s}{'Total (s)':>12s}{'Mean (us)':>12s}{'Share (%)':>11s}"]
+        for row in self.summary():
+            lines.append(f"{row['Stage']:14s}{row['Calls']:>10d}{row['Total (s)']:>12.4f}"
+                         f"{row['Mean (us)']:>12.3f}{row['Share (%)']:>11.1f}")
+        return "\n".join(lines)
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({"wall": self.wall, "steps": self.steps, "stages": self.summary()}, f, indent = 2)
+
+    def to_chrome_trace(self, path):         # chrome://tracing / Perfetto "complete" events in microseconds
+        origin = self.origin
+        trace = [{"name": name, "ph": "X", "pid": 0, "tid": 0,
+                  "ts": (start - origin) * 1e6, "dur": (end - start) * 1e6}
+                 for name, start, end in self.events]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,102 @@
+import gc
+import time
+import numpy as np
+from safety.state_machine import SafetyState
+
+
+class RealTimeRunner:
+    '''
+    Runs the SafeSimulator step paced to dt on the monotonic clock, with deadline-miss instrumentation
+    '''
+    POLICIES = ("skip", "catch_up", "degrade")
+
+    def __init__(self, simulator, overrun_policy = "skip", spin = 2e-4, disable_gc = True,
+                 clock = time.perf_counter, sleep = time.sleep):
+        if overrun_policy not in self.POLICIES:
+            raise ValueError(f"Unknown overrun policy '{overrun_policy}', expected one of {self.POLICIES}")
+
+        self.simulator = simulator
+        self.dt = simulator.dt
+        self.overrun_policy = overrun_policy
+        self.spin = spin                  # the last part of every wait is busy-waited, sleep() is too coarse
+        self.disable_gc = disable_gc
+        self.clock = clock                # perf_counter is monotonic and has the finest resolution
+        self.sleep = sleep
+
+    def run(self, reference):
+        reference = np.asarray(reference, dtype = float)
+        steps = len(reference)
+        sim, clock, sleep, spin, period = self.simulator, self.clock, self.sleep, self.spin, self.dt
+        degrade = self.overrun_policy == "degrade"
+        skip = self.overrun_policy == "skip"
+
+        theta_real = np.full(steps, np.nan)    # skipped ticks stay nan
+        theta_twin = np.full(steps, np.nan)
+        states = np.zeros(steps, dtype = np.uint8)    # skipped ticks repeat the last executed state
+        latency = np.full(steps, np.nan)      # execution time of each tick
+        jitter = np.full(steps, np.nan)       # start time minus scheduled start
+        overrun = np.zeros(steps, dtype = bool)
+
+        sim.reset()
+        states[0] = sim.safety.state
+        gc_enabled = gc.isenabled()
+        if self.disable_gc:
+            gc.disable()
+
+        try:
+            start = clock()
+            k = 1
+            while k < steps:
+                scheduled = start + k * period
+                remaining = scheduled - clock()
+                if remaining > spin:
+                    sleep(remaining - spin)
+                while clock() < scheduled:
+                    pass
+
+                begin = clock()
+                theta_real[k], theta_twin[k], _, _, states[k] = sim.step(reference[k])
+                end = clock()
+
+                latency[k] = end - begin
+                jitter[k] = begin - scheduled
+
+                if end <= scheduled + period:
+                    k += 1
+                    continue
+
+                overrun[k] = True
+                if degrade and sim.safety.state < SafetyState.DEGRADED:    # missed deadline forces current limiting
+                    sim.safety.state = SafetyState.DEGRADED
+                if skip:                                                   # drop the ticks whose deadline has passed,
+                                                                           # the plant only advances on executed ticks
+                    resume = max(k + 1, int((end - start) // period) + 1)
+                    states[k + 1:resume] = states[k]                       # the safety state holds over dropped ticks
+                    k = resume
+                else:                                                      # catch up: run late ticks back to back
+                    k += 1
+        finally:
+            if self.disable_gc and gc_enabled:
+                gc.enable()
+
+        self.latency, self.jitter, self.overrun = latency, jitter, overrun
+        return theta_real, theta_twin, states
+
+    def report(self, bins = 20):
+        executed = ~np.isnan(self.latency)
+        executed[0] = False
+        latency = self.latency[executed]
+        jitter = self.jitter[executed]
+        counts, edges = np.histogram(jitter, bins = bins) if jitter.size else (np.zeros(0), np.zeros(0))
+
+        return {
+            "ticks": len(self.latency) - 1,
+            "executed": int(executed.sum()),
+            "skipped": int(len(self.latency) - 1 - executed.sum()),
+            "overruns": int(self.overrun.sum()),
+            "wcet": np.max(latency) if latency.size else np.nan,              # worst-case execution time
+            "mean_latency": np.mean(latency) if latency.size else np.nan,
+            "p99_latency": np.percentile(latency, 99) if latency.size else np.nan,
+            "max_jitter": np.max(jitter) if jitter.size else np.nan,
+            "jitter_histogram": (counts, edges)
+        }
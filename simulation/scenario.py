@@ -0,0 +1,33 @@
+import numpy as np
+
+from models.actuator import ActuatorModel
+from models.digital_twin import DigitalTwin
+from control.pid import PIDController
+from diagnostics.fault_detector import FaultDetector
+from diagnostics.fault_injection import FaultInjector
+from safety.state_machine import SafetyStateMachine
+from simulation.simulator_phase4 import SafeSimulator
+
+NOMINAL = {                                  # phase 4 scenario, same keys as EnsembleSimulator.PARAMETERS
+    "J": 0.0035, "b": 0.025, "Kt": 0.05, "tau_load": 0.0,
+    "J_twin": 0.0033, "b_twin": 0.022, "Kt_twin": 0.047, "tau_load_twin": 0.0,
+    "Kp": 4, "Ki": 0.05, "Kd": 0.2,
+    "drift_rate": np.deg2rad(1),
+    "pos_threshold": np.deg2rad(2), "vel_threshold": np.deg2rad(5)
+}
+
+
+def build_safe_simulator(params, dt, integrator = "euler", faults = None):
+    '''
+    SafeSimulator for a parameter dict, missing keys fall back to NOMINAL
+    '''
+    p = {**NOMINAL, **params}
+    return SafeSimulator(
+        ActuatorModel(p["J"], p["b"], p["Kt"], p["tau_load"], integrator = integrator),
+        DigitalTwin(p["J_twin"], p["b_twin"], p["Kt_twin"], p["tau_load_twin"], integrator = integrator),
+        PIDController(p["Kp"], p["Ki"], p["Kd"]),
+        FaultInjector(drift_rate = p["drift_rate"]),
+        FaultDetector(p["pos_threshold"], p["vel_threshold"]),
+        SafetyStateMachine(),
+        dt,
+        faults = faults)
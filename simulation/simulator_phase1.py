@@ -1,4 +1,4 @@
-import numpy as np
+from simulation.kernel import SimulationKernel
 
 class Simulator:
     """
@@ -8,20 +8,14 @@ class Simulator:
         self.actuator = actuator
         self.controller = controller
         self.dt = dt
+        self.profiler = None                # set while a StageProfiler is active
 
-    def run(self, reference, t):
-        theta_array = np.zeros_like(t)    # joint angle
-        omega_array = np.zeros_like(t)    # joint velocity
-
-        self.actuator.reset()
-        self.controller.reset()
-
-        for i in range(1, len(t)):
-            error = reference[i] - self.actuator.theta
-            current = self.controller.compute(error, self.dt)
+    def kernel(self):
+        return SimulationKernel(self.actuator, self.controller, self.dt, profiler = self.profiler)
 
-            theta, omega = self.actuator.step(current, self.dt)
+    def stream(self, reference, chunk_size = 1000):    # yields fixed-size chunks from a reference iterator
+        return self.kernel().stream(reference, chunk_size)
 
-            theta_array[i], omega_array[i] = theta, omega
-
-        return theta_array, omega_array
\ No newline at end of file
+    def run(self, reference, t):
+        data = self.kernel().run(reference, t, ("theta_real", "omega_real"))
+        return data["theta_real"], data["omega_real"]
@@ -1,33 +1,24 @@
-import numpy as np
+from simulation.kernel import SimulationKernel
 
 class DualSimulator:
     """
     Closed-loop simulation for real atuator and digital twin
     """
+    CHANNELS = ("reference", "theta_real", "omega_real", "theta_twin", "omega_twin", "current")
+
     def __init__(self, real, twin, controller, dt):
         self.real = real
         self.twin = twin
         self.controller = controller
         self.dt = dt
+        self.profiler = None                # set while a StageProfiler is active
 
-    def run(self, reference, t):
-        theta_real = np.zeros_like(t)
-        theta_twin = np.zeros_like(t)
-        omega_real = np.zeros_like(t)
-        omega_twin = np.zeros_like(t)
-
-        self.real.reset()
-        self.twin.reset()
-        self.controller.reset()
+    def kernel(self):    # error and current are calculated from the real model only, the twin gets the same current
+        return SimulationKernel(self.real, self.controller, self.dt, twin = self.twin, profiler = self.profiler)
 
-        for i in range(1, len(t)):
-            error = reference[i] - self.real.theta               # error and current are calculated from real model only
-            current = self.controller.compute(error, self.dt)
+    def stream(self, reference, chunk_size = 1000):    # yields fixed-size chunks from a reference iterator
+        return self.kernel().stream(reference, chunk_size)
 
-            t_real, o_real = self.real.step(current, self.dt)
-            t_twin, o_twin = self.twin.step(current, self.dt)    # same current is provided to digital twin model
-
-            theta_real[i], omega_real[i] = t_real, o_real
-            theta_twin[i], omega_twin[i] = t_twin, o_twin
-
-        return theta_real, omega_real, theta_twin, omega_twin
\ No newline at end of file
+    def run(self, reference, t):
+        data = self.kernel().run(reference, t, ("theta_real", "omega_real", "theta_twin", "omega_twin"))
+        return data["theta_real"], data["omega_real"], data["theta_twin"], data["omega_twin"]
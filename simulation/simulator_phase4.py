@@ -1,49 +1,45 @@
-import numpy as np
+from simulation.kernel import SimulationKernel
 
 class SafeSimulator:
     """
     Closed-loop simulation with safety states incorporated
     """
-    def __init__(self, real, twin, controller, injector, detector, safety, dt):
+    CHANNELS = ("reference", "theta_real", "omega_real", "theta_twin", "omega_twin", "current")
+
+    def __init__(self, real, twin, controller, injector, detector, safety, dt, faults = None):
         self.real = real
         self.twin = twin
         self.controller = controller
-        self.injector = injector
-        self.detector = detector
+        self.injector = injector            # fault injector
+        self.detector = detector            # fault detector
         self.safety = safety
         self.dt = dt
-
-    def run(self, reference, t):
-        theta_real = np.zeros_like(t)
-        theta_twin = np.zeros_like(t)
-        states = []
-
-        self.real.reset()
-        self.twin.reset()
-        self.controller.reset()
-
-        for i in range(1, len(t)):
-            error = reference[i] - self.real.theta
-            current = self.controller.compute(error, self.dt)
-
-            if self.safety.state == "Degraded_state":
-                current *= 0.3
-            elif self.safety.state == "Shutdown_state":
-                current = 0.0
-
-            t_real, o_real = self.real.step(current, self.dt)
-            t_twin, o_twin = self.twin.step(current, self.dt)
-
-            t_noisy = self.injector.apply(t_real, self.dt)
-
-            pos_res = t_noisy - t_twin
-            vel_res = o_real - o_twin
-
-            fault_state = self.detector.detect(pos_res, vel_res)
-            safety_state = self.safety.check(fault_state)
-
-            theta_real[i] = t_noisy
-            theta_twin[i] = t_twin
-            states.append(safety_state)
-
-        return theta_real, theta_twin, states
\ No newline at end of file
+        self.faults = faults                # optional FaultSet, precomputed fault signals
+        self.profiler = None                # set while a StageProfiler is active
+        self.stopped = None
+        self.truncated = False
+        self._ticks = None                  # kernel stepped by step(), kept so fault signals stay indexed
+
+    def kernel(self):
+        return SimulationKernel(self.real, self.controller, self.dt, twin = self.twin, injector = self.injector,
+                                detector = self.detector, safety = self.safety, faults = self.faults,
+                                profiler = self.profiler)
+
+    def stream(self, reference, chunk_size = 1000):    # yields fixed-size chunks from a reference iterator
+        return self.kernel().stream(reference, chunk_size)
+
+    def reset(self):
+        self._ticks = self.kernel()
+        self._ticks.reset()
+        self._ticks.index = 1               # sample 0 is the initial state, as in run()
+
+    def step(self, reference):    # one control tick: controller -> plant -> twin -> detector -> safety
+        if self._ticks is None:             # stepping without reset() continues from the current state
+            self._ticks = self.kernel()
+        return self._ticks.step(reference)    # (theta_noisy, theta_twin, current, FaultCode, SafetyState)
+
+    def run(self, reference, t, stop = ()):    # stop conditions from simulation/stopping.py
+        kernel = self.kernel()
+        data = kernel.run(reference, t, ("theta_real", "theta_twin", "state"), stop = stop)
+        self.stopped, self.truncated = kernel.stopped, kernel.truncated
+        return data["theta_real"], data["theta_twin"], data["state"][1:]
@@ -0,0 +1,83 @@
+import numpy as np
+from metrics.performance import OnlineMetrics
+from safety.state_machine import SafetyState
+
+# A stop condition has a name, the CHANNELS it reads, reset(horizon, dt) before a run and update(chunk) -> bool
+# after every checked chunk. StopOnLatch is handled inside the simulation loop instead, on the exact sample.
+
+
+class StopOnLatch:
+    '''
+    Stop on the sample the safety state reaches `state`; after Shutdown the rest of the run is filled in closed form
+    '''
+    name = "latch"
+    CHANNELS = ()
+
+    def __init__(self, state = SafetyState.SHUTDOWN):
+        self.state = SafetyState(state)
+
+    def reset(self, horizon, dt):
+        pass
+
+    def update(self, chunk):
+        return False
+
+
+class StopWhenSettled:
+    '''
+    Stop once the response has stayed within tol of the reference for `hold` seconds
+    '''
+    name = "settled"
+    CHANNELS = ("time", "reference", "theta_real")
+
+    def __init__(self, tol = 0.02, hold = 0.2):
+        self.tol = tol
+        self.hold = hold
+
+    def reset(self, horizon, dt):
+        self.metrics = OnlineMetrics(self.tol)
+
+    def update(self, chunk):
+        self.metrics.update(chunk["reference"], chunk["theta_real"], chunk["time"])
+        return self.metrics.last_outside is not None and chunk["time"][-1] - self.metrics.last_outside >= self.hold
+
+
+class StopWhenDecided:
+    '''
+    Stop condition: every requirement verdict already follows from the samples so far, whatever comes after
+    '''
+    name = "decided"
+    CHANNELS = ("time", "reference", "theta_real", "state")
+
+    def __init__(self, requirements):
+        self.requirements = requirements
+
+    def reset(self, horizon, dt):
+        self.metrics = OnlineMetrics()
+        self.horizon = horizon               # samples in the full run, the RMS is taken over all of them
+        self.dt = dt
+        self.latency_index = None            # as in TestRunner.test_run: index into the states after sample 0
+
+    def update(self, chunk):
+        self.metrics.update(chunk["reference"], chunk["theta_real"], chunk["time"])
+        if self.latency_index is None:
+            abnormal = np.flatnonzero((chunk["state"] != SafetyState.NORMAL) & (chunk["time"] > 0))
+            if abnormal.size:
+                self.latency_index = int(round(chunk["time"][abnormal[0]] / self.dt)) - 1
+        return all(v is not None for v in self.verdicts(chunk["time"][-1]).values())
+
+    def verdicts(self, now):                 # True/False once decided, None while the rest of the run could change it
+        req, m = self.requirements, self.metrics
+        rms_bound = np.sqrt(m.mean_square * m.count / self.horizon)    # the remaining samples can only add error
+        if self.latency_index is not None:
+            latency = self.latency_index * self.dt if self.latency_index else np.nan    # same rule as test_run
+            fault_latency = bool(latency <= req.MAX_FAULT_LATENCY)
+        else:
+            fault_latency = False if now > req.MAX_FAULT_LATENCY else None
+
+        return {
+            "Overshoot": False if m.overshoot() > req.MAX_OVERSHOOT else None,
+            "Rms_error": False if rms_bound > req.MAX_RMS_ERROR else None,
+            "Settling_time": False if m.last_outside is not None and m.last_outside > req.MAX_SETTLING_TIME else None,
+            "Fault_latency": fault_latency
+        }
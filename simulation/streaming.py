@@ -0,0 +1,26 @@
+import numpy as np
+from itertools import repeat, islice
+
+
+def constant_reference(value, steps = None):      # setpoint iterator, endless when steps is None
+    return repeat(value) if steps is None else repeat(value, steps)
+
+
+def take(reference, t):                           # the samples run() would have used for a time vector t
+    return islice(reference, len(t))
+
+
+def chunk_time(start, n, dt):                     # time stamps of samples start .. start + n - 1
+    return (np.arange(n) + start) * dt
+
+
+def collect(chunks):
+    '''
+    Concatenating streamed chunks back into full-length channels
+    '''
+    parts = {}
+    for chunk in chunks:
+        for key, value in chunk.items():
+            parts.setdefault(key, []).append(value)
+
+    return {key: np.concatenate(value) for key, value in parts.items()}
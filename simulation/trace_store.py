@@ -0,0 +1,123 @@
+import json
+import os
+import time
+import numpy as np
+
+HEADER = "header.json"
+FORMAT = "columnar-trace-v1"
+
+
+def _json_default(value):                    # numpy scalars and arrays in parameter dicts
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+class TraceWriter:
+    '''
+    Incremental writer for a columnar trace: one raw little-endian file per channel plus a JSON header
+    '''
+    def __init__(self, path, dt, parameters = None, seed = None, metadata = None):
+        self.path = path
+        self.header = {"format": FORMAT, "dt": dt, "length": 0, "channels": {},
+                       "parameters": parameters or {}, "seed": seed, "metadata": metadata or {},
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self.files = {}
+        os.makedirs(path, exist_ok = True)
+        self._write_header()                 # a crashed run still leaves a readable (empty) trace
+
+    def write(self, chunk):                  # one stream() chunk, every channel must have the same length
+        n = None
+        for name, values in chunk.items():
+            values = np.asarray(values)
+            if name not in self.files:
+                if self.header["length"]:
+                    raise ValueError(f"Channel '{name}' appeared after {self.header['length']} samples")
+                dtype = values.dtype.newbyteorder("<")
+                self.header["channels"][name] = {"dtype": dtype.str, "file": f"{name}.bin"}
+                self.files[name] = open(os.path.join(self.path, f"{name}.bin"), 'wb')
+
+            if n is None:
+                n = len(values)
+            elif len(values) != n:
+                raise ValueError(f"Channel '{name}' has {len(values)} samples, expected {n}")
+
+            dtype = np.dtype(self.header["channels"][name]["dtype"])
+            self.files[name].write(np.ascontiguousarray(values, dtype = dtype).tobytes())
+
+        self.header["length"] += n or 0
+
+    def consume(self, chunks):               # write while passing the chunks on to another consumer
+        for chunk in chunks:
+            self.write(chunk)
+            yield chunk
+
+    def flush(self):
+        for f in self.files.values():
+            f.flush()
+        self._write_header()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self._write_header()
+
+    def _write_header(self):
+        temporary = os.path.join(self.path, HEADER + ".tmp")
+        with open(temporary, 'w') as f:
+            json.dump(self.header, f, indent = 2, default = _json_default)
+        os.replace(temporary, os.path.join(self.path, HEADER))    # readers never see a half-written header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class TraceReader:
+    '''
+    Lazy reader for a columnar trace, every channel is a read-only np.memmap opened on first access
+    '''
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER)) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a {FORMAT} trace")
+
+        self.dt = self.header["dt"]
+        self.parameters = self.header["parameters"]
+        self.seed = self.header["seed"]
+        self.channels = tuple(self.header["channels"])
+        self._maps = {}
+
+    def __len__(self):
+        return self.header["length"]
+
+    def __contains__(self, channel):
+        return channel in self.header["channels"]
+
+    def __getitem__(self, channel):          # zero-copy: slicing the memmap only touches the pages it needs
+        if channel not in self._maps:
+            info = self.header["channels"][channel]
+            dtype = np.dtype(info["dtype"])
+            if len(self) == 0:
+                self._maps[channel] = np.zeros(0, dtype = dtype)
+            else:
+                self._maps[channel] = np.memmap(os.path.join(self.path, info["file"]), dtype = dtype,
+                                                mode = 'r', shape = (len(self),))
+        return self._maps[channel]
+
+    def time(self):
+        return self["time"] if "time" in self else np.arange(len(self)) * self.dt
+
+
+def record(chunks, path, dt, **header):
+    '''
+    Writing a complete stream to path and returning a reader for it
+    '''
+    with TraceWriter(path, dt, **header) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return TraceReader(path)
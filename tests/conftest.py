@@ -0,0 +1,21 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def dt():
+    return 0.001
+
+
+@pytest.fixture
+def t(dt):
+    return np.arange(0, 2, dt)
+
+
+@pytest.fixture
+def reference(t):
+    return np.deg2rad(60) * np.ones_like(t)
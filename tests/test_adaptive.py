@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from models.actuator import ActuatorModel
+from models.digital_twin import DigitalTwin
+from control.pid import PIDController
+from diagnostics.fault_detector import FaultDetector
+from diagnostics.fault_injection import FaultInjector
+from safety.state_machine import SafetyState, SafetyStateMachine
+from simulation.adaptive import AdaptiveSimulator
+from simulation.scenario import build_safe_simulator
+
+
+def _adaptive(dt, drift = np.deg2rad(1), thresholds = (np.deg2rad(2), np.deg2rad(5)), rtol = 1e-6):
+    return AdaptiveSimulator(ActuatorModel(0.0035, 0.025, 0.05), DigitalTwin(0.0033, 0.022, 0.047),
+                             PIDController(4, 0.05, 0.2), FaultInjector(drift_rate = drift),
+                             FaultDetector(*thresholds), SafetyStateMachine(), dt, rtol = rtol)
+
+
+def test_fault_latency_falls_inside_the_detecting_sample(dt, t, reference):
+    result = _adaptive(dt).run(reference, t)
+    _, _, states = build_safe_simulator({}, dt, integrator = "zoh").run(reference, t)
+    sampled = (np.argmax(states != SafetyState.NORMAL) + 1) * dt    # states of run() start at sample 1
+    assert sampled - dt < result["fault_latency"] <= sampled
+    assert [e for e in result["events"] if e[1] == "state"][0] == (result["fault_latency"], "state",
+                                                                      SafetyState.DEGRADED)
+
+
+def test_traces_follow_the_sampled_zoh_run(dt, t, reference):
+    result = _adaptive(dt, drift = 0.0, thresholds = (np.inf, np.inf)).run(reference, t)
+    theta_real, theta_twin, states = build_safe_simulator({"drift_rate": 0.0, "pos_threshold": np.inf,
+                                                           "vel_threshold": np.inf}, dt, integrator = "zoh").run(reference, t)
+    assert np.max(np.abs(result["theta_real"] - theta_real)) < 1e-5
+    assert np.max(np.abs(result["theta_twin"] - theta_twin)) < 1e-5
+    assert not result["state"].any() and np.isnan(result["fault_latency"])
+
+
+def test_evaluations_per_sample(dt, t, reference):
+    open_loop = _adaptive(dt, drift = 0.0, thresholds = (np.inf, np.inf), rtol = 1e-5).run(reference, t)
+    assert open_loop["evaluations"] <= 3 * open_loop["steps"] + 1 + 4 * open_loop["rejected"]
+    assert open_loop["steps"] >= len(t) - 1              # the held current changes every sample
+
+    shutdown = _adaptive(dt, rtol = 1e-5).run(reference, t)
+    assert shutdown["state"][-1] == SafetyState.SHUTDOWN
+    assert shutdown["steps"] < open_loop["steps"] / 2    # one step spans many samples after Shutdown
+
+
+def test_held_current_shift_matches_derivatives(dt):
+    simulator = _adaptive(dt)
+    y = (0.3, 2.0, 0.25, 1.5)
+    shifted = simulator.held(simulator.derivatives(y, 0.7), 0.5)
+    assert shifted == pytest.approx(simulator.derivatives(y, 1.2), rel = 1e-14)
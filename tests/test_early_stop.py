@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from simulation.scenario import build_safe_simulator
+from verification.campaign import METRICS, MonteCarloCampaign, tolerance, uniform
+from verification.requirements import Requirements
+from verification.test_runner import TestRunner as Runner
+
+SLOW = {"Kp": 2, "Ki": 5, "Kd": 0, "pos_threshold": np.inf, "vel_threshold": np.inf}    # fails settling early
+
+
+def _run(params, early_stop, dt, t, reference):
+    runner = Runner(Requirements(), build_safe_simulator(params, dt), dt, early_stop = early_stop)
+    results = runner.test_run(reference, t)
+    return runner, results
+
+
+def test_truncated_metrics_are_lower_bounds(dt, t, reference):
+    full_runner, full = _run(SLOW, False, dt, t, reference)
+    runner, early = _run(SLOW, True, dt, t, reference)
+
+    assert runner.truncated and not full_runner.truncated
+    assert len(runner.traces[0]) < len(t)
+    for name in ("overshoot", "rms_error", "settling_time"):
+        assert early[name] <= full[name], name
+    assert runner.verify(early) == full_runner.verify(full)
+
+
+def test_rms_of_truncated_run_uses_the_full_horizon(dt, t, reference):
+    runner, early = _run(SLOW, True, dt, t, reference)
+    theta = runner.traces[0]
+    assert early["rms_error"] == pytest.approx(np.sqrt(np.sum((theta - reference[:len(theta)]) ** 2) / len(t)))
+
+
+def test_nominal_run_is_unchanged(dt, t, reference):
+    full_runner, full = _run({}, False, dt, t, reference)
+    runner, early = _run({}, True, dt, t, reference)
+    assert runner.verify(early) == full_runner.verify(full)
+    if not runner.truncated:
+        assert early == pytest.approx(full, nan_ok = True)
+
+
+def test_campaign_percentiles_skip_truncated_runs():
+    campaign = MonteCarloCampaign(Requirements(), {"J": tolerance(0.05), "Kp": uniform(2, 6)}, 8, nominal = SLOW)
+    campaign.run(workers = 1)
+    full = campaign.records
+    campaign.early_stop = True
+    early = campaign.run(workers = 1)
+
+    truncated = np.array([r["truncated"] for r in campaign.records])
+    assert truncated.any() and not truncated.all()
+    assert not any(r["truncated"] for r in full)
+    for record, full_record in zip(campaign.records, full):
+        for verdict in METRICS:
+            assert record[verdict] == full_record[verdict], verdict
+    for row in early[:-1]:
+        values = np.array([r[METRICS[row["Requirement"]]] for r in campaign.records])[~truncated]
+        values = values[np.isfinite(values)]
+        assert row["P50"] == pytest.approx(np.percentile(values, 50) if values.size else np.nan, nan_ok = True)
+
+
+def test_summary_mask():
+    campaign = MonteCarloCampaign(Requirements(), {}, 4)
+    metrics = {m: np.array([1.0, 2.0, 3.0, 100.0]) for m in METRICS.values()}
+    verdicts = {name: np.array([True, True, True, False]) for name in METRICS}
+    table = campaign.summary(metrics, verdicts, truncated = [False, False, False, True])
+    for row in table[:-1]:
+        assert row["P50"] == 2.0 and row["P95"] <= 3.0
+        assert row["Pass rate"] == 0.75
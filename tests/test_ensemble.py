@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from simulation.ensemble import EnsembleSimulator
+from simulation.scenario import NOMINAL, build_safe_simulator
+
+VARIED = [{}, {"J": 0.004, "Kp": 3}, {"drift_rate": np.deg2rad(5)}, {"pos_threshold": np.inf, "vel_threshold": np.inf},
+          {"b_twin": 0.03, "tau_load": 0.001}]
+
+
+@pytest.mark.parametrize("integrator", ["euler", "zoh"])
+def test_each_member_matches_its_scalar_simulator(dt, t, reference, integrator):
+    scalars = [build_safe_simulator(p, dt, integrator = integrator) for p in VARIED]
+    ensemble = EnsembleSimulator(dt, integrator = integrator,
+                                 **{k: [{**NOMINAL, **p}[k] for p in VARIED] for k in EnsembleSimulator.PARAMETERS})
+    theta_real, theta_twin, states, current = ensemble.run(reference, t)
+
+    assert theta_real.shape == (len(VARIED), len(t))
+    for i, simulator in enumerate(scalars):
+        expected = simulator.kernel().run(reference, t, ("theta_real", "theta_twin", "current", "state"))
+        assert np.array_equal(theta_real[i], expected["theta_real"])
+        assert np.array_equal(theta_twin[i], expected["theta_twin"])
+        assert np.array_equal(current[i][1:], expected["current"][1:])
+        assert np.array_equal(states[i][1:], expected["state"][1:])
+
+
+def test_from_simulators_stacks_parameters(dt):
+    scalars = [build_safe_simulator(p, dt) for p in VARIED]
+    ensemble = EnsembleSimulator.from_simulators(scalars)
+    assert ensemble.n == len(VARIED)
+    assert np.array_equal(ensemble.J, [s.real.J for s in scalars])
+    assert np.array_equal(ensemble.pos_threshold, [s.detector.pos_threshold for s in scalars])
+
+
+def test_reference_per_member(dt, t):
+    ensemble = EnsembleSimulator(dt, **{**NOMINAL, "J": [NOMINAL["J"]] * 2})
+    references = np.deg2rad([[30.0], [60.0]]) * np.ones((2, len(t)))
+    theta_real, *_ = ensemble.run(references, t)
+    single, *_ = EnsembleSimulator(dt, **NOMINAL).run(references[0], t)
+    assert np.array_equal(theta_real[0], single[0])
+    assert not np.array_equal(theta_real[0], theta_real[1])
+
+
+def test_unknown_integrator_is_rejected(dt):
+    with pytest.raises(ValueError, match = "rk4"):
+        EnsembleSimulator(dt, **NOMINAL, integrator = "rk4")
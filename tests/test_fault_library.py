@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from diagnostics.fault_library import (BiasStep, Drift, Dropout, Fault, FaultSet, GaussianNoise, QuantizationNoise,
+                                       StuckAt, TorqueLoss)
+from simulation.scenario import build_safe_simulator
+from simulation.streaming import collect
+
+FAULTS = {
+    Drift: lambda: Drift(0.05, start = 0.3),
+    BiasStep: lambda: BiasStep(0.01, "omega", start = 0.2, stop = 0.4),
+    StuckAt: lambda: StuckAt("theta", start = 0.5, stop = 0.6),
+    Dropout: lambda: Dropout(20, 0.01),                  # dropouts from sample 0 on, shorter spans than their width
+    GaussianNoise: lambda: GaussianNoise(1e-4, "omega"),
+    QuantizationNoise: lambda: QuantizationNoise(1e-3),
+    TorqueLoss: lambda: TorqueLoss(0.3, start = 1.0, ramp = 0.2),
+}
+FIELDS = ("kt_scale", "theta_offset", "theta_hold", "omega_offset", "omega_hold")
+
+
+def test_every_fault_class_is_covered():
+    assert set(FAULTS) == set(Fault.__subclasses__())
+
+
+@pytest.mark.parametrize("fault", FAULTS.values(), ids = [cls.__name__ for cls in FAULTS])
+@pytest.mark.parametrize("chunk_size", [1, 5, 7, 333])
+def test_chunks_render_the_whole_run(dt, fault, chunk_size):
+    n = 2000
+    whole = FaultSet([fault()], seed = 5).signals(n, dt)
+    faults = FaultSet([fault()], seed = 5)
+    chunks = [faults.chunk(first, min(chunk_size, n - first), dt) for first in range(0, n, chunk_size)]
+    for name in FIELDS:
+        assert np.array_equal(np.concatenate([getattr(c, name) for c in chunks]), getattr(whole, name)), name
+
+
+def test_dropouts_start_and_last(dt):
+    hold = FaultSet([Dropout(20, 0.01)], seed = 5).signals(20000, dt).theta_hold
+    starts = np.flatnonzero(hold[1:] & ~hold[:-1]) + 1
+    assert 0 < len(starts) < 20 * 20 * 2
+    runs = np.diff(np.flatnonzero(np.diff(np.concatenate(([0], hold.astype(int), [0])))))[::2]
+    assert runs.min() >= 10
+
+
+def test_simulation_with_every_fault_is_chunk_independent(dt, t, reference):
+    def faults():
+        return FaultSet([make() for make in FAULTS.values()], seed = 11)
+
+    full = build_safe_simulator({}, dt, faults = faults()).kernel().run(reference, t)
+    for chunk_size in (1, 9):
+        data = collect(build_safe_simulator({}, dt, faults = faults()).stream(reference, chunk_size))
+        for name, values in full.items():
+            assert np.array_equal(data[name], values), name
+
+    simulator = build_safe_simulator({}, dt, faults = faults())
+    simulator.reset()
+    ticks = [simulator.step(r) for r in reference[1:]]
+    assert np.array_equal([tick[0] for tick in ticks], full["theta_real"][1:])
+
+
+def test_unknown_channel_is_rejected():
+    with pytest.raises(ValueError, match = "kt"):
+        Drift(0.1, "kt")
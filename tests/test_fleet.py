@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from safety.state_machine import SafetyState
+from simulation.ensemble import EnsembleSimulator
+from simulation.fleet import MultiAxisSystem
+from simulation.scenario import NOMINAL
+
+QUIET = {**NOMINAL, "pos_threshold": np.inf, "vel_threshold": np.inf}    # detector never trips
+FAILING = NOMINAL                            # twin mismatch trips the velocity check early in the run
+
+
+def test_uncoupled_axes_match_the_ensemble(dt, t, reference):
+    axes = {"shoulder": QUIET, "elbow": FAILING, "wrist": {**QUIET, "J": 0.002}}
+    fleet = MultiAxisSystem.from_axes(dt, axes, coupled = False)
+    ensemble = EnsembleSimulator(dt, **{k: [a[k] for a in axes.values()] for k in QUIET})
+
+    for a, b in zip(fleet.run(reference, t), ensemble.run(reference, t)):
+        assert np.array_equal(a, b)
+    assert fleet.names == ["shoulder", "elbow", "wrist"]
+
+
+def test_shutdown_degrades_its_group_only(dt, t, reference):
+    axes = {"a0": FAILING, "a1": QUIET, "b0": QUIET}
+    fleet = MultiAxisSystem.from_axes(dt, axes, groups = [0, 0, 1])
+    _, _, states, current = fleet.run(reference, t)
+
+    down = np.argmax(states[0] == SafetyState.SHUTDOWN)
+    assert down > 0
+    assert np.all(states[1, down:] >= SafetyState.DEGRADED) and np.all(states[1, :down] == SafetyState.NORMAL)
+    assert not states[2].any()
+    assert fleet.group_states().tolist() == [SafetyState.SHUTDOWN, SafetyState.NORMAL]
+    assert np.all(current[0, down + 1:] == 0)
+
+
+def test_axes_need_the_same_keys_and_groups_their_shape(dt):
+    with pytest.raises(ValueError, match = "Axis 'b' is missing parameters \\['Kd'\\]"):
+        MultiAxisSystem.from_axes(dt, {"a": QUIET, "b": {k: v for k, v in QUIET.items() if k != "Kd"}})
+    with pytest.raises(ValueError, match = "one entry per axis"):
+        MultiAxisSystem.from_axes(dt, {"a": QUIET, "b": QUIET}, groups = [0])
@@ -0,0 +1,64 @@
+import csv
+import numpy as np
+import pytest
+
+from risk.fmea import FMEA, detection_score, occurrence_score
+from simulation.scenario import build_safe_simulator
+from verification.injection import InjectionSweep
+
+ROWS = [("Position sensor", "Drift", 8, 4, 3), ("Actuator", "Torque loss", 7, 2, 3),
+        ("Controller", "Integral windup", 9, 2, 4), ("Position sensor", "Dropout", 6, 5, 2)]
+
+
+@pytest.fixture
+def fmea():
+    table = FMEA()
+    for row in ROWS:
+        table.add_records(*row)
+    return table
+
+
+def test_ranking_top_and_filter(fmea):
+    report = fmea.fmea_report()
+    assert [r["RPN"] for r in report] == [96, 72, 60, 42]
+    for k in range(len(ROWS) + 2):
+        assert fmea.top(k) == report[:k]
+    assert [r["Failure mode"] for r in fmea.filter("Position sensor")] == ["Drift", "Dropout"]
+    assert fmea.top(1, "Position sensor") == fmea.filter("Position sensor")[:1]
+
+
+def test_csv_round_trip(fmea, tmp_path):
+    path = tmp_path / "fmea.csv"
+    with open(path, 'w', newline = '') as f:
+        writer = csv.DictWriter(f, fieldnames = fmea.fmea_report()[0].keys())
+        writer.writeheader()
+        writer.writerows(fmea.fmea_report())
+    copy = FMEA()
+    copy.import_csv(path)
+    assert copy.fmea_report() == fmea.fmea_report()
+
+
+def test_set_scores_updates_the_ranking(fmea):
+    fmea.set_scores("Actuator", "Torque loss", 7, 10, 3)
+    assert len(fmea) == len(ROWS)
+    assert fmea.fmea_report()[0]["RPN"] == 210
+
+
+def test_scores():
+    assert occurrence_score(0.0) == 1 and occurrence_score(1.0) == 10
+    assert detection_score([0.01, 0.02], limit = 0.1) == 1
+    assert detection_score([np.nan, np.nan], limit = 0.1) == 10
+    assert detection_score([], limit = 0.1) == 10
+
+
+def test_from_injection_scores_relative_to_the_nominal_run(dt, t, reference):
+    faults = {"none": {"detector.pos_threshold": np.deg2rad(2)}, "threshold": {"detector.pos_threshold": np.deg2rad(0.5)}}
+    sweep = InjectionSweep(build_safe_simulator({}, dt), faults, [0.2, 0.5], dt)
+    records = sweep.run(reference, t)
+
+    fmea = FMEA()
+    fmea.from_injection(records, {"none": ("Detector", "No fault", 5), "threshold": ("Detector", "Low threshold", 5)})
+    rows = {r["Failure mode"]: r for r in fmea.fmea_report()}
+    assert rows["No fault"]["Occurrence"] == 1 and rows["No fault"]["Detection"] == 10
+    assert rows["Low threshold"]["Occurrence"] == 10    # the 0.2 s branch escalates, the 0.5 s one is past Shutdown
+    assert rows["Low threshold"]["Detection"] == 1
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from models.actuator import ActuatorModel
+from models.digital_twin import DigitalTwin
+from models.identification import RecursiveIdentifier, identify
+from simulation.scenario import build_safe_simulator
+
+TRUE = {"J": 0.0035, "b": 0.025, "Kt": 0.05, "tau_load": 0.001}
+
+
+def _log(dt, integrator, n = 3000):
+    actuator = ActuatorModel(**TRUE, integrator = integrator)
+    current = np.random.default_rng(0).normal(0, 1, n)
+    current[0] = 0.0
+    theta, omega = np.zeros(n), np.zeros(n)
+    for k in range(1, n):
+        theta[k], omega[k] = actuator.step(current[k], dt)
+    return current, theta, omega
+
+
+@pytest.mark.parametrize("integrator", ["euler", "zoh"])
+@pytest.mark.parametrize("known", ["Kt", "J"])
+def test_batch_estimate_recovers_the_plant(dt, integrator, known):
+    current, _, omega = _log(dt, integrator)
+    params = identify(current, omega, dt, integrator = integrator, **{known: TRUE[known]})
+    for name, value in TRUE.items():
+        assert params[name] == pytest.approx(value, rel = 1e-6), name
+    assert params["residual_rms"] < 1e-9
+
+
+def test_velocity_from_angle(dt):
+    current, theta, _ = _log(dt, "euler")
+    params = identify(current, dt = dt, Kt = TRUE["Kt"], theta = theta)
+    assert params["J"] == pytest.approx(TRUE["J"], rel = 1e-6)
+    with pytest.raises(ValueError, match = "omega"):
+        identify(current, dt = dt, Kt = TRUE["Kt"], theta = theta, integrator = "zoh")
+
+
+def test_exactly_one_scale_is_required(dt):
+    with pytest.raises(ValueError, match = "Exactly one"):
+        identify(np.zeros(10), np.zeros(10), dt)
+    with pytest.raises(ValueError, match = "Exactly one"):
+        RecursiveIdentifier(dt, Kt = 0.05, J = 0.0035)
+
+
+def test_recursive_estimate_matches_the_batch_one(dt):
+    current, _, omega = _log(dt, "euler")
+    identifier = RecursiveIdentifier(dt, Kt = TRUE["Kt"])
+    for k in range(1, len(omega)):
+        identifier.update(omega[k - 1], current[k], omega[k])
+    batch = identify(current, omega, dt, Kt = TRUE["Kt"])
+    for name in TRUE:
+        assert identifier.parameters()[name] == pytest.approx(batch[name], rel = 1e-4), name
+
+
+def test_consume_calibrates_the_twin(dt, reference):
+    twin = DigitalTwin(0.003, 0.02, 0.05)
+    identifier = RecursiveIdentifier(dt, Kt = 0.05, twin = twin, calibrate_every = 500)
+    identifier.consume(build_safe_simulator({"pos_threshold": np.inf, "vel_threshold": np.inf}, dt).stream(reference, 300))
+    assert identifier.is_physical()
+    assert twin.J == pytest.approx(0.0035, rel = 1e-3) and twin.b == pytest.approx(0.025, rel = 1e-3)
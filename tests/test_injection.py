@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from safety.state_machine import SafetyState
+from simulation.scenario import build_safe_simulator
+from verification.injection import InjectionSweep
+
+FAULTS = {"none": {"detector.pos_threshold": np.deg2rad(2)},           # the nominal value, a fault-free branch
+          "threshold": {"detector.pos_threshold": np.deg2rad(0.5)},
+          "torque": {"real.Kt": 0.02}}
+
+
+@pytest.fixture
+def sweep(dt, t, reference):
+    sweep = InjectionSweep(build_safe_simulator({}, dt), FAULTS, [0.2, 0.5, 1.0, 1.5], dt)
+    sweep.run(reference, t, keep_traces = True)
+    return sweep
+
+
+def test_latency_is_measured_against_the_nominal_run(sweep):
+    records = {(r["fault"], r["injection_time"]): r for r in sweep.records}
+    assert len(records) == 12
+    for (name, time), record in records.items():
+        trace = sweep.traces[(name, int(round(time / 0.001)))]
+        worse = trace["state"] > sweep.nominal["state"]
+        assert record["escalated"] == worse.any()
+        if record["escalated"]:
+            assert record["detection_latency"] == pytest.approx(np.argmax(worse) * 0.001 - time)
+        else:
+            assert np.isnan(record["detection_latency"])
+    assert not any(r["escalated"] for r in sweep.records if r["fault"] == "none")
+    assert records[("threshold", 0.2)]["escalated"] and records[("torque", 0.2)]["escalated"]
+
+
+def test_branches_share_the_nominal_prefix(sweep):
+    for (name, k), trace in sweep.traces.items():
+        for channel, values in trace.items():
+            assert len(values) == len(sweep.nominal[channel])
+            assert np.array_equal(values[:k], sweep.nominal[channel][:k]), channel
+        if name == "none":
+            assert np.array_equal(trace["state"], sweep.nominal["state"])
+
+
+def test_branch_matches_a_full_run_with_the_fault(dt, t, reference, sweep):
+    k = 200
+    simulator = build_safe_simulator({}, dt)
+    kernel = simulator.kernel()
+    head = kernel.run(reference[:k], t[:k], ("state",))
+    kernel.detector.pos_threshold = np.deg2rad(0.5)
+    tail = list(kernel.stream(reference[k:], len(t), ("state",), resume = True))
+    assert np.array_equal(np.concatenate((head["state"], tail[0]["state"])), sweep.traces[("threshold", k)]["state"])
+
+
+def test_shutdown_tails_are_not_stepped(sweep):
+    savings = sweep.savings()
+    assert savings["branches"] == 12
+    assert savings["ratio"] < 0.5
+    assert all(r["final_state"] == SafetyState.SHUTDOWN for r in sweep.records if r["escalated"])
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from models.actuator import ActuatorModel
+from models.discretization import integration_error
+from control.pid import PIDController
+from simulation.simulator_phase1 import Simulator
+
+J, B, KT, TAU = 0.0035, 0.025, 0.05, 0.001
+
+
+def exact(current, t):                       # step response of J*domega = Kt*i - b*omega - tau_load from rest
+    final = (KT * current - TAU) / B
+    decay = np.exp(-B * t / J)
+    return final * (t - J / B * (1 - decay)), final * (1 - decay)
+
+
+@pytest.mark.parametrize("dt", [0.001, 0.01, 0.05])
+def test_zoh_is_exact_for_held_current(dt):
+    actuator = ActuatorModel(J, B, KT, TAU, integrator = "zoh")
+    for _ in range(200):
+        theta, omega = actuator.step(2.0, dt)
+
+    theta_exact, omega_exact = exact(2.0, 200 * dt)
+    assert theta == pytest.approx(theta_exact, rel = 1e-10)
+    assert omega == pytest.approx(omega_exact, rel = 1e-10)
+
+
+def test_euler_error_is_first_order():
+    errors = []
+    for dt in (0.004, 0.002, 0.001):
+        actuator = ActuatorModel(J, B, KT, TAU)
+        for _ in range(int(round(0.4 / dt))):
+            theta, _ = actuator.step(2.0, dt)
+        errors.append(abs(theta - exact(2.0, 0.4)[0]))
+
+    assert errors[0] / errors[1] == pytest.approx(2, rel = 0.05)
+    assert errors[1] / errors[2] == pytest.approx(2, rel = 0.05)
+
+
+def test_integration_error_compares_euler_with_zoh():
+    actuator = ActuatorModel(J, B, KT, TAU)
+    coarse = integration_error(actuator, np.full(500, 2.0), 0.01)
+    fine = integration_error(actuator, np.full(5000, 2.0), 0.001)
+    assert coarse["theta_max_error"] > fine["theta_max_error"] > 0
+
+
+def test_closed_loop_integrators_agree_at_small_steps():
+    t = np.arange(0, 2, 0.0005)
+    reference = np.deg2rad(60) * np.ones_like(t)
+    runs = {integrator: Simulator(ActuatorModel(J, B, KT, integrator = integrator), PIDController(4, 0.05, 0.2),
+                                  0.0005).run(reference, t)[0]
+            for integrator in ActuatorModel.INTEGRATORS}
+    assert np.max(np.abs(runs["euler"] - runs["zoh"])) < np.deg2rad(1)
+
+
+def test_unknown_integrator_is_rejected():
+    with pytest.raises(ValueError, match = "rk4"):
+        ActuatorModel(J, B, KT, integrator = "rk4")
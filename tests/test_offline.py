@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from diagnostics.fault_detector import FaultDetector
+from diagnostics.offline import detection_tradeoff, first_index, replay
+from safety.state_machine import SafetyStateMachine
+from simulation.scenario import build_safe_simulator
+
+
+def test_replay_matches_the_closed_loop_states(dt, t, reference):
+    kernel = build_safe_simulator({}, dt).kernel()
+    data = kernel.run(reference, t, ("theta_real", "omega_real", "theta_twin", "omega_twin", "fault", "state"))
+    pos_res, vel_res = data["theta_real"] - data["theta_twin"], data["omega_real"] - data["omega_twin"]
+
+    faults, states = replay(pos_res[1:], vel_res[1:], [np.deg2rad(2)], [np.deg2rad(5)])
+    assert np.array_equal(faults[0], data["fault"][1:])
+    assert np.array_equal(states[0], data["state"][1:])
+
+
+def test_replay_sweeps_thresholds_per_sample():
+    rng = np.random.default_rng(1)
+    pos_res, vel_res = rng.normal(0, 0.02, 500), rng.normal(0, 0.05, 500)
+    pos_thresholds, vel_thresholds = [0.01, 0.04, 0.1], [0.05, 0.1, 0.3]
+    faults, states = replay(pos_res, vel_res, pos_thresholds, vel_thresholds)
+
+    assert faults.shape == states.shape == (3, 500)
+    for k, (p, v) in enumerate(zip(pos_thresholds, vel_thresholds)):
+        detector, machine = FaultDetector(p, v), SafetyStateMachine()
+        codes = [detector.detect(a, b) for a, b in zip(pos_res.tolist(), vel_res.tolist())]
+        assert np.array_equal(faults[k], codes)
+        assert np.array_equal(states[k], [machine.check(c) for c in codes])
+
+
+def test_first_index():
+    mask = np.array([[False, True, True], [False, False, False], [True, False, True]])
+    assert first_index(mask).tolist() == [1, -1, 0]
+    assert first_index(mask, axis = 0).tolist() == [2, 0, 0]
+
+
+def test_detection_tradeoff_counts():
+    pos_res = np.zeros((4, 100))
+    pos_res[0, 10] = 1.0                             # false alarm before the onset at 50
+    pos_res[1, 60:] = 1.0                            # detected 10 samples late
+    pos_res[2, 50:] = 1.0                            # detected at once; run 3 is missed
+    row, = detection_tradeoff({"threshold": FaultDetector(0.5, np.inf)}, pos_res, np.zeros_like(pos_res), 50, 0.01)
+
+    assert row["False alarm rate"] == 0.25
+    assert row["Missed rate"] == 0.5                 # run 0 alarms early but never after the onset
+    assert row["Mean latency"] == pytest.approx(0.05)
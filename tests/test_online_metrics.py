@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from metrics.performance import OnlineMetrics, PerformanceMetrics
+from simulation.scenario import build_safe_simulator
+
+
+def _batch(reference, theta, t):
+    return (PerformanceMetrics.overshoot(reference, theta), PerformanceMetrics.rms(reference, theta),
+            PerformanceMetrics.settling(reference, theta, t))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 250, 5000])
+def test_chunks_match_the_batch_metrics(dt, t, reference, chunk_size):
+    theta, _, _ = build_safe_simulator({}, dt).run(reference, t)
+    metrics = OnlineMetrics()
+    for start in range(0, len(t), chunk_size):
+        part = slice(start, start + chunk_size)
+        metrics.update(reference[part], theta[part], t[part])
+
+    overshoot, rms, settling = _batch(reference, theta, t)
+    assert metrics.overshoot() == overshoot
+    assert metrics.rms() == pytest.approx(rms, rel = 1e-12)
+    assert metrics.settling() == settling
+
+
+def test_samples_match_chunks(dt, t, reference):
+    theta, _, _ = build_safe_simulator({}, dt).run(reference, t)
+    one, chunked = OnlineMetrics(), OnlineMetrics()
+    for r, x, ti in zip(reference.tolist(), theta.tolist(), t.tolist()):
+        one.add(r, x, ti)
+    chunked.update(reference, theta, t)
+    assert (one.overshoot(), one.settling()) == (chunked.overshoot(), chunked.settling())
+    assert one.rms() == pytest.approx(chunked.rms(), rel = 1e-12)
+
+
+def test_consume_a_stream(dt, t, reference):
+    metrics = OnlineMetrics().consume(build_safe_simulator({}, dt).stream(reference, 300))
+    theta, _, _ = build_safe_simulator({}, dt).run(reference, t)
+    assert metrics.count == len(t)
+    assert metrics.overshoot() == PerformanceMetrics.overshoot(reference, theta)
+
+
+def test_never_outside_settles_at_the_start():
+    metrics = OnlineMetrics()
+    metrics.update(np.ones(5), np.ones(5), np.arange(5) * 0.1 + 1.0)
+    assert metrics.settling() == 1.0 and metrics.rms() == 0.0
+    metrics.update(np.ones(0), np.ones(0), np.ones(0))
+    assert metrics.count == 5
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import numpy as np
+import pytest
+
+from control.pid import PIDController
+from simulation import plant_server
+from simulation.plant_server import ControllerClient, PlantServer, ShmRing, open_channel
+from simulation.scenario import build_safe_simulator
+
+needs_shm = pytest.mark.skipif(plant_server.shared_memory is None, reason = "no multiprocessing.shared_memory")
+
+
+def _client(name, transport, path, cycles):           # controller process
+    cycles.put(ControllerClient(PIDController(4, 0.05, 0.2), name, transport, path).run(idle_timeout = 5.0))
+
+
+@needs_shm
+def test_ring_is_first_in_first_out_and_bounded():
+    ring = ShmRing(f"ring_test_{os.getpid()}", 2, capacity = 4, create = True)
+    try:
+        assert ring.get() is None
+        assert all(ring.put((k, -k)) for k in range(4))
+        assert not ring.put((4, -4))                     # full until the consumer catches up
+        assert ring.get() == (0.0, 0.0)
+        assert ring.put((4, -4))
+        assert [ring.get() for _ in range(5)] == [(1, -1), (2, -2), (3, -3), (4, -4), None]
+    finally:
+        ring.close()
+
+
+@pytest.mark.parametrize("transport", [pytest.param("shm", marks = needs_shm), "socket"])
+def test_remote_controller_matches_the_local_loop(dt, t, reference, tmp_path, transport):
+    reference, t = reference[:300], t[:300]
+    name = f"plant_test_{os.getpid()}_{transport}"
+    path = str(tmp_path / "plant.sock")
+    # generous reply deadline and catch_up: every cycle is answered, however the processes are scheduled
+    server = PlantServer(build_safe_simulator({}, dt), name, transport, path, timeout = 1.0,
+                         overrun_policy = "catch_up")
+    context = multiprocessing.get_context("fork")
+    cycles = context.Queue()
+    client = context.Process(target = _client, args = (name, transport, path, cycles))
+    client.start()
+    try:
+        server.start(timeout = 5.0)
+        theta_real, _, states = server.run(reference)
+    finally:
+        server.close()
+        client.join(10.0)
+
+    expected = build_safe_simulator({}, dt).run(reference, t)
+    assert np.array_equal(theta_real[1:], expected[0][1:])
+    assert np.array_equal(states[1:], expected[2])
+    report = server.report()
+    assert client.exitcode == 0
+    assert report["cycles"] == cycles.get(timeout = 5.0) == len(t) - 1
+    assert report["missed_cycles"] == report["dropped_sends"] == 0
+    assert 0 < report["mean_round_trip"] <= report["max_round_trip"] < 1.0
+
+
+def test_unknown_transport_is_rejected():
+    with pytest.raises(ValueError, match = "Unknown transport 'pipe'"):
+        open_channel("actuator", True, "pipe")
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from simulation.plotting import FIGURES, downsample, lttb, minmax, prepare, render_runs, transitions
+
+
+def test_minmax_keeps_every_spike_and_both_ends():
+    y = np.sin(np.linspace(0, 20, 100_000))
+    y[12_345], y[67_890] = 5.0, -5.0
+    index = minmax(y, 500)
+
+    assert len(index) <= 1002 and np.all(np.diff(index) > 0)
+    assert {0, 12_345, 67_890, len(y) - 1} <= set(index)
+    assert y[index].max() == y.max() and y[index].min() == y.min()
+    assert np.array_equal(minmax(y[:50], 500), np.arange(50))    # short traces pass through
+
+
+def test_lttb_picks_one_sample_per_bucket():
+    x = np.linspace(0, 1, 10_000)
+    y = np.where(x > 0.5, 1.0, 0.0) + 0.01 * np.sin(200 * x)
+    index = lttb(x, y, 200)
+
+    assert index[0] == 0 and index[-1] == len(y) - 1
+    assert 150 < len(index) <= 200 and np.all(np.diff(index) > 0)
+    assert y[index].max() > 0.99 and y[index].min() < 0.01     # both levels of the step survive
+
+
+def test_downsample_keeps_requested_indices(t):
+    y = np.cos(t)
+    for method in ("minmax", "lttb"):
+        t_small, y_small = downsample(t, y, 100, method, keep = [3, 1234, len(t) + 5])
+        assert len(t_small) <= 110
+        assert {t[3], t[1234]} <= set(t_small)
+        assert np.array_equal(y_small, np.cos(t_small))
+    with pytest.raises(ValueError, match = "Unknown method 'mean'"):
+        downsample(t, y, method = "mean")
+
+
+def _run(t, reference):
+    states = np.zeros(len(t) - 1, dtype = np.uint8)          # one sample shorter, as SafeSimulator.run returns it
+    states[700:], states[1500:] = 1, 2
+    theta = reference * (1 - np.exp(-t / 0.1))
+    return {"name": "drift", "t": t, "reference": reference, "theta_real": theta, "theta_twin": 0.99 * theta,
+            "states": states, "current": np.ones(len(t) - 1)}
+
+
+def test_prepare_keeps_the_samples_around_state_changes(t, reference):
+    series = prepare(_run(t, reference), points = 50)
+
+    assert np.array_equal(transitions(_run(t, reference)["states"]), [700, 1500])
+    assert np.array_equal(series["transitions"], t[[701, 1501]])
+    state_t, state = series["states"]
+    assert {t[700], t[701], t[702], t[1501]} <= set(state_t)
+    assert state[np.searchsorted(state_t, t[701])] == 1 and state[np.searchsorted(state_t, t[700])] == 0
+    assert len(series["theta_real"][0]) < 100
+    assert series["residual"][1] == pytest.approx(np.rad2deg(0.01 * _run(t, reference)["theta_real"])[
+        np.searchsorted(t, series["residual"][0])])
+
+
+def test_render_runs_writes_every_figure_a_run_has_series_for(tmp_path, t, reference):
+    pytest.importorskip("matplotlib")
+    tracking_only = {"name": "plain", "t": t, "theta_real": reference}
+    paths = render_runs([_run(t, reference), tracking_only], tmp_path / "plots", points = 200, workers = 1)
+
+    expected = [f"drift_{figure}.png" for figure in FIGURES] + ["plain_tracking.png"]
+    assert sorted(p.rsplit("/", 1)[-1] for p in map(str, paths)) == sorted(expected)
+    assert all((tmp_path / "plots" / name).stat().st_size > 0 for name in expected)
+
+
+def test_unknown_figures_are_rejected_before_rendering(tmp_path, t, reference):
+    with pytest.raises(ValueError, match = "Unknown figures \\['phase'\\]"):
+        render_runs([{"name": "plain", "t": t, "theta_real": reference}], tmp_path, figures = ["tracking", "phase"])
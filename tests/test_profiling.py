@@ -0,0 +1,54 @@
+import json
+import numpy as np
+import pytest
+
+from simulation.profiling import StageProfiler
+from simulation.ensemble import EnsembleSimulator
+from simulation.scenario import NOMINAL, build_safe_simulator
+
+
+def test_profiled_run_is_unchanged_and_counted(dt, t, reference):
+    expected = build_safe_simulator({}, dt).run(reference, t)
+    simulator = build_safe_simulator({}, dt)
+    steps = []
+    with StageProfiler(simulator) as profiler:
+        profiler.add_hook(lambda step, outputs: steps.append((step, outputs["safety"])))
+        result = simulator.run(reference, t)
+    assert simulator.profiler is None
+
+    for a, b in zip(result, expected):
+        assert np.array_equal(a, b)
+    assert set(profiler.calls.values()) == {len(t) - 1}
+    assert profiler.steps == len(steps) == len(t) - 1
+    assert [s for _, s in steps] == expected[2].tolist()
+
+    rows = {row["Stage"]: row for row in profiler.summary()}
+    assert set(rows) == {"controller", "plant", "twin", "injector", "detector", "safety", "bookkeeping"}
+    assert sum(row["Total (s)"] for row in rows.values()) == pytest.approx(profiler.wall)
+
+
+def test_ticks_are_profiled(dt, reference):
+    simulator = build_safe_simulator({}, dt)
+    with StageProfiler(simulator) as profiler:
+        simulator.reset()                    # the tick kernel picks up the active profiler
+        for r in reference[:100]:
+            simulator.step(r)
+    assert profiler.calls["plant"] == profiler.steps == 100
+
+
+def test_exports(dt, t, reference, tmp_path):
+    simulator = build_safe_simulator({}, dt)
+    with StageProfiler(simulator, max_events = 50) as profiler:
+        simulator.run(reference, t)
+    profiler.to_json(tmp_path / "stages.json")
+    profiler.to_chrome_trace(tmp_path / "trace.json")
+
+    assert json.loads((tmp_path / "stages.json").read_text())["steps"] == len(t) - 1
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len(events) == 50 and all(e["dur"] >= 0 for e in events)
+    assert "bookkeeping" in profiler.format_summary()
+
+
+def test_simulators_without_kernel_are_rejected(dt):
+    with pytest.raises(TypeError, match = "EnsembleSimulator"):
+        StageProfiler(EnsembleSimulator(dt, **NOMINAL))
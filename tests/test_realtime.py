@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from safety.state_machine import SafetyState
+from simulation.realtime import RealTimeRunner
+from simulation.scenario import build_safe_simulator
+
+
+class FakeClock:
+    '''
+    Monotonic time that only moves when read, slept on or charged for a tick
+    '''
+    def __init__(self, resolution = 1e-6):
+        self.now = 0.0
+        self.resolution = resolution
+
+    def clock(self):
+        self.now += self.resolution
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _runner(dt, policy, cost):
+    '''
+    RealTimeRunner on a fake clock; cost(k) is the time the k-th executed tick takes
+    '''
+    simulator = build_safe_simulator({}, dt)
+    clock, step, ticks = FakeClock(), simulator.step, []
+
+    def timed_step(reference):
+        clock.now += cost(len(ticks))
+        ticks.append(reference)
+        return step(reference)
+
+    simulator.step = timed_step
+    return RealTimeRunner(simulator, policy, clock = clock.clock, sleep = clock.sleep), simulator
+
+
+def test_catch_up_executes_every_tick(dt, t, reference):
+    runner, _ = _runner(dt, "catch_up", lambda k: 3 * dt if k % 50 == 0 else dt / 10)
+    theta_real, theta_twin, states = runner.run(reference)
+    expected = build_safe_simulator({}, dt).run(reference, t)
+
+    assert np.array_equal(theta_real[1:], expected[0][1:])
+    assert np.array_equal(theta_twin[1:], expected[1][1:])
+    assert np.array_equal(states[1:], expected[2])
+    report = runner.report()
+    assert report["skipped"] == 0 and report["overruns"] > 0
+    assert report["wcet"] == pytest.approx(3 * dt, rel = 0.01)
+
+
+def test_skipped_ticks_hold_the_last_state(dt, reference):
+    runner, simulator = _runner(dt, "skip", lambda k: 2.5 * dt if k % 3 == 0 else dt / 10)
+    theta_real, _, states = runner.run(reference)
+
+    skipped = np.isnan(theta_real)
+    skipped[0] = False
+    assert skipped.any() and runner.report()["skipped"] == skipped.sum()
+    for k in np.flatnonzero(skipped):
+        assert states[k] == states[k - 1]
+    assert np.all(np.diff(states) >= 0)                  # states only latch upwards
+    assert states[-1] == simulator.safety.state == SafetyState.SHUTDOWN
+
+
+def test_degrade_forces_current_limiting(dt, reference):
+    runner, _ = _runner(dt, "degrade", lambda k: 2 * dt if k == 10 else dt / 10)
+    _, _, states = runner.run(reference[:100])
+    assert runner.overrun[11]
+    assert np.all(states[12:] >= SafetyState.DEGRADED)
+
+
+def test_unknown_policy_is_rejected(dt):
+    with pytest.raises(ValueError, match = "drop"):
+        RealTimeRunner(build_safe_simulator({}, dt), "drop")
@@ -0,0 +1,70 @@
+import os
+import numpy as np
+import pytest
+
+from simulation.scenario import build_safe_simulator
+from verification.requirements import Requirements
+from verification.result_cache import ResultCache
+from verification.test_runner import TestRunner as Runner
+
+
+def _runner(cache, dt, params = None, early_stop = False):
+    return Runner(Requirements(), build_safe_simulator(params or {}, dt), dt, early_stop = early_stop,
+                      cache = cache)
+
+
+@pytest.mark.parametrize("early_stop", [False, True])
+def test_hit_returns_what_the_run_returned(tmp_path, dt, t, reference, early_stop):
+    uncached = _runner(None, dt, early_stop = early_stop)
+    expected = uncached.test_run(reference, t)
+
+    cache = ResultCache(str(tmp_path))
+    miss, hit = _runner(cache, dt, early_stop = early_stop), _runner(cache, dt, early_stop = early_stop)
+    for runner in (miss, hit):
+        results = runner.test_run(reference, t)
+        assert results.keys() == expected.keys()
+        for name, value in expected.items():
+            assert results[name] == pytest.approx(value, nan_ok = True), name
+        assert runner.truncated == uncached.truncated
+        for trace, full in zip(runner.traces, uncached.traces):
+            assert np.array_equal(trace, full)
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_reused_simulator_hits(tmp_path, dt, t, reference):
+    cache = ResultCache(str(tmp_path))
+    runner = _runner(cache, dt)
+    first = runner.test_run(reference, t)
+    second = runner.test_run(reference, t)    # the simulator ran once already, its reset state is unchanged
+    assert first == second
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_configuration_changes_miss(tmp_path, dt, t, reference):
+    cache = ResultCache(str(tmp_path))
+    _runner(cache, dt).test_run(reference, t)
+    _runner(cache, dt, {"Kp": 3}).test_run(reference, t)
+    _runner(cache, dt).test_run(reference[:1000], t[:1000])
+    _runner(cache, dt, early_stop = True).test_run(reference, t)
+    assert (cache.misses, cache.hits) == (4, 0)
+
+
+def test_running_total_matches_size_and_evicts(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    traces = (np.zeros(1000), np.ones(1000), np.zeros(1000, dtype = int))
+    for i in range(3):
+        cache.put(f"entry{i}", {"rms_error": float(i)}, traces)
+        assert cache.total == cache.size()
+    cache.put("entry0", {"rms_error": 0.5}, traces)    # replacing an entry does not grow the total
+    assert cache.total == cache.size()
+
+    entry = cache.size() // 3
+    for i, name in enumerate(("entry1", "entry2", "entry0")):    # oldest first
+        os.utime(os.path.join(str(tmp_path), f"{name}.npz"), (i, i))
+    cache.max_bytes = 2 * entry
+    cache.put("entry3", {"rms_error": 3.0}, traces)
+    assert cache.total == cache.size() <= cache.max_bytes
+    assert cache.get("entry1") is None and cache.get("entry3") is not None
+
+    cache.clear()
+    assert cache.total == cache.size() == 0
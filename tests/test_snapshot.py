@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from diagnostics.fault_library import Drift, FaultSet, GaussianNoise, StuckAt
+from diagnostics.streaming_detectors import CusumDetector, EwmaDetector, WindowDetector
+from simulation.kernel import Snapshot
+from simulation.scenario import build_safe_simulator
+from simulation.streaming import collect
+
+CHANNELS = ("theta_real", "omega_real", "theta_twin", "current", "fault", "state")
+
+
+def _simulator(dt, detector = None):
+    faults = FaultSet([GaussianNoise(1e-4), Drift(0.05, start = 0.3), StuckAt("theta", start = 0.5, stop = 0.6)],
+                      seed = 3)
+    simulator = build_safe_simulator({}, dt, faults = faults)
+    if detector is not None:
+        simulator.detector = detector
+    return simulator
+
+
+@pytest.mark.parametrize("split", [1, 450, 1999])
+def test_restore_continues_bit_exactly(dt, t, reference, split):
+    full = _simulator(dt).kernel().run(reference, t, CHANNELS)
+
+    kernel = _simulator(dt).kernel()
+    head = collect(kernel.stream(reference[:split], split, CHANNELS))
+    snapshot = kernel.snapshot()
+    collect(kernel.stream(reference[split:], 100, CHANNELS, resume = True))    # moves every state on
+
+    kernel.restore(snapshot)
+    tail = collect(kernel.stream(reference[split:], 100, CHANNELS, resume = True))
+    for name in CHANNELS:
+        assert np.array_equal(np.concatenate((head[name], tail[name])), full[name]), name
+
+
+@pytest.mark.parametrize("detector", [lambda: WindowDetector(np.deg2rad(2), np.deg2rad(5), 20),
+                                      lambda: CusumDetector(np.deg2rad(2), np.deg2rad(5), 1e-4, 1e-3),
+                                      lambda: EwmaDetector(np.deg2rad(2), np.deg2rad(5), 0.1)])
+def test_stateful_detector_round_trip(dt, reference, detector):
+    kernel = _simulator(dt, detector()).kernel()
+    collect(kernel.stream(reference[:700], 700, CHANNELS))
+    snapshot = kernel.snapshot()
+    assert snapshot.detector is not None
+
+    first = collect(kernel.stream(reference[700:], 300, CHANNELS, resume = True))
+    kernel.restore(snapshot)
+    second = collect(kernel.stream(reference[700:], 300, CHANNELS, resume = True))
+    for name in CHANNELS:
+        assert np.array_equal(first[name], second[name]), name
+
+
+def test_snapshot_fields(dt, reference):
+    kernel = _simulator(dt).kernel()
+    collect(kernel.stream(reference[:100], 100))
+    snapshot = kernel.snapshot()
+
+    assert snapshot.index == 100
+    assert len(snapshot.values) == len(Snapshot.FIELDS)
+    assert snapshot["theta_real"] == kernel.real.theta
+    assert snapshot["bias"] == kernel.injector.bias
+    assert snapshot["state"] == kernel.safety.state
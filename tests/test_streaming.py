@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from models.actuator import ActuatorModel
+from models.digital_twin import DigitalTwin
+from control.pid import PIDController
+from diagnostics.fault_detector import FaultCode
+from diagnostics.fault_library import Drift, FaultSet, GaussianNoise, StuckAt, TorqueLoss
+from safety.state_machine import SafetyState
+from simulation.scenario import build_safe_simulator
+from simulation.simulator_phase1 import Simulator
+from simulation.simulator_phase2 import DualSimulator
+from simulation.streaming import collect
+
+
+def _faults():
+    return FaultSet([GaussianNoise(1e-4), Drift(0.05, start = 0.3), StuckAt("omega", start = 0.8, stop = 0.9),
+                     TorqueLoss(0.3, start = 1.0, ramp = 0.2)], seed = 7)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 5000])
+def test_safe_stream_matches_run(dt, t, reference, chunk_size):
+    theta_real, theta_twin, states = build_safe_simulator({}, dt).run(reference, t)
+    data = collect(build_safe_simulator({}, dt).stream(reference, chunk_size))
+
+    assert np.array_equal(data["time"], t)
+    assert np.array_equal(data["theta_real"], theta_real)
+    assert np.array_equal(data["theta_twin"], theta_twin)
+    assert np.array_equal(data["state"][1:], states)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 333, 5000])
+def test_fault_set_stream_matches_run(dt, t, reference, chunk_size):
+    full = build_safe_simulator({}, dt, faults = _faults()).kernel().run(reference, t)
+    data = collect(build_safe_simulator({}, dt, faults = _faults()).stream(reference, chunk_size))
+
+    for name, values in full.items():
+        assert np.array_equal(data[name], values), name
+
+
+def test_phase1_and_phase2_stream_match_run(dt, t, reference):
+    def plant():
+        return ActuatorModel(0.0035, 0.025, 0.05), PIDController(4, 0.05, 0.2)
+
+    theta, omega = Simulator(*plant(), dt).run(reference, t)
+    data = collect(Simulator(*plant(), dt).stream(reference, 250))
+    assert np.array_equal(data["theta_real"], theta) and np.array_equal(data["omega_real"], omega)
+
+    real, controller = plant()
+    outputs = DualSimulator(real, DigitalTwin(0.0031, 0.022, 0.047), controller, dt).run(reference, t)
+    real, controller = plant()
+    data = collect(DualSimulator(real, DigitalTwin(0.0031, 0.022, 0.047), controller, dt).stream(reference, 250))
+    for name, values in zip(("theta_real", "omega_real", "theta_twin", "omega_twin"), outputs):
+        assert np.array_equal(data[name], values), name
+
+
+def test_single_ticks_match_run(dt, t, reference):
+    theta_real, theta_twin, states = build_safe_simulator({}, dt, faults = _faults()).run(reference, t)
+
+    simulator = build_safe_simulator({}, dt, faults = _faults())
+    simulator.reset()
+    ticks = [simulator.step(r) for r in reference[1:]]
+    assert np.array_equal([tick[0] for tick in ticks], theta_real[1:])
+    assert np.array_equal([tick[1] for tick in ticks], theta_twin[1:])
+    assert np.array_equal([tick[4] for tick in ticks], states)
+
+
+def test_unknown_channel_is_rejected(dt):
+    simulator = Simulator(ActuatorModel(0.0035, 0.025, 0.05), PIDController(4, 0.05, 0.2), dt)
+    with pytest.raises(ValueError, match = "theta_twin"):
+        simulator.kernel().stream([0.1], channels = ("theta_twin",))
+
+
+def test_ticks_return_codes_and_states(dt, reference):
+    simulator = build_safe_simulator({}, dt)
+    simulator.reset()
+    for r in reference[:500]:
+        *_, fault, state = simulator.step(r)
+        assert type(fault) is FaultCode and type(state) is SafetyState
+    assert state == simulator.safety.state == SafetyState.SHUTDOWN
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from diagnostics.fault_detector import FaultDetector
+from diagnostics.streaming_detectors import (Cusum, CusumDetector, Ewma, EwmaDetector, MovingWindow, WindowDetector)
+
+STATISTICS = {"window": lambda: MovingWindow(20), "window z": lambda: MovingWindow(20, z = 2.0),
+              "cusum": lambda: Cusum(0.05), "ewma": lambda: Ewma(0.1), "ewma 1": lambda: Ewma(1.0)}
+
+
+@pytest.fixture
+def residuals():
+    rng = np.random.default_rng(3)
+    return 0.1 * rng.standard_normal((3, 1500)) + np.linspace(0, 0.4, 1500)    # noise and a slow drift
+
+
+@pytest.mark.parametrize("make", STATISTICS.values(), ids = list(STATISTICS))
+def test_update_matches_batch(make, residuals):
+    batch = make().batch(residuals)
+    assert batch.shape == residuals.shape
+    for row, expected in zip(residuals, batch):
+        statistic = make()
+        assert [statistic.update(x) for x in row.tolist()] == pytest.approx(expected, rel = 1e-9, abs = 1e-12)
+
+
+def test_window_variance_matches_numpy(residuals):
+    x = residuals[0]
+    window = MovingWindow(20)
+    padded = np.concatenate((np.zeros(19), x))      # the buffer starts at zero
+    _, variance = window.batch(x, variance = True)
+    for i, value in enumerate(x.tolist()):
+        window.update(value)
+        assert window.variance == pytest.approx(np.var(padded[i:i + 20]), abs = 1e-12)
+        assert variance[i] == pytest.approx(window.variance, abs = 1e-12)
+
+
+def test_standard_errors_shrink_the_mean():
+    steady, noisy = MovingWindow(10, z = 2.0), MovingWindow(10, z = 2.0)
+    for i in range(30):
+        steady.update(0.5)
+        noisy.update(0.5 + (-1) ** i)
+    assert steady.update(0.5) == pytest.approx(0.5)
+    assert noisy.update(0.5) < 0.5 * steady.update(0.5)
+    assert MovingWindow(10, z = 2.0).batch(-np.ones(30))[-1] == pytest.approx(-1.0)
+
+
+@pytest.mark.parametrize("detector", [lambda: WindowDetector(0.2, 0.3, 20), lambda: WindowDetector(0.2, 0.3, 20, z = 0),
+                                      lambda: CusumDetector(2.0, 3.0, 0.05, 0.1), lambda: EwmaDetector(0.2, 0.3, 0.1),
+                                      lambda: FaultDetector(0.3, 0.5)])
+def test_detect_matches_detect_batch(detector, residuals):
+    pos, vel = residuals[0], 1.5 * residuals[1]
+    codes = detector().detect_batch(pos, vel)
+    d = detector()
+    assert np.array_equal([d.detect(p, v) for p, v in zip(pos.tolist(), vel.tolist())], codes)
+    assert codes.any() and not codes.all()
+
+
+def test_state_round_trip(residuals):
+    detector = WindowDetector(0.2, 0.3, 20)
+    for p, v in zip(residuals[0, :500].tolist(), residuals[1, :500].tolist()):
+        detector.detect(p, v)
+    state = detector.get_state()
+    first = [detector.detect(p, v) for p, v in zip(residuals[0, 500:].tolist(), residuals[1, 500:].tolist())]
+    detector.set_state(state)
+    second = [detector.detect(p, v) for p, v in zip(residuals[0, 500:].tolist(), residuals[1, 500:].tolist())]
+    assert first == second
+    assert set(state[0]) == set(MovingWindow.STATE)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from simulation.scenario import build_safe_simulator
+from simulation.streaming import collect
+from simulation.trace_store import TraceReader, TraceWriter, record
+
+
+def test_recorded_stream_reads_back(dt, reference, tmp_path):
+    expected = collect(build_safe_simulator({}, dt).stream(reference, 300))
+    trace = record(build_safe_simulator({}, dt).stream(reference, 300), str(tmp_path / "run"), dt,
+                   parameters = {"Kp": np.float64(4)}, seed = 3)
+
+    assert len(trace) == len(reference)
+    assert set(trace.channels) == set(expected)
+    for name, values in expected.items():
+        assert isinstance(trace[name], np.memmap)
+        assert trace[name].dtype == values.dtype
+        assert np.array_equal(trace[name], values), name
+    assert np.array_equal(trace.time(), expected["time"])
+    assert trace.parameters == {"Kp": 4.0} and trace.seed == 3
+    with pytest.raises(ValueError):
+        trace["theta_real"][0] = 1.0                     # read-only
+
+
+def test_header_is_readable_while_writing(tmp_path):
+    path = str(tmp_path / "partial")
+    writer = TraceWriter(path, 0.01)
+    assert len(TraceReader(path)) == 0
+    writer.write({"x": np.arange(5.0)})
+    writer.flush()
+    partial = TraceReader(path)
+    assert len(partial) == 5 and np.array_equal(partial["x"], np.arange(5.0))
+    assert np.array_equal(partial.time(), np.arange(5) * 0.01)
+    writer.close()
+
+
+def test_consume_passes_chunks_on(tmp_path):
+    chunks = [{"x": np.arange(3.0)}, {"x": np.arange(3.0, 5.0)}]
+    with TraceWriter(str(tmp_path / "t"), 0.1) as writer:
+        passed = list(writer.consume(iter(chunks)))
+    assert passed == chunks
+    assert np.array_equal(TraceReader(str(tmp_path / "t"))["x"], np.arange(5.0))
+
+
+def test_inconsistent_chunks_are_rejected(tmp_path):
+    with TraceWriter(str(tmp_path / "t"), 0.1) as writer:
+        writer.write({"x": np.zeros(3)})
+        with pytest.raises(ValueError, match = "'y' appeared"):
+            writer.write({"x": np.zeros(3), "y": np.zeros(3)})
+    with TraceWriter(str(tmp_path / "u"), 0.1) as writer:
+        with pytest.raises(ValueError, match = "expected 3"):
+            writer.write({"x": np.zeros(3), "y": np.zeros(2)})
+
+
+def test_other_directories_are_rejected(tmp_path):
+    (tmp_path / "header.json").write_text('{"format": "something-else"}')
+    with pytest.raises(ValueError, match = "columnar-trace-v1"):
+        TraceReader(str(tmp_path))
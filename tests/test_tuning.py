@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from control.tuning import GainTuner
+from verification.requirements import Requirements
+from verification.test_runner import TestRunner as Runner
+from simulation.scenario import build_safe_simulator
+
+
+@pytest.fixture
+def tuner():
+    return GainTuner(Requirements(), duration = 1)
+
+
+def test_scores_match_the_test_runner(tuner):
+    score, = tuner.evaluate([(4, 0.05, 0.2)])
+    params = {"Kp": 4, "Ki": 0.05, "Kd": 0.2, "drift_rate": 0.0, "pos_threshold": np.inf, "vel_threshold": np.inf}
+    runner = Runner(Requirements(), build_safe_simulator(params, tuner.dt), tuner.dt)
+    results = runner.test_run(tuner.reference, tuner.t)
+    for name in ("overshoot", "rms_error", "settling_time"):
+        assert score[name] == pytest.approx(results[name], rel = 1e-12), name
+    verdicts = runner.verify(results)
+    assert all(score[k] == verdicts[k] for k in ("Overshoot", "Rms_error", "Settling_time"))
+
+
+def test_evaluations_are_cached(tuner):
+    first = tuner.evaluate([(4, 0.05, 0.2), (2, 0.0, 0.1)])
+    assert tuner.simulated == 2
+    again = tuner.evaluate([(2, 0.0, 0.1 + 1e-9), (4, 0.05, 0.2), (3, 0.0, 0.1)])    # within the rounding
+    assert tuner.simulated == 3
+    assert again[:2] == first[::-1]
+
+
+def test_scenario_changes_the_key(tuner):
+    other = GainTuner(Requirements(), duration = 1, params = {"J": 0.004})
+    assert tuner.key((4, 0.05, 0.2)) != other.key((4, 0.05, 0.2))
+    assert tuner.key((0.0, 0, 0)) == tuner.key((-0.0, 0, 0))
+
+
+def test_grid_is_sorted_and_tune_improves_on_it(tuner):
+    grid = tuner.grid([2, 4, 8], [0, 0.05], [0.1, 0.2])
+    assert len(grid) == 12
+    assert [r["cost"] for r in grid] == sorted(r["cost"] for r in grid)
+
+    best = tuner.tune([2, 4, 8], [0, 0.05], [0.1, 0.2], iterations = 20)
+    assert best["cost"] <= grid[0]["cost"]
+    assert 2 <= best["Kp"] <= 8 and 0 <= best["Ki"] <= 0.05 and 0.1 <= best["Kd"] <= 0.2
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")    # the unstable trace overflows
+def test_unstable_gains_cost_infinity(tuner):
+    score, = tuner.evaluate([(1e6, 0, 0)])
+    assert score["cost"] == np.inf and not score["Pass"]
@@ -0,0 +1,127 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from diagnostics.fault_library import FaultSet
+from simulation.scenario import NOMINAL, build_safe_simulator
+from verification.test_runner import TestRunner
+
+METRICS = {"Overshoot": "overshoot", "Rms_error": "rms_error",        # verdict name -> TestRunner result key
+           "Settling_time": "settling_time", "Fault_latency": "fault_latency"}
+PERCENTILES = (5, 50, 95)
+
+
+def uniform(low, high):                      # absolute bounds
+    return lambda rng, size, nominal, sampled: rng.uniform(low, high, size)
+
+
+def normal(mean, std):
+    return lambda rng, size, nominal, sampled: rng.normal(mean, std, size)
+
+
+def tolerance(rel):                          # nominal value +/- rel (fraction), uniformly
+    return lambda rng, size, nominal, sampled: nominal * rng.uniform(1 - rel, 1 + rel, size)
+
+
+def mismatch(key, rel):                      # relative to an already sampled parameter, e.g. twin vs real
+    return lambda rng, size, nominal, sampled: sampled[key] * rng.uniform(1 - rel, 1 + rel, size)
+
+
+def _evaluate(job):                          # runs in a worker process
+    params, seed, faults, requirements, dt, duration, setpoint, early_stop, cache = job
+    t = np.arange(0, duration, dt)
+    reference = setpoint * np.ones_like(t)
+
+    simulator = build_safe_simulator(params, dt, faults = FaultSet(faults, seed) if faults else None)
+    runner = TestRunner(requirements, simulator, dt, early_stop = early_stop, cache = cache)
+    results = runner.test_run(reference, t)
+    return results, runner.verify(results), runner.truncated
+
+
+class MonteCarloCampaign:
+    '''
+    Verification campaign over sampled scenario parameters, spread over a process pool
+    '''
+    def __init__(self, requirements, distributions, runs, seed = 0, nominal = None,
+                 dt = 0.001, duration = 2, setpoint = np.deg2rad(60), early_stop = False, cache = None, faults = ()):
+        self.requirements = requirements
+        self.distributions = distributions    # {parameter: distribution}, sampled in insertion order
+        self.runs = runs
+        self.seed = seed
+        self.nominal = {**NOMINAL, **(nominal or {})}    # unsampled parameters run at these values
+        self.dt = dt
+        self.duration = duration
+        self.setpoint = setpoint
+        self.early_stop = early_stop          # runs end at Shutdown or once every verdict is decided
+        self.cache = cache                    # optional ResultCache shared by the workers, repeated runs are loaded
+        self.faults = list(faults)            # fault library faults in every run, their noise seeded per run
+        self.records = []
+
+    def sample(self):
+        # all draws happen here, in the parent, so the runs do not depend on the number of workers
+        rng = np.random.default_rng(self.seed)
+        sampled = {}
+        for key, distribution in self.distributions.items():
+            sampled[key] = np.asarray(distribution(rng, self.runs, self.nominal.get(key), sampled), dtype = float)
+
+        seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(self.seed).spawn(self.runs)]
+        return [{**{k: float(v[i]) for k, v in sampled.items()}, "seed": seeds[i]} for i in range(self.runs)]
+
+    def run(self, workers = None, chunksize = None, callback = None):
+        samples = self.sample()
+        jobs = [({**self.nominal, **{k: v for k, v in s.items() if k != "seed"}}, s["seed"], self.faults,
+                 self.requirements, self.dt, self.duration, self.setpoint, self.early_stop, self.cache)
+                for s in samples]
+
+        workers = workers or os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = max(1, -(-len(jobs) // (workers * 4)))    # a few chunks per worker keeps pickling cheap
+
+        metrics = {m: np.full(self.runs, np.nan) for m in METRICS.values()}
+        verdicts = {}
+        truncated = np.zeros(self.runs, dtype = bool)
+        self.records = []
+
+        if workers == 1:
+            outputs = map(_evaluate, jobs)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers = workers)
+            outputs = pool.map(_evaluate, jobs, chunksize = chunksize)
+
+        try:
+            for i, (results, verification, stopped) in enumerate(outputs):    # streamed back in submission order
+                for m in metrics:
+                    metrics[m][i] = results[m]
+                truncated[i] = stopped
+                for k, v in verification.items():
+                    verdicts.setdefault(k, np.zeros(self.runs, dtype = bool))[i] = v
+
+                record = {**samples[i], **results, **verification, "truncated": stopped}
+                self.records.append(record)
+                if callback is not None:
+                    callback(i, record)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return self.summary(metrics, verdicts, truncated)
+
+    def summary(self, metrics, verdicts, truncated = None):
+        '''
+        Pass rate and percentile table; truncated (early-stopped) runs only report bounds, so they count towards the
+        pass rates but not the percentiles
+        '''
+        complete = np.ones(self.runs, dtype = bool) if truncated is None else ~np.asarray(truncated)
+        table = []
+        for name, passed in verdicts.items():
+            values = metrics[METRICS[name]]
+            row = {"Requirement": name, "Pass rate": passed.mean(), "Runs": self.runs}
+            finite = values[np.isfinite(values) & complete]
+            for p in PERCENTILES:
+                row[f"P{p}"] = np.percentile(finite, p) if finite.size else np.nan
+            table.append(row)
+
+        table.append({"Requirement": "All", "Pass rate": np.logical_and.reduce(list(verdicts.values())).mean(),
+                      "Runs": self.runs})
+        return table
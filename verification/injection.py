@@ -0,0 +1,102 @@
+import numpy as np
+from safety.state_machine import SafetyState
+
+CHANNELS = ("theta_real", "theta_twin", "state")
+
+
+def _target(kernel, path):                   # "injector.drift_rate" -> (kernel.injector, "drift_rate")
+    component, attribute = path.split(".")
+    return getattr(kernel, component), attribute
+
+
+class InjectionSweep:
+    '''
+    Fault branches forked from checkpoints of one fault-free run, so the shared prefix is simulated only once
+    '''
+    def __init__(self, simulator, faults, injection_times, dt):
+        self.simulator = simulator            # anything with kernel(), e.g. the phase 4 SafeSimulator
+        self.faults = faults                  # {name: {"component.attribute": value}}, e.g. {"injector.drift_rate": 0.02}
+        self.injection_times = injection_times
+        self.dt = dt
+        self.records = []
+        self.traces = {}
+        self.steps = 0                        # plant steps actually stepped, closed-form tails after Shutdown excluded
+
+    def run(self, reference, t, keep_traces = False):
+        reference = np.broadcast_to(np.asarray(reference, dtype = float), np.shape(t))
+        length = len(t)
+        indices = sorted({min(max(int(round(ti / self.dt)), 1), length) for ti in self.injection_times})
+
+        kernel = self.simulator.kernel()
+        self.records, self.traces, self.steps = [], {}, 0
+
+        # nominal run, paused at every injection index to take a checkpoint
+        segments, checkpoints, start = [], [], 0
+        for index in indices + [length]:
+            resume = start > 0
+            segments.append(self._collect(kernel.stream(reference[start:index], max(index - start, 1),
+                                                        CHANNELS, resume = resume)))
+            self.steps += index - start - (not resume)    # sample 0 is the initial state, not a step
+            if index < length:
+                checkpoints.append(kernel.snapshot())
+            start = index
+        nominal = {c: np.concatenate([s[c] for s in segments]) for c in CHANNELS}
+
+        for snapshot in checkpoints:
+            k = snapshot.index
+            for name, overrides in self.faults.items():
+                kernel.restore(snapshot)
+                original = {path: getattr(*_target(kernel, path)) for path in overrides}
+                for path, value in overrides.items():
+                    setattr(*_target(kernel, path), value)
+
+                branch = self._branch(kernel, reference, k)
+
+                for path, value in original.items():
+                    setattr(*_target(kernel, path), value)
+
+                trace = {c: np.concatenate((nominal[c][:k], branch[c])) for c in CHANNELS}
+                self.records.append(self._record(name, k, trace, nominal))
+                if keep_traces:
+                    self.traces[(name, k)] = trace
+
+        self.nominal = nominal
+        return self.records
+
+    def _branch(self, kernel, reference, k):
+        '''
+        Samples k .. end of one branch; stepped until Shutdown latches, the rest filled in closed form
+        '''
+        length = len(reference)
+        chunks = list(kernel.stream(reference[k:], max(length - k, 1), CHANNELS, resume = True,
+                                    stop_state = SafetyState.SHUTDOWN))
+        self.steps += kernel.index - k
+        if kernel.stopped == "latch" and kernel.index < length and kernel.coastable(SafetyState.SHUTDOWN):
+            chunks.append(kernel.coast(reference[kernel.index:], CHANNELS))
+        return self._collect(chunks)
+
+    @staticmethod
+    def _collect(chunks):
+        parts = list(chunks)
+        if not parts:
+            return {c: np.zeros(0, dtype = np.uint8 if c == "state" else float) for c in CHANNELS}
+        return {c: np.concatenate([p[c] for p in parts]) for c in CHANNELS}
+
+    def _record(self, name, index, trace, nominal):
+        '''
+        The fault is detected on the first sample from the injection on where the branch is in a worse safety state
+        than the fault-free run; NaN latency when the branch never is
+        '''
+        worse = trace["state"][index:] > nominal["state"][index:]
+        detected = bool(worse.any())
+        final = SafetyState(int(trace["state"][-1])) if len(trace["state"]) else SafetyState.NORMAL
+        nominal_final = SafetyState(int(nominal["state"][-1])) if len(nominal["state"]) else SafetyState.NORMAL
+        return {"fault": name, "injection_time": index * self.dt,
+                "detection_latency": np.argmax(worse) * self.dt if detected else np.nan,
+                "final_state": final, "nominal_state": nominal_final, "escalated": detected}
+
+    def savings(self):                        # stepped samples against stepping every branch from t = 0
+        branches = len(self.records)
+        full = branches * (len(self.nominal["state"]) - 1) if branches else 0
+        return {"branches": branches, "steps": self.steps, "steps_without_forking": full,
+                "ratio": self.steps / full if full else np.nan}
@@ -0,0 +1,180 @@
+import copy
+import enum
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+import numpy as np
+
+try:
+    import fcntl                             # POSIX advisory locks; elsewhere writers rely on os.replace alone
+except ImportError:
+    fcntl = None
+
+FORMAT = "result-cache-v1"
+SOURCES = ("models", "control", "diagnostics", "safety", "simulation", "metrics", "verification")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUTS = ("stopped", "truncated", "profiler")    # simulator attributes that are not part of its configuration
+
+
+@lru_cache(maxsize = 1)
+def code_version():
+    '''
+    Digest of every source file a result can depend on, so editing the model invalidates the cache
+    '''
+    digest = hashlib.sha256()
+    for package in SOURCES:
+        for folder, dirs, files in sorted(os.walk(os.path.join(ROOT, package))):
+            dirs.sort()
+            for name in sorted(f for f in files if f.endswith(".py")):
+                path = os.path.join(folder, name)
+                digest.update(os.path.relpath(path, ROOT).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def describe(value):
+    '''
+    JSON-able description of a configuration value: arrays by digest, objects by class and public attributes
+    '''
+    if isinstance(value, enum.Enum):
+        return value.value
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        return {"dtype": data.dtype.str, "shape": data.shape, "sha256": hashlib.sha256(data.tobytes()).hexdigest()}
+    if isinstance(value, (list, tuple)):
+        return [describe(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): describe(v) for k, v in sorted(value.items(), key = lambda item: str(item[0]))}
+
+    cls = type(value)
+    constants = {k: v for k, v in vars(cls).items() if k.isupper()}    # e.g. the Requirements thresholds
+    fields = {k: v for k, v in vars(value).items() if not k.startswith("_") and not callable(v) and k not in OUTPUTS}
+    return {"class": f"{cls.__module__}.{cls.__qualname__}", **describe({**constants, **fields})}
+
+
+class ResultCache:
+    '''
+    Content-addressed on-disk cache of TestRunner results and traces, one .npz per configuration.
+    Entries are written to a temporary file and renamed into place, so readers never see half an entry;
+    a hit refreshes the entry's mtime and the oldest entries are evicted once the cache exceeds max_bytes.
+    The size is scanned once and then kept as a running total of this process's writes, so with several
+    writing processes the cache can exceed max_bytes by what the others wrote since their last eviction
+    '''
+    def __init__(self, path, max_bytes = 1 << 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total = None                    # bytes in the cache as of the last scan plus later puts
+        os.makedirs(path, exist_ok = True)
+
+    def key(self, simulator, reference, t, **settings):
+        '''
+        Hash of the simulator configuration as a run starts from it, the reference and time arrays and settings
+        '''
+        start = copy.copy(simulator)
+        for name, part in vars(simulator).items():    # the components a run resets, compared in their reset state
+            if name.startswith("_") or name in OUTPUTS:
+                continue
+            if hasattr(part, "reset") and not callable(part):
+                part = copy.deepcopy(part)
+                part.reset()
+                setattr(start, name, part)
+
+        t = np.asarray(t, dtype = float)
+        config = {"format": FORMAT, "code": code_version(), "simulator": describe(start),
+                  "reference": describe(np.broadcast_to(np.asarray(reference, dtype = float), t.shape)),
+                  "t": describe(t), "settings": describe(settings)}
+        return hashlib.sha256(json.dumps(config, sort_keys = True).encode()).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.npz")
+
+    def get(self, key):
+        '''
+        (results, traces, truncated) for a key, None on a miss
+        '''
+        try:
+            with np.load(self._file(key)) as data:
+                names = [str(n) for n in data["result_names"]]
+                results = dict(zip(names, data["result_values"]))
+                traces = tuple(data[f"trace_{i}"] for i in range(int(data["trace_count"])))
+                truncated = bool(data["truncated"])
+            os.utime(self._file(key))        # most recently used
+        except (FileNotFoundError, KeyError, ValueError, OSError):    # missing, evicted meanwhile or damaged
+            self.misses += 1
+            return None
+        self.hits += 1
+        return results, traces, truncated
+
+    def put(self, key, results, traces, truncated = False):
+        if self.total is None:
+            self.total = self.size()
+        arrays = {f"trace_{i}": np.asarray(trace) for i, trace in enumerate(traces)}
+        fd, temporary = tempfile.mkstemp(dir = self.path, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, result_names = np.array(list(results), dtype = str),
+                         result_values = np.array([results[k] for k in results], dtype = float),
+                         trace_count = len(arrays), truncated = truncated, **arrays)
+                written = f.tell()
+            try:
+                replaced = os.stat(self._file(key)).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temporary, self._file(key))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.total += written - replaced
+        if self.total > self.max_bytes:      # only then is the directory scanned again
+            self.evict()
+
+    def entries(self):                       # (mtime, size, path) oldest first
+        found = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(found)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        '''
+        Removes least recently used entries until the cache fits max_bytes; one process at a time
+        '''
+        with open(os.path.join(self.path, "evict.lock"), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self.total = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.total = 0
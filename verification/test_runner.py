@@ -1,23 +1,61 @@
 import numpy as np
 from metrics.performance import PerformanceMetrics
+from safety.state_machine import SafetyState
+from simulation.stopping import StopOnLatch, StopWhenDecided
 
 class TestRunner:
     '''
     Running a test and verifying the final report against thresholds
     '''
-    def __init__(self, requirements, simulator, dt):
+    def __init__(self, requirements, simulator, dt, early_stop = False, cache = None):
         self.requirements = requirements
         self.simulator = simulator
         self.dt = dt
+        self.early_stop = early_stop        # stop on Shutdown or once every verdict is decided
+        self.cache = cache                  # optional ResultCache; every run resets the simulator first, so a hit
+                                            # returns what the run would, it just leaves the simulator untouched
+        self.truncated = False
+        self.traces = None                  # (theta_real, theta_twin, states) of the last test_run
 
     def test_run(self, reference, t):
-        theta_real, theta_twin, states = self.simulator.run(reference, t)
+        if self.cache is None:
+            return self._test_run(reference, t)
+
+        key = self.cache.key(self.simulator, reference, t, dt = self.dt, early_stop = self.early_stop,
+                             requirements = self.requirements if self.early_stop else None)
+        hit = self.cache.get(key)
+        if hit is not None:
+            results, self.traces, self.truncated = hit
+            return results
+        results = self._test_run(reference, t)
+        self.cache.put(key, results, self.traces, self.truncated)
+        return results
+
+    def _test_run(self, reference, t):
+        '''
+        Metrics of one run. A run truncated by early_stop ended once every verdict was decided; its overshoot, RMS
+        error and settling time are then lower bounds of the full-run values, which is all verify() needs
+        '''
+        horizon = len(t)
+        if self.early_stop:
+            stop = (StopOnLatch(), StopWhenDecided(self.requirements))
+            theta_real, theta_twin, states = self.simulator.run(reference, t, stop = stop)
+            self.truncated = self.simulator.truncated
+            reference, t = np.broadcast_to(reference, np.shape(t))[:len(theta_real)], t[:len(theta_real)]
+        else:
+            theta_real, theta_twin, states = self.simulator.run(reference, t)
+            self.truncated = False
+        self.traces = (theta_real, theta_twin, states)
 
         overshoot = PerformanceMetrics.overshoot(reference, theta_real)
-        rms_error = PerformanceMetrics.rms(reference, theta_real)
         settling_time = PerformanceMetrics.settling(reference, theta_real, t)
+        if self.truncated:                  # the missing samples can only add squared error
+            rms_error = np.sqrt(np.sum((np.asarray(theta_real) - reference) ** 2) / horizon)
+        else:
+            rms_error = PerformanceMetrics.rms(reference, theta_real)
 
-        latency_index = next((i for i, s in enumerate(states) if s != "Normal_state"), None)
+        abnormal = np.asarray(states) != SafetyState.NORMAL
+        latency_index = np.argmax(abnormal) if abnormal.any() else None               # first sample out of normal state
         fault_latency = latency_index * self.dt if latency_index else np.nan         # calculating fault latency
 
         return {"overshoot": overshoot, "rms_error": rms_error, "settling_time": settling_time, "fault_latency": fault_latency}
@@ -28,4 +66,4 @@ class TestRunner:
             "Rms_error": results["rms_error"] <= self.requirements.MAX_RMS_ERROR,
             "Settling_time": results["settling_time"] <= self.requirements.MAX_SETTLING_TIME,
             "Fault_latency": results["fault_latency"] <= self.requirements.MAX_FAULT_LATENCY
-        }
\ No newline at end of file
+        }